@@ -0,0 +1,113 @@
+import hashlib
+import logging
+import time
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, Optional, Type
+
+from fastapi import Depends, HTTPException, Request, status
+from redis.exceptions import RedisError
+
+from app.core.cache_stats import count_lookups
+from app.database.versions import resource_versions
+
+logger = logging.getLogger(__name__)
+
+# HTTP cache validation for the catalog routes.
+#
+# A route declares the tables its response is built from. Its ETag is
+# derived from the version counters of those tables (see ResourceVersions),
+# so validating a request costs one Redis round trip instead of running the
+# route's query and hashing its output. A conditional request whose
+# validators still match gets a 304 before the route body runs.
+
+CacheHeaders = Dict[str, str]
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an ETag with an If-None-Match header."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(",")
+    )
+
+
+def _not_modified_since(if_modified_since: Optional[str], last_modified: datetime):
+    if not if_modified_since:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    # HTTP dates have a one second resolution
+    return last_modified.replace(microsecond=0) <= since
+
+
+def cache_validation(
+    *models: Type[Any],
+    max_age: int,
+    stale_while_revalidate: int = 0,
+    period: Optional[int] = None,
+):
+    """
+    Return a dependency validating conditional requests to a route whose
+    response is built from the tables of `models`.
+
+    - max_age / stale_while_revalidate are the Cache-Control lifetimes
+    - period is for responses that also change with time (e.g. "this
+      month"): their validators change every `period` seconds as well
+
+    The dependency answers with a 304 when If-None-Match (or, without it,
+    If-Modified-Since) matches, and otherwise returns the headers for the
+    route to add to its response. If Redis is unavailable, the response
+    goes out without validators.
+    """
+    tables = [model.__tablename__ for model in models]
+    cache_control = f"public, max-age={max_age}"
+    if stale_while_revalidate:
+        cache_control += f", stale-while-revalidate={stale_while_revalidate}"
+
+    async def validate(request: Request) -> CacheHeaders:
+        headers = {"Cache-Control": cache_control}
+        try:
+            versions, last_modified = await resource_versions.get(tables)
+        except RedisError as exc:
+            logger.warning("Serving %s without validators: %s", request.url.path, exc)
+            return headers
+
+        tag = ".".join(f"{table}:{v}" for table, v in zip(tables, versions))
+        if period:
+            started = int(time.time() // period) * period
+            tag += f"@{started}"
+            last_modified = max(
+                last_modified, datetime.fromtimestamp(started, timezone.utc)
+            )
+        digest = hashlib.blake2b(tag.encode(), digest_size=8).hexdigest()
+        headers["ETag"] = f'W/"{digest}"'
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            not_modified = etag_matches(if_none_match, headers["ETag"])
+        else:
+            not_modified = _not_modified_since(
+                request.headers.get("if-modified-since"), last_modified
+            )
+        if if_none_match is not None or "if-modified-since" in request.headers:
+            # Conditional requests: a 304 is a hit of the client's cache
+            count_lookups(
+                "http_validation", hits=int(not_modified), misses=int(not not_modified)
+            )
+        if not_modified:
+            raise HTTPException(
+                status_code=status.HTTP_304_NOT_MODIFIED, headers=headers
+            )
+        return headers
+
+    return Depends(validate)
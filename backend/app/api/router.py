@@ -1,8 +1,12 @@
 from fastapi import APIRouter
 
+from .routers.admin import admin_router
 from .routers.authors import authors_router
 from .routers.books import books_router
+from .routers.cart import cart_router
+from .routers.health import health_router
 from .routers.orders import orders_router
+from .routers.storefront import storefront_router
 from .routers.users import users_router
 
 router = APIRouter()
@@ -20,3 +24,7 @@ combined_router.include_router(authors_router)
 combined_router.include_router(books_router)
 combined_router.include_router(users_router)
 combined_router.include_router(orders_router)
+combined_router.include_router(cart_router)
+combined_router.include_router(storefront_router)
+combined_router.include_router(admin_router)
+combined_router.include_router(health_router)
@@ -0,0 +1,69 @@
+import logging
+
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+
+from app.api.schemas.catalog_import import CatalogImportReport
+from app.api.schemas.stock import BookStockRead
+from app.config import stock_settings
+from app.core.security import require_admin
+from app.services.catalog_import import CatalogImportServiceDep, ImportFormat
+from app.services.stock import StockServiceDep
+
+logger = logging.getLogger(__name__)
+
+admin_router = APIRouter(prefix="/admin", dependencies=[Depends(require_admin)])
+
+
+def _log_progress(report: CatalogImportReport):
+    logger.info(
+        "catalog import: %d rows read, %d books upserted, %d failed (%.0f rows/s)",
+        report.rows_read,
+        report.books_upserted,
+        report.rows_failed,
+        report.rows_per_second,
+    )
+
+
+@admin_router.post("/catalog/import")
+async def import_catalog(
+    request: Request,
+    import_service: CatalogImportServiceDep,
+    format: ImportFormat = "csv",
+) -> CatalogImportReport:
+    """
+    Bulk import a publisher feed, streamed as the raw request body.
+    - format is csv (with a header row) or ndjson
+    - batch_size controls the rows per upsert/transaction
+    Rows failing validation are reported individually and do not abort the
+    import.
+    """
+    try:
+        return await import_service.import_stream(
+            request.stream(), format, on_progress=_log_progress
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+@admin_router.put("/books/{book_id}/stock-shards")
+async def set_stock_shards(
+    book_id: int,
+    slots: Annotated[int, Query(ge=0, le=stock_settings.STOCK_MAX_SHARDS)],
+    stock_service: StockServiceDep,
+) -> BookStockRead:
+    """
+    Flag a book as hot by splitting its stock across `slots` counters, so
+    concurrent checkouts stop contending on the book row.
+    - slots=0 folds the counters back into the book's stock_quantity
+    - calling it again on a sharded book re-splits the current stock
+    """
+    book = await stock_service.shard(book_id, slots)
+    if not book:
+        raise HTTPException(status_code=404, detail="Book not found.")
+    return BookStockRead(
+        book_id=book.id,
+        stock_quantity=book.stock_quantity,
+        stock_shards=book.stock_shards,
+    )
@@ -1,34 +1,49 @@
 from typing import List
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Response
 
+from app.api.caching import CacheHeaders, cache_validation
+from app.api.serialization import encode_author, encode_authors, json_response
 from app.database.models import Author, Book
 from app.services.authors import AuthorsServiceDep
 
 authors_router = APIRouter(prefix="/authors")
 
+# Conditional requests are answered from the versions of the tables behind
+# each route (see app.api.caching).
+_AUTHORS_CACHE = cache_validation(Author, max_age=300, stale_while_revalidate=3600)
+_AUTHOR_BOOKS_CACHE = cache_validation(Book, max_age=60, stale_while_revalidate=300)
 
-@authors_router.get("")
-async def get_all_authors(authors_service: AuthorsServiceDep) -> List[Author]:
+
+@authors_router.get("", response_model=List[Author])
+async def get_all_authors(
+    authors_service: AuthorsServiceDep, cache: CacheHeaders = _AUTHORS_CACHE
+) -> Response:
     """Retrieve all the authors available in our store."""
     authors: List[Author] = await authors_service.get_all()
-    return [a.model_dump() for a in authors]
+    return json_response(encode_authors(authors), headers=cache)
 
 
-@authors_router.get("/{id}")
-async def get_author(id: int, authors_service: AuthorsServiceDep) -> Author:
+@authors_router.get("/{id}", response_model=Author)
+async def get_author(
+    id: int, authors_service: AuthorsServiceDep, cache: CacheHeaders = _AUTHORS_CACHE
+) -> Response:
     """Retrieve a specific author, by id, from the database."""
     author = await authors_service.get_by_id(id)
     if not author:
         raise HTTPException(status_code=404, detail="Author not found.")
 
-    return author.model_dump()
+    return json_response(encode_author(author), headers=cache)
 
 
 @authors_router.get("/{author_id}/books")
 async def get_author_books(
-    author_id: int, authors_service: AuthorsServiceDep
+    author_id: int,
+    authors_service: AuthorsServiceDep,
+    response: Response,
+    cache: CacheHeaders = _AUTHOR_BOOKS_CACHE,
 ) -> List[Book]:
     """Retrieve all books by an author, by id, from the database."""
+    response.headers.update(cache)
     books = await authors_service.get_books_for_author(author_id)
     return [b.model_dump() for b in books]
@@ -1,79 +1,238 @@
-from typing import List, Optional
+from typing import List, Optional, Union
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Response, status
+from fastapi.responses import StreamingResponse
 
-from app.api.schemas.books_authors import BookRead, BestSellerRead
-from app.database.models import Book
+from app.api.caching import CacheHeaders, cache_validation
+from app.api.schemas.books_authors import (
+    BookFields,
+    BookRead,
+    BookSummaryRead,
+    BestSellerRead,
+    BestSellerSummaryRead,
+    RelatedBookRead,
+)
+from app.api.serialization import (
+    encode_book,
+    encode_books,
+    encode_book_summaries,
+    encode_bestsellers,
+    encode_bestseller_summaries,
+    encode_related_books,
+    json_response,
+)
+from app.api.schemas.reviews import ReviewCreate, ReviewPage, ReviewRead
+from app.api.streaming import ExportFormat, export_response
+from app.core.security import SignedInUserDep
+from app.database.models import (
+    Author,
+    Book,
+    CoPurchase,
+    Order,
+    OrderArchive,
+    OrderItem,
+    OrderItemArchive,
+    Review,
+)
 from app.services.books import BooksServiceDep
+from app.services.copurchase import CoPurchaseServiceDep
+from app.services.exports import BOOK_EXPORT_FIELDS, ExportsServiceDep
+from app.services.reviews import DEFAULT_PAGE_SIZE, ReviewsServiceDep
+from app.services.trending import TrendingServiceDep, TrendingWindow
 
 books_router = APIRouter(prefix="/books")
 
+# Conditional requests to the catalog are answered from the versions of the
+# tables behind each route (see app.api.caching).
+_CATALOG_CACHE = cache_validation(Book, Author, max_age=60, stale_while_revalidate=300)
+# Listings relative to the current time are revalidated hourly at least
+_NEW_ARRIVALS_CACHE = cache_validation(
+    Book, Author, max_age=60, stale_while_revalidate=300, period=3600
+)
+_BESTSELLERS_CACHE = cache_validation(
+    Book,
+    Author,
+    Order,
+    OrderItem,
+    OrderArchive,
+    OrderItemArchive,
+    max_age=60,
+    stale_while_revalidate=300,
+    period=3600,
+)
+_RELATED_CACHE = cache_validation(
+    CoPurchase, Book, Author, max_age=300, stale_while_revalidate=3600
+)
+_REVIEWS_CACHE = cache_validation(Review, max_age=30, stale_while_revalidate=120)
 
-@books_router.get("", response_model=List[BookRead])
-async def get_all_books(books_service: BooksServiceDep) -> List[BookRead]:
-    """Retrieve all books available in our store."""
-    books: List[Book] = await books_service.get_all()
-    # convert the ORM instances into DTO instances
-    result = []
-    for b in books:
-        bd = b.model_dump()
-        bd["author"] = b.author.model_dump() if getattr(b, "author", None) else None
-        result.append(BookRead(**bd))
-    return result
+
+@books_router.get("", response_model=Union[List[BookRead], List[BookSummaryRead]])
+async def get_all_books(
+    books_service: BooksServiceDep,
+    fields: BookFields = "full",
+    cache: CacheHeaders = _CATALOG_CACHE,
+) -> Response:
+    """
+    Retrieve all books available in our store.
+    - fields=summary returns the compact list-view projection
+    """
+    if fields == "summary":
+        rows = await books_service.get_all_summaries()
+        return json_response(encode_book_summaries(rows), headers=cache)
+
+    # serialize the records of the lean read path straight into the DTO's
+    # JSON form
+    books = await books_service.get_all_records()
+    return json_response(encode_books(books), headers=cache)
 
 
-@books_router.get("/bestsellers/monthly", response_model=List[BestSellerRead])
+@books_router.get(
+    "/bestsellers/monthly",
+    response_model=Union[List[BestSellerRead], List[BestSellerSummaryRead]],
+)
 async def get_monthly_bestsellers(
     year: Optional[int] = None,
     month: Optional[int] = None,
     limit: int = 10,
+    fields: BookFields = "full",
     books_service: BooksServiceDep = None,
-) -> List[BestSellerRead]:
+    cache: CacheHeaders = _BESTSELLERS_CACHE,
+) -> Response:
     """
     Retrieve the top-selling books for a calendar month.
     - year and month are optional (defaults to current UTC month)
     - limit controls how many rows are returned
+    - fields=summary returns the compact list-view projection of each book
     """
-    # Call the service to get tuples of (Book, units_sold)
-    rows = await books_service.get_monthly_bestsellers(
+    if fields == "summary":
+        rows = await books_service.get_monthly_bestseller_summaries(
+            year=year, month=month, limit=limit
+        )
+        return json_response(encode_bestseller_summaries(rows), headers=cache)
+
+    # Call the service to get tuples of (book record, units_sold)
+    rows = await books_service.get_monthly_bestseller_records(
         year=year, month=month, limit=limit
     )
+    return json_response(encode_bestsellers(rows), headers=cache)
 
-    result: List[BestSellerRead] = []
-    for book_obj, units in rows:
-        # Build book DTO the same way other routes do
-        bd = book_obj.model_dump()
-        bd["author"] = (
-            book_obj.author.model_dump() if getattr(book_obj, "author", None) else None
-        )
-        book_dto = BookRead(**bd)
-        result.append(BestSellerRead(book=book_dto, units_sold=units))
 
-    return result
+@books_router.get("/trending", response_model=List[BestSellerSummaryRead])
+async def get_trending_books(
+    trending_service: TrendingServiceDep,
+    window: TrendingWindow = "hour",
+    limit: int = 10,
+) -> Response:
+    """
+    Retrieve the books selling best right now.
+    - window is the sliding window the sales are counted over (hour or day)
+    - limit controls how many rows are returned
+    """
+    rows = await trending_service.get_trending(window=window, limit=limit)
+    return json_response(encode_bestseller_summaries(rows))
+
+
+@books_router.get(
+    "/new_arrivals", response_model=Union[List[BookRead], List[BookSummaryRead]]
+)
+async def get_new_arrivals(
+    books_service: BooksServiceDep,
+    fields: BookFields = "full",
+    cache: CacheHeaders = _NEW_ARRIVALS_CACHE,
+) -> Response:
+    """
+    Retrieve the most recently added books.
+    - fields=summary returns the compact list-view projection
+    """
+    if fields == "summary":
+        rows = await books_service.get_new_arrival_summaries()
+        return json_response(encode_book_summaries(rows), headers=cache)
+
+    books = await books_service.get_new_arrival_records()
+    return json_response(encode_books(books), headers=cache)
 
-@books_router.get("/new_arrivals", response_model=List[BookRead])
-async def get_new_arrivals(books_service: BooksServiceDep) -> List[BookRead]:
-    """Retrieve the most recently added books."""
-    books =  await books_service.get_new_arrivals()
-    result = []
-    for b in books:
-        bd = b.model_dump()
-        bd["author"] = b.author.model_dump() if getattr(b, "author", None) else None
-        result.append(BookRead(**bd))
 
-    return result
+@books_router.get("/export")
+async def export_books(
+    exports_service: ExportsServiceDep,
+    format: ExportFormat = "ndjson",
+    since: Optional[int] = None,
+) -> StreamingResponse:
+    """
+    Stream the whole catalog as NDJSON or CSV.
+    - since exports only books with a higher id (incremental exports);
+      pass the X-Export-Watermark header of the previous export
+    """
+    watermark = await exports_service.books_watermark(since)
+    chunks = exports_service.stream_books(until=watermark, since=since)
+    return export_response(chunks, BOOK_EXPORT_FIELDS, format, watermark, "books")
 
 
 @books_router.get("/{book_id}", response_model=BookRead)
-async def get_book(book_id: int, books_service: BooksServiceDep) -> BookRead:
+async def get_book(
+    book_id: int, books_service: BooksServiceDep, cache: CacheHeaders = _CATALOG_CACHE
+) -> Response:
     """Retrieve a specific book, by id, from the database."""
     book: Book | None = await books_service.get_by_id(book_id)
     if not book:
         raise HTTPException(status_code=404, detail="Book not found.")
 
-    # Convert the ORM instance into the DTO that the route advertises.
-    book_data = book.model_dump()
-    book_data["author"] = (
-        book.author.model_dump() if getattr(book, "author", None) else None
-    )
-    return BookRead(**book_data)
\ No newline at end of file
+    return json_response(encode_book(book), headers=cache)
+
+
+@books_router.get("/{book_id}/related", response_model=List[RelatedBookRead])
+async def get_related_books(
+    book_id: int,
+    copurchase_service: CoPurchaseServiceDep,
+    limit: int = 10,
+    cache: CacheHeaders = _RELATED_CACHE,
+) -> Response:
+    """
+    Retrieve the books most often bought together with a book
+    ("customers who bought this also bought").
+    - limit controls how many books are returned
+    """
+    rows = await copurchase_service.get_related(book_id, limit=limit)
+    return json_response(encode_related_books(rows), headers=cache)
+
+
+@books_router.get("/{book_id}/reviews")
+async def get_book_reviews(
+    book_id: int,
+    reviews_service: ReviewsServiceDep,
+    response: Response,
+    limit: int = DEFAULT_PAGE_SIZE,
+    before: Optional[int] = None,
+    cache: CacheHeaders = _REVIEWS_CACHE,
+) -> ReviewPage:
+    """
+    Retrieve the reviews of a book, newest first.
+    - limit is the page size (at most 100)
+    - before continues after a previous page: pass its next_before
+    """
+    response.headers.update(cache)
+    return await reviews_service.get_page(book_id, limit=limit, before=before)
+
+
+@books_router.post("/{book_id}/reviews", status_code=status.HTTP_201_CREATED)
+async def create_book_review(
+    book_id: int,
+    review: ReviewCreate,
+    reviews_service: ReviewsServiceDep,
+    user: SignedInUserDep,
+) -> ReviewRead:
+    """Review a book as the signed-in user."""
+    return await reviews_service.create(book_id, user.id, review)
+
+
+@books_router.delete("/{book_id}/reviews/{review_id}")
+async def delete_book_review(
+    book_id: int,
+    review_id: int,
+    reviews_service: ReviewsServiceDep,
+    user: SignedInUserDep,
+) -> bool:
+    """Delete one of the signed-in user's reviews."""
+    if not await reviews_service.delete(book_id, review_id, user.id):
+        raise HTTPException(status_code=404, detail="Review not found.")
+    return True
@@ -0,0 +1,64 @@
+from fastapi import APIRouter
+
+from app.api.schemas.cart import CartItemAdd, CartItemUpdate, CartRead
+from app.core.security import TokenData
+from app.database.models import Order
+from app.services.cart import CartServiceDep
+from app.services.orders import OrdersServiceDep
+
+# The cart routes identify the user from the access token alone (no user
+# lookup), so that reading a cart never touches the relational database.
+cart_router = APIRouter(prefix="/cart")
+
+
+@cart_router.get("")
+async def get_cart(token_data: TokenData, cart_service: CartServiceDep) -> CartRead:
+    """Retrieve the signed-in user's cart."""
+    return await cart_service.get(token_data["user_id"])
+
+
+@cart_router.post("/items")
+async def add_cart_item(
+    item: CartItemAdd, token_data: TokenData, cart_service: CartServiceDep
+) -> CartRead:
+    """Add copies of a book to the cart."""
+    return await cart_service.add_item(
+        token_data["user_id"], item.book_id, item.quantity
+    )
+
+
+@cart_router.put("/items/{book_id}")
+async def update_cart_item(
+    book_id: int,
+    item: CartItemUpdate,
+    token_data: TokenData,
+    cart_service: CartServiceDep,
+) -> CartRead:
+    """Set the quantity of a book in the cart (0 removes it)."""
+    return await cart_service.set_item(token_data["user_id"], book_id, item.quantity)
+
+
+@cart_router.delete("/items/{book_id}")
+async def remove_cart_item(
+    book_id: int, token_data: TokenData, cart_service: CartServiceDep
+) -> CartRead:
+    """Remove a book from the cart."""
+    return await cart_service.remove_item(token_data["user_id"], book_id)
+
+
+@cart_router.delete("")
+async def clear_cart(token_data: TokenData, cart_service: CartServiceDep) -> bool:
+    """Empty the cart."""
+    await cart_service.clear(token_data["user_id"])
+    return True
+
+
+@cart_router.post("/checkout")
+async def checkout_cart(
+    token_data: TokenData,
+    cart_service: CartServiceDep,
+    orders_service: OrdersServiceDep,
+) -> Order:
+    """Place an order for everything in the cart, then empty it."""
+    order = await cart_service.checkout(token_data["user_id"], orders_service)
+    return order.model_dump()
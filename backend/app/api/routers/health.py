@@ -0,0 +1,38 @@
+from fastapi import APIRouter, Depends, Request, Response, status
+
+from app.api.schemas.health import HealthStats, Readiness
+from app.core.security import require_admin
+from app.services.health import HealthServiceDep
+
+health_router = APIRouter(prefix="/health")
+
+
+@health_router.get("/live")
+async def live():
+    """Liveness: the worker is up and serving requests."""
+    return {"status": "alive"}
+
+
+@health_router.get(
+    "/ready",
+    responses={status.HTTP_503_SERVICE_UNAVAILABLE: {"model": Readiness}},
+)
+async def ready(health_service: HealthServiceDep, response: Response) -> Readiness:
+    """
+    Readiness: the database and Redis answer in time and the worker isn't
+    saturated. Answers 503 otherwise, for load balancers to drain it.
+    - the checks are cached for a couple of seconds
+    """
+    readiness = await health_service.readiness()
+    if readiness.status != "ready":
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return readiness
+
+
+@health_router.get("/stats", dependencies=[Depends(require_admin)])
+async def stats(health_service: HealthServiceDep, request: Request) -> HealthStats:
+    """
+    Operator view of the worker: connection pool usage and checkout times,
+    cache hit ratios, admission queues and background job lag.
+    """
+    return await health_service.stats(request)
@@ -1,9 +1,12 @@
-from typing import List
+from typing import List, Optional
 
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 
-from app.api.schemas.orders import OrderCreate
+from app.api.schemas.orders import OrderBatchCreate, OrderBatchResult, OrderCreate
+from app.api.streaming import ExportFormat, export_response
 from app.database.models import Order, Book
+from app.services.exports import ORDER_EXPORT_FIELDS, ExportsServiceDep
 from app.services.orders import OrdersServiceDep
 
 orders_router = APIRouter(prefix="/orders")
@@ -16,6 +19,47 @@ async def get_all_orders(orders_service: OrdersServiceDep) -> List[Order]:
     return [o.model_dump() for o in orders]
 
 
+@orders_router.get("/export")
+async def export_orders(
+    exports_service: ExportsServiceDep,
+    format: ExportFormat = "ndjson",
+    since: Optional[int] = None,
+) -> StreamingResponse:
+    """
+    Stream the order history as NDJSON or CSV, one record per order item,
+    the archived orders included.
+    - since exports only orders with a higher id (incremental exports);
+      pass the X-Export-Watermark header of the previous export
+    """
+    watermark = await exports_service.orders_watermark(since)
+    chunks = exports_service.stream_orders(until=watermark, since=since)
+    return export_response(chunks, ORDER_EXPORT_FIELDS, format, watermark, "orders")
+
+
+@orders_router.post("/batch")
+async def create_orders_batch(
+    payload: OrderBatchCreate, orders_service: OrdersServiceDep
+) -> OrderBatchResult:
+    """Create many orders, of any users, in one request.
+
+    Expects JSON body like:
+    {
+      "orders": [
+        {"user_id": 1, "items": [{"book_id": 1001, "quantity": 2}]},
+        {"user_id": 2, "items": [{"book_id": 1002, "quantity": 1}]}
+      ],
+      "atomic": false
+    }
+
+    Returns the outcome of every order, in request order. Invalid orders
+    are rejected individually, unless "atomic" is set: then either all of
+    the orders are created or none.
+    """
+    return await orders_service.create_batch(
+        payload.orders, atomic=payload.atomic, chunk_size=payload.chunk_size
+    )
+
+
 @orders_router.post("/{user_id}")
 async def create_order(
     user_id: int, payload: OrderCreate, orders_service: OrdersServiceDep
@@ -39,7 +83,7 @@ async def create_order(
 @orders_router.get("/{id}")
 async def get_order(id: int, orders_service: OrdersServiceDep) -> dict:
     """Retrieve a specific order by id and include book details for each item."""
-    order = await orders_service.get_by_id(id)
+    order = await orders_service.get_by_id(id, include_archived=True)
     if not order:
         raise HTTPException(status_code=404, detail="Order not found.")
 
@@ -58,3 +102,12 @@ async def cancel_order(id: int, orders_service: OrdersServiceDep) -> Order:
     if not order:
         raise HTTPException(status_code=404, detail="Order not found.")
     return order.model_dump()
+
+
+@orders_router.patch("/{id}/complete")
+async def complete_order(id: int, orders_service: OrdersServiceDep) -> Order:
+    """Mark an order as paid, turning its stock holds into a sale."""
+    order = await orders_service.complete(id)
+    if not order:
+        raise HTTPException(status_code=404, detail="Order not found.")
+    return order.model_dump()
@@ -0,0 +1,43 @@
+from typing import Optional
+
+from fastapi import APIRouter, Header, Response, status
+
+from app.api.caching import etag_matches
+from app.api.schemas.storefront import StorefrontHome
+from app.api.serialization import json_response
+from app.config import storefront_settings
+from app.core.compression import negotiate
+from app.services.storefront import StorefrontServiceDep
+
+storefront_router = APIRouter(prefix="/storefront")
+
+
+@storefront_router.get("/home", response_model=StorefrontHome)
+async def get_storefront_home(
+    storefront_service: StorefrontServiceDep,
+    if_none_match: Optional[str] = Header(default=None),
+    accept_encoding: Optional[str] = Header(default=None),
+) -> Response:
+    """
+    Retrieve everything the landing page shows (bestsellers, new arrivals,
+    the first page of the catalog and the authors) in one response.
+    - send the ETag of a previous response in If-None-Match to get a 304
+      while the page hasn't changed
+    """
+    content, etag, coding = await storefront_service.get_home(
+        negotiate(accept_encoding)
+    )
+    headers = {
+        "ETag": etag,
+        "Cache-Control": (
+            f"public, max-age={storefront_settings.STOREFRONT_CACHE_TTL_SECONDS}"
+        ),
+        "Vary": "Accept-Encoding",
+    }
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if coding:
+        # Served pre-compressed from the cache; the middleware leaves it be
+        headers["Content-Encoding"] = coding
+    return json_response(content, headers=headers)
@@ -44,10 +44,17 @@ async def delete_user(users_service: UsersServiceDep, user: SignedInUserDep) ->
 
 @users_router.get("/orders")
 async def get_user_orders(
-    users_service: UsersServiceDep, user: SignedInUserDep
+    users_service: UsersServiceDep,
+    user: SignedInUserDep,
+    include_archived: bool = False,
 ) -> List[Order]:
-    """Retrieve all orders for a specific user."""
-    return await users_service.get_orders_for_user(user.id)
+    """
+    Retrieve all orders for a specific user.
+    - include_archived also returns the orders moved to the archive
+    """
+    return await users_service.get_orders_for_user(
+        user.id, include_archived=include_archived
+    )
 
 
 @users_router.get("/logout")
@@ -1,7 +1,7 @@
-from typing import Optional, List
+from typing import Literal, Optional, List
 from datetime import datetime
 from decimal import Decimal
-from sqlmodel import SQLModel
+from sqlmodel import Field, SQLModel
 
 # DTOs for books and authors
 
@@ -23,6 +23,11 @@ class BookRead(SQLModel):
     stock_quantity: int
     cover_image_url: Optional[str] = None
     author: Optional[AuthorRead] = None
+    # Review aggregates (read from the denormalized book columns)
+    rating_count: int = 0
+    rating_average: Optional[float] = None
+    # Number of reviews with 1, 2, ... 5 stars
+    rating_histogram: List[int] = Field(default_factory=lambda: [0] * 5)
 
 
 class BestSellerRead(SQLModel):
@@ -34,3 +39,39 @@ class BestSellerRead(SQLModel):
 
     book: BookRead
     units_sold: int
+
+
+# Sparse fieldsets for the listing routes: "summary" returns the compact
+# list-view projection, "full" the complete BookRead record.
+BookFields = Literal["full", "summary"]
+
+
+class BookSummaryRead(SQLModel):
+    """
+    Lightweight list-view representation of a book.
+
+    Omits the long text columns (description, author biography) that
+    listing pages never display.
+    """
+
+    id: int
+    title: str
+    price: Decimal
+    cover_image_url: Optional[str] = None
+    author_name: Optional[str] = None
+    in_stock: bool
+
+
+class BestSellerSummaryRead(SQLModel):
+    """List-view counterpart of BestSellerRead."""
+
+    book: BookSummaryRead
+    units_sold: int
+
+
+class RelatedBookRead(SQLModel):
+    """A book often bought together with another one ("also bought")."""
+
+    book: BookSummaryRead
+    # Number of orders containing both books
+    bought_together: int
@@ -0,0 +1,43 @@
+from decimal import Decimal
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+
+# DTOs for the shopping cart
+
+
+class BookSnapshot(BaseModel):
+    """Price and stock of a book, as cached from the catalog."""
+
+    id: int
+    title: str
+    price: Decimal
+    stock_quantity: int
+    cover_image_url: Optional[str] = None
+
+
+class CartItemAdd(BaseModel):
+    book_id: int
+    quantity: int = Field(default=1, gt=0)
+
+
+class CartItemUpdate(BaseModel):
+    # Setting the quantity to 0 removes the item
+    quantity: int = Field(ge=0)
+
+
+class CartItemRead(BaseModel):
+    book_id: int
+    title: str
+    price: Decimal
+    quantity: int
+    # Stock at the time the item was last added or updated
+    stock_quantity: int
+    cover_image_url: Optional[str] = None
+
+
+class CartRead(BaseModel):
+    items: List[CartItemRead]
+    total_quantity: int
+    total_price: Decimal
@@ -0,0 +1,49 @@
+from datetime import datetime
+from decimal import Decimal
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+
+# DTOs for bulk catalog imports
+
+
+class CatalogImportRow(BaseModel):
+    """A single row of a publisher feed (one CSV line or NDJSON object)."""
+
+    isbn: str = Field(min_length=1)
+    title: str = Field(min_length=1)
+    price: Decimal = Field(ge=0)
+    published_date: datetime
+    description: Optional[str] = None
+    stock_quantity: int = Field(ge=0)
+    cover_image_url: Optional[str] = None
+    author_first_name: str = Field(min_length=1)
+    author_last_name: str = Field(min_length=1)
+    author_biography: Optional[str] = None
+
+
+class CatalogImportError(BaseModel):
+    """A row that could not be imported."""
+
+    line: int
+    isbn: Optional[str] = None
+    message: str
+
+
+class CatalogImportReport(BaseModel):
+    """Progress and outcome of a catalog import."""
+
+    rows_read: int = 0
+    books_upserted: int = 0
+    authors_upserted: int = 0
+    rows_failed: int = 0
+    elapsed_seconds: float = 0.0
+    # Capped at IMPORT_MAX_REPORTED_ERRORS; rows_failed has the full count
+    errors: List[CatalogImportError] = []
+
+    @property
+    def rows_per_second(self) -> float:
+        if not self.elapsed_seconds:
+            return 0.0
+        return self.rows_read / self.elapsed_seconds
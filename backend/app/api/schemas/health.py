@@ -0,0 +1,56 @@
+from typing import Dict, Literal, Optional
+
+from pydantic import BaseModel
+
+from app.api.schemas.jobs import JobStats
+from app.api.schemas.outbox import OutboxStats
+
+
+class HealthCheck(BaseModel):
+    """The outcome of probing one dependency."""
+
+    ok: bool
+    latency_ms: float
+    error: Optional[str] = None
+
+
+class Readiness(BaseModel):
+    status: Literal["ready", "unavailable"]
+    checks: Dict[str, HealthCheck]
+
+
+class PoolStats(BaseModel):
+    """The database connection pool of a worker."""
+
+    size: Optional[int] = None
+    checked_out: Optional[int] = None
+    overflow: Optional[int] = None
+    checkouts: int = 0
+    # Time spent getting a connection from the pool (opening it included)
+    average_wait_ms: float = 0.0
+    max_wait_ms: float = 0.0
+
+
+class CacheStats(BaseModel):
+    hits: int = 0
+    misses: int = 0
+    hit_ratio: Optional[float] = None
+
+
+class RedisStats(BaseModel):
+    keys: int
+    used_memory_bytes: Optional[int] = None
+
+
+class HealthStats(BaseModel):
+    readiness: Readiness
+    pool: PoolStats
+    caches: Dict[str, CacheStats]
+    # None when Redis can't be reached
+    redis: Optional[RedisStats] = None
+    # Per route class: slots in use, requests waiting and requests shed
+    admission: Dict[str, Dict[str, int]] = {}
+    # None when the jobs run in a dedicated worker process
+    jobs: Optional[JobStats] = None
+    outbox: Optional[OutboxStats] = None
+    outbox_pending: Optional[int] = None
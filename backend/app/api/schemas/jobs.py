@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+
+
+class JobStats(BaseModel):
+    """Running counters of a job runner."""
+
+    succeeded: int = 0
+    retried: int = 0
+    failed: int = 0
+    running: int = 0
+    # Time between a job becoming due and a worker picking it up, for the
+    # latest job and the worst seen so far
+    last_lag_seconds: float = 0.0
+    max_lag_seconds: float = 0.0
@@ -1,6 +1,6 @@
-from typing import List
+from typing import List, Literal, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 # DTOs for orders
@@ -11,3 +11,31 @@ class OrderElement(BaseModel):
 
 class OrderCreate(BaseModel):
     items: List[OrderElement]
+
+
+class BatchOrder(OrderCreate):
+    user_id: int
+
+
+class OrderBatchCreate(BaseModel):
+    orders: List[BatchOrder]
+    # Create all of the orders or none of them
+    atomic: bool = False
+    # Orders per transaction when not atomic (default ORDER_BATCH_CHUNK_SIZE)
+    chunk_size: Optional[int] = Field(default=None, gt=0)
+
+
+class BatchOrderResult(BaseModel):
+    # Position of the order in the request
+    index: int
+    # "created", "rejected" (the order itself is invalid) or "aborted" (an
+    # atomic batch failed because of other orders)
+    status: Literal["created", "rejected", "aborted"]
+    order_id: Optional[int] = None
+    detail: Optional[str] = None
+
+
+class OrderBatchResult(BaseModel):
+    created: int
+    rejected: int
+    results: List[BatchOrderResult]
@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+
+
+class OutboxStats(BaseModel):
+    """Running counters of an outbox dispatcher."""
+
+    published: int = 0
+    failed: int = 0
+    batches: int = 0
+    # Time between an event being recorded and published, for the oldest
+    # event of the latest batch, and the worst seen so far
+    last_lag_seconds: float = 0.0
+    max_lag_seconds: float = 0.0
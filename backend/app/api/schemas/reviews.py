@@ -0,0 +1,27 @@
+from datetime import datetime
+from typing import List, Optional
+
+from sqlmodel import Field, SQLModel
+
+
+class ReviewCreate(SQLModel):
+    # Stars, between 1 and 5
+    rating: int = Field(ge=1, le=5)
+    comment: Optional[str] = None
+
+
+class ReviewRead(SQLModel):
+    id: int
+    book_id: int
+    user_id: int
+    rating: int
+    comment: Optional[str] = None
+    created_at: datetime
+
+
+class ReviewPage(SQLModel):
+    """A page of a book's reviews, newest first."""
+
+    reviews: List[ReviewRead]
+    # Pass as `before` to get the next page; None on the last page
+    next_before: Optional[int] = None
@@ -0,0 +1,10 @@
+from sqlmodel import SQLModel
+
+
+class BookStockRead(SQLModel):
+    """Stock bookkeeping of a book, as seen by the admin API."""
+
+    book_id: int
+    stock_quantity: int
+    # Number of counter slots the stock is split across (0: not sharded)
+    stock_shards: int
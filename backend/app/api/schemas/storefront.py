@@ -0,0 +1,47 @@
+from datetime import datetime
+from decimal import Decimal
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from app.api.schemas.books_authors import AuthorRead
+
+
+# DTOs for the storefront home page
+
+
+class StorefrontBookRead(BaseModel):
+    """A book shown on the home page; its author is one of `authors`."""
+
+    id: int
+    title: str
+    price: Decimal
+    cover_image_url: Optional[str] = None
+    author_id: int
+    stock_quantity: int
+    rating_count: int = 0
+    rating_average: Optional[float] = None
+
+
+class StorefrontBestSeller(BaseModel):
+    book_id: int
+    units_sold: int
+
+
+class StorefrontHome(BaseModel):
+    """
+    Everything the landing page renders, in one payload.
+
+    The sections refer to books by id; every book appears once in `books`,
+    however many sections it is in.
+    """
+
+    # This month's bestsellers, best selling first
+    bestsellers: List[StorefrontBestSeller]
+    # Recently published books, newest first
+    new_arrivals: List[int]
+    # The first page of the catalog
+    catalog: List[int]
+    books: List[StorefrontBookRead]
+    authors: List[AuthorRead]
+    generated_at: datetime
@@ -0,0 +1,111 @@
+from typing import Any, Iterable, List, Mapping, Optional, Tuple
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+from app.api.schemas.books_authors import (
+    AuthorRead,
+    BookRead,
+    BookSummaryRead,
+    BestSellerRead,
+    BestSellerSummaryRead,
+    RelatedBookRead,
+)
+from app.core.tracing import traced
+
+# Serialization helpers for the catalog routes.
+#
+# The adapters below are built once at import time, so pydantic compiles
+# their validators and serializers a single time. They read attributes
+# straight off ORM instances (or any row-like object exposing the same
+# attribute names) and encode to JSON bytes in pydantic-core, which handles
+# `Decimal` and `datetime` natively. Routes that return the resulting
+# `Response` skip FastAPI's own response_model validation/serialization pass.
+
+_book_adapter = TypeAdapter(BookRead)
+_books_adapter = TypeAdapter(List[BookRead])
+_author_adapter = TypeAdapter(AuthorRead)
+_authors_adapter = TypeAdapter(List[AuthorRead])
+_bestsellers_adapter = TypeAdapter(List[BestSellerRead])
+_book_summaries_adapter = TypeAdapter(List[BookSummaryRead])
+_bestseller_summaries_adapter = TypeAdapter(List[BestSellerSummaryRead])
+_related_books_adapter = TypeAdapter(List[RelatedBookRead])
+
+
+def json_response(
+    content: bytes, status_code: int = 200, headers: Optional[Mapping[str, str]] = None
+) -> Response:
+    """Wrap already-encoded JSON bytes in a response."""
+    return Response(
+        content=content,
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json",
+    )
+
+
+@traced()
+def encode_book(book: Any) -> bytes:
+    """Encode a single book (ORM instance or row-like object) as JSON."""
+    return _book_adapter.dump_json(
+        _book_adapter.validate_python(book, from_attributes=True)
+    )
+
+
+@traced()
+def encode_books(books: Iterable[Any]) -> bytes:
+    """Encode a list of books (ORM instances or row-like objects) as JSON."""
+    return _books_adapter.dump_json(
+        _books_adapter.validate_python(list(books), from_attributes=True)
+    )
+
+
+@traced()
+def encode_author(author: Any) -> bytes:
+    """Encode a single author as JSON."""
+    return _author_adapter.dump_json(
+        _author_adapter.validate_python(author, from_attributes=True)
+    )
+
+
+@traced()
+def encode_authors(authors: Iterable[Any]) -> bytes:
+    """Encode a list of authors as JSON."""
+    return _authors_adapter.dump_json(
+        _authors_adapter.validate_python(list(authors), from_attributes=True)
+    )
+
+
+@traced()
+def encode_bestsellers(rows: Iterable[Tuple[Any, int]]) -> bytes:
+    """Encode `(book, units_sold)` tuples as a list of BestSellerRead."""
+    entries = [{"book": book, "units_sold": units} for book, units in rows]
+    return _bestsellers_adapter.dump_json(
+        _bestsellers_adapter.validate_python(entries, from_attributes=True)
+    )
+
+
+@traced()
+def encode_book_summaries(rows: Iterable[Any]) -> bytes:
+    """Encode list-view rows as a list of BookSummaryRead."""
+    return _book_summaries_adapter.dump_json(
+        _book_summaries_adapter.validate_python(list(rows), from_attributes=True)
+    )
+
+
+@traced()
+def encode_bestseller_summaries(rows: Iterable[Tuple[Any, int]]) -> bytes:
+    """Encode `(list-view row, units_sold)` tuples as BestSellerSummaryRead."""
+    entries = [{"book": book, "units_sold": units} for book, units in rows]
+    return _bestseller_summaries_adapter.dump_json(
+        _bestseller_summaries_adapter.validate_python(entries, from_attributes=True)
+    )
+
+
+@traced()
+def encode_related_books(rows: Iterable[Tuple[Any, int]]) -> bytes:
+    """Encode `(list-view row, bought_together)` tuples as RelatedBookRead."""
+    entries = [{"book": book, "bought_together": n} for book, n in rows]
+    return _related_books_adapter.dump_json(
+        _related_books_adapter.validate_python(entries, from_attributes=True)
+    )
@@ -0,0 +1,77 @@
+import csv
+import io
+from datetime import datetime
+from typing import AsyncIterator, Literal, Sequence
+
+from fastapi.responses import StreamingResponse
+from pydantic_core import to_json
+from sqlalchemy import Row
+
+# Streaming encoders for the bulk export routes. Each chunk of rows coming
+# from the database is encoded and written out on its own, so the response
+# never holds more than one chunk in memory.
+
+ExportFormat = Literal["ndjson", "csv"]
+
+_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+async def _ndjson_chunks(chunks: AsyncIterator[Sequence[Row]]) -> AsyncIterator[bytes]:
+    async for rows in chunks:
+        # pydantic-core encodes Decimal and datetime values natively
+        yield b"".join(to_json(row._asdict()) + b"\n" for row in rows)
+
+
+def _csv_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+async def _csv_chunks(
+    chunks: AsyncIterator[Sequence[Row]], columns: Sequence[str]
+) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    # Send the header straight away, before the first chunk is fetched
+    writer.writerow(columns)
+    yield buffer.getvalue().encode("utf-8")
+
+    async for rows in chunks:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_csv_value(v) for v in row] for row in rows)
+        yield buffer.getvalue().encode("utf-8")
+
+
+def export_response(
+    chunks: AsyncIterator[Sequence[Row]],
+    columns: Sequence[str],
+    export_format: ExportFormat,
+    watermark: int,
+    filename: str,
+) -> StreamingResponse:
+    """
+    Build a streaming export response.
+
+    The watermark (highest id included) is sent as the `X-Export-Watermark`
+    header so the client can pass it back as `since` for the next
+    incremental export.
+    """
+    if export_format == "csv":
+        body = _csv_chunks(chunks, columns)
+    else:
+        body = _ndjson_chunks(chunks)
+
+    return StreamingResponse(
+        body,
+        media_type=_MEDIA_TYPES[export_format],
+        headers={
+            "X-Export-Watermark": str(watermark),
+            "Content-Disposition": f'attachment; filename="{filename}.{export_format}"',
+        },
+    )
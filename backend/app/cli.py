@@ -0,0 +1,146 @@
+"""
+Operational commands for the kohyli backend.
+
+Usage (from the backend directory):
+    uv run python -m app.cli migrate [--revision head]
+    uv run python -m app.cli seed
+    uv run python -m app.cli import-catalog feed.csv [--format csv] [--batch-size 1000]
+    uv run python -m app.cli worker [--concurrency 4]
+"""
+
+import argparse
+import asyncio
+import logging
+import signal
+import sys
+from pathlib import Path
+from typing import AsyncIterator
+
+from app.api.schemas.catalog_import import CatalogImportReport
+from app.database.session import ALEMBIC_INI, async_session, engine, seed_data
+from app.services.catalog_import import CatalogImportService
+from app.services.jobs import JobRunner
+
+_READ_CHUNK_SIZE = 1024 * 1024
+
+
+async def _read_chunks(path: str) -> AsyncIterator[bytes]:
+    """Read a file (or stdin for "-") in fixed-size chunks."""
+    stream = sys.stdin.buffer if path == "-" else open(path, "rb")
+    try:
+        while chunk := stream.read(_READ_CHUNK_SIZE):
+            yield chunk
+    finally:
+        if stream is not sys.stdin.buffer:
+            stream.close()
+
+
+def _print_progress(report: CatalogImportReport):
+    print(
+        f"{report.rows_read} rows read, {report.books_upserted} books upserted, "
+        f"{report.rows_failed} failed ({report.rows_per_second:,.0f} rows/s)",
+        file=sys.stderr,
+    )
+
+
+def migrate(args: argparse.Namespace) -> int:
+    # Alembic's env.py drives its own event loop, so this runs synchronously
+    from alembic import command
+    from alembic.config import Config
+
+    command.upgrade(Config(str(ALEMBIC_INI)), args.revision)
+    return 0
+
+
+async def seed(args: argparse.Namespace) -> int:
+    await seed_data()
+    await engine.dispose()
+    return 0
+
+
+async def import_catalog(args: argparse.Namespace) -> int:
+    import_format = args.format or (
+        "ndjson" if Path(args.path).suffix in (".ndjson", ".jsonl") else "csv"
+    )
+    # Statement echoing would dominate the runtime of a bulk load
+    engine.sync_engine.echo = False
+
+    async with async_session() as session:
+        service = CatalogImportService(session, batch_size=args.batch_size)
+        try:
+            report = await service.import_stream(
+                _read_chunks(args.path), import_format, on_progress=_print_progress
+            )
+        except ValueError as exc:
+            print(f"error: {exc}", file=sys.stderr)
+            return 1
+        finally:
+            await engine.dispose()
+
+    for error in report.errors:
+        print(f"line {error.line} ({error.isbn}): {error.message}", file=sys.stderr)
+    print(report.model_dump_json(exclude={"errors"}))
+    return 1 if report.rows_failed else 0
+
+
+async def worker(args: argparse.Namespace) -> int:
+    # Importing the API wires up every service, registering their jobs
+    import app.api.router  # noqa: F401
+
+    logging.basicConfig(level=logging.INFO)
+    engine.sync_engine.echo = False
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+
+    runner = JobRunner(engine, concurrency=args.concurrency)
+    runner.start()
+    print("Job worker started, stop with Ctrl+C", file=sys.stderr)
+    await stopping.wait()
+
+    print("Draining running jobs...", file=sys.stderr)
+    await runner.stop()
+    await engine.dispose()
+    print(runner.stats.model_dump_json(), file=sys.stderr)
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    migrate_parser = commands.add_parser(
+        "migrate", help="Upgrade the database schema with Alembic."
+    )
+    migrate_parser.add_argument("--revision", default="head")
+    migrate_parser.set_defaults(handler=migrate)
+
+    seed_parser = commands.add_parser("seed", help="Insert the sample catalog data.")
+    seed_parser.set_defaults(handler=seed)
+
+    import_parser = commands.add_parser(
+        "import-catalog", help="Bulk import a CSV/NDJSON publisher feed."
+    )
+    import_parser.add_argument("path", help='Feed file, or "-" for stdin.')
+    import_parser.add_argument("--format", choices=["csv", "ndjson"])
+    import_parser.add_argument("--batch-size", type=int)
+    import_parser.set_defaults(handler=import_catalog)
+
+    worker_parser = commands.add_parser(
+        "worker",
+        help="Run queued and scheduled jobs (with JOBS_RUN_IN_API=false on the API).",
+    )
+    worker_parser.add_argument("--concurrency", type=int)
+    worker_parser.set_defaults(handler=worker)
+
+    args = parser.parse_args(argv)
+    result = args.handler(args)
+    if asyncio.iscoroutine(result):
+        result = asyncio.run(result)
+    return result
+
+
+if __name__ == "__main__":
+    sys.exit(main())
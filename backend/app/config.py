@@ -1,3 +1,5 @@
+from typing import List, Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 _base_config = SettingsConfigDict(
@@ -20,8 +22,321 @@ class DatabaseSettings(BaseSettings):
     REDIS_HOST: str = "localhost"
     REDIS_PORT: int = 6379
     REDIS_DB: int = 0
+    # What an API worker does with the schema on startup:
+    # - "create": create missing tables and seed the sample data (development)
+    # - "verify": only check the database is at the latest Alembic revision;
+    #   migrations and seeding are left to `python -m app.cli migrate/seed`
+    DB_STARTUP_MODE: Literal["create", "verify"] = "create"
+    # Prepared statements each connection keeps for reuse: SQLite's
+    # statement cache, or asyncpg's server-side prepared statements
+    DB_STATEMENT_CACHE_SIZE: int = 256
 
     model_config = _base_config
 
 
 db_settings = DatabaseSettings()
+
+
+class ExportSettings(BaseSettings):
+    # Rows fetched from the database (and written to the response) per chunk
+    EXPORT_CHUNK_SIZE: int = 1000
+
+    model_config = _base_config
+
+
+export_settings = ExportSettings()
+
+
+class AdminSettings(BaseSettings):
+    # Shared secret for the /admin routes (sent as the X-Admin-Key header).
+    # Leave empty to disable the admin API altogether.
+    ADMIN_API_KEY: str = ""
+
+    model_config = _base_config
+
+
+admin_settings = AdminSettings()
+
+
+class CatalogImportSettings(BaseSettings):
+    # Rows per multi-row upsert (and per transaction) during catalog imports
+    IMPORT_BATCH_SIZE: int = 1000
+    # Upper bound on the per-row errors kept in an import report
+    IMPORT_MAX_REPORTED_ERRORS: int = 1000
+
+    model_config = _base_config
+
+
+catalog_import_settings = CatalogImportSettings()
+
+
+class CartSettings(BaseSettings):
+    # Carts are dropped after this long without any change
+    CART_TTL_SECONDS: int = 7 * 24 * 60 * 60
+    # How long price/stock snapshots stay in the Redis catalog cache
+    CATALOG_CACHE_TTL_SECONDS: int = 60
+
+    model_config = _base_config
+
+
+cart_settings = CartSettings()
+
+
+class ReservationSettings(BaseSettings):
+    # Whether checkout holds the stock of new orders until they are
+    # completed (PATCH /orders/{id}/complete, e.g. by a payment step).
+    # Off, orders keep their stock and stay Created until cancelled.
+    RESERVATION_HOLDS_ENABLED: bool = False
+    # How long checkout holds the stock of an order before it expires
+    RESERVATION_HOLD_SECONDS: int = 15 * 60
+    # How often the background sweeper releases expired holds
+    RESERVATION_SWEEP_INTERVAL_SECONDS: float = 5.0
+    # Expired holds released per sweeper transaction
+    RESERVATION_SWEEP_BATCH_SIZE: int = 500
+
+    model_config = _base_config
+
+
+reservation_settings = ReservationSettings()
+
+
+class StockSettings(BaseSettings):
+    # How often the summed shard counters of hot books are written back to
+    # Book.stock_quantity
+    STOCK_RECONCILE_INTERVAL_SECONDS: float = 10.0
+    # Upper bound on the counter slots a hot book can be split across
+    STOCK_MAX_SHARDS: int = 64
+
+    model_config = _base_config
+
+
+stock_settings = StockSettings()
+
+
+class OutboxSettings(BaseSettings):
+    # How often the dispatcher polls the outbox for new events
+    OUTBOX_POLL_INTERVAL_SECONDS: float = 0.5
+    # Events published per dispatcher transaction
+    OUTBOX_BATCH_SIZE: int = 200
+    # Deliveries attempted before an event is parked in the outbox
+    OUTBOX_MAX_ATTEMPTS: int = 10
+    # Failed events are retried with exponential backoff between the base
+    # and max delays
+    OUTBOX_RETRY_BASE_SECONDS: float = 1.0
+    OUTBOX_RETRY_MAX_SECONDS: float = 300.0
+    # How long a claimed batch is kept from the other dispatchers while it
+    # is published; past it, a dispatcher that died is assumed to have
+    # published nothing
+    OUTBOX_CLAIM_LEASE_SECONDS: int = 60
+
+    model_config = _base_config
+
+
+outbox_settings = OutboxSettings()
+
+
+class JobSettings(BaseSettings):
+    # Run the job runner inside the API workers; disable when jobs are run
+    # by a dedicated `python -m app.cli worker` process instead
+    JOBS_RUN_IN_API: bool = True
+    # Jobs a runner executes at the same time
+    JOB_CONCURRENCY: int = 4
+    # How often idle workers poll the queue: the interval doubles while
+    # the queue stays empty, up to the max (scheduled runs enqueued by the
+    # runner wake its workers right away)
+    JOB_POLL_INTERVAL_SECONDS: float = 1.0
+    JOB_IDLE_POLL_MAX_SECONDS: float = 10.0
+    # How long a claimed job is locked to its worker; must exceed the
+    # longest job, or it is run again
+    JOB_LEASE_SECONDS: int = 300
+    # Attempts per job (unless the job type says otherwise), retried with
+    # exponential backoff between the base and max delays
+    JOB_MAX_ATTEMPTS: int = 5
+    JOB_RETRY_BASE_SECONDS: float = 2.0
+    JOB_RETRY_MAX_SECONDS: float = 600.0
+    # How long shutdown waits for running jobs to finish
+    JOB_DRAIN_TIMEOUT_SECONDS: float = 30.0
+    # Finished jobs are purged after this many days
+    JOB_RETENTION_DAYS: int = 7
+
+    model_config = _base_config
+
+
+job_settings = JobSettings()
+
+
+class OrderArchiveSettings(BaseSettings):
+    # Closed (completed, cancelled, expired) orders older than this are
+    # moved to the archive tables by the nightly orders.archive job
+    ORDER_RETENTION_DAYS: int = 365
+    # Orders moved per archiver transaction
+    ORDER_ARCHIVE_BATCH_SIZE: int = 1000
+
+    model_config = _base_config
+
+
+order_archive_settings = OrderArchiveSettings()
+
+
+class OrderBatchSettings(BaseSettings):
+    # Most orders accepted by one POST /orders/batch request
+    ORDER_BATCH_MAX_ORDERS: int = 5000
+    # Orders created per transaction by non-atomic batches
+    ORDER_BATCH_CHUNK_SIZE: int = 200
+
+    model_config = _base_config
+
+
+order_batch_settings = OrderBatchSettings()
+
+
+class CoPurchaseSettings(BaseSettings):
+    # Orders with more distinct books than this (bulk institutional orders)
+    # say little about what goes together and are left out of the index
+    COPURCHASE_MAX_ORDER_BOOKS: int = 50
+    # Related books kept per book by the pruning job
+    COPURCHASE_MAX_RELATED: int = 50
+    # Pairs bought together fewer times are dropped by a rebuild
+    COPURCHASE_MIN_COUNT: int = 2
+    # Orders (by id range) aggregated per statement of a rebuild
+    COPURCHASE_REBUILD_BATCH_ORDERS: int = 5000
+
+    model_config = _base_config
+
+
+copurchase_settings = CoPurchaseSettings()
+
+
+class TrendingSettings(BaseSettings):
+    # Counters kept per time bucket (and in each merged window): books
+    # selling more than 1/TRENDING_CAPACITY of a bucket's units are always
+    # tracked, however large the catalog
+    TRENDING_CAPACITY: int = 200
+    # How often each worker merges the buckets of the sliding windows
+    TRENDING_REFRESH_INTERVAL_SECONDS: float = 15.0
+
+    model_config = _base_config
+
+
+trending_settings = TrendingSettings()
+
+
+class StorefrontSettings(BaseSettings):
+    # The assembled home page is cached (in Redis, shared by the workers)
+    # for this long
+    STOREFRONT_CACHE_TTL_SECONDS: int = 30
+    # Books in each section of the home page
+    STOREFRONT_BESTSELLERS: int = 10
+    STOREFRONT_NEW_ARRIVALS: int = 10
+    STOREFRONT_CATALOG_BOOKS: int = 24
+
+    model_config = _base_config
+
+
+storefront_settings = StorefrontSettings()
+
+
+class CompressionSettings(BaseSettings):
+    # Responses smaller than this are sent uncompressed: the saving would
+    # not pay for the CPU time (and the encoding overhead)
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    # Media types worth compressing; images and other binary formats are
+    # already compressed
+    COMPRESSION_CONTENT_TYPES: List[str] = [
+        "application/json",
+        "application/x-ndjson",
+        "text/csv",
+        "text/html",
+        "text/plain",
+    ]
+    GZIP_LEVEL: int = 6
+    # Only used if the brotli / zstandard packages are installed
+    BROTLI_QUALITY: int = 5
+    ZSTD_LEVEL: int = 3
+
+    model_config = _base_config
+
+
+compression_settings = CompressionSettings()
+
+
+class AdmissionSettings(BaseSettings):
+    # Requests of each route class handled at once by a worker; the others
+    # wait in line. Checkout and login are limited apart from the catalog
+    # reads, so a slow database on one side doesn't starve the other.
+    ADMISSION_CATALOG_CONCURRENCY: int = 64
+    ADMISSION_CHECKOUT_CONCURRENCY: int = 16
+    ADMISSION_AUTH_CONCURRENCY: int = 4
+    ADMISSION_EXPORT_CONCURRENCY: int = 2
+    ADMISSION_DEFAULT_CONCURRENCY: int = 32
+    # Longest a request waits in line before it is shed with a 503
+    ADMISSION_MAX_QUEUE_SECONDS: float = 0.5
+    # Time budget of a request once admitted: statements don't start past
+    # it, and on Postgres it bounds the statement_timeout of every
+    # transaction. Exports stream for as long as they take.
+    ADMISSION_CATALOG_DEADLINE_SECONDS: float = 2.0
+    ADMISSION_CHECKOUT_DEADLINE_SECONDS: float = 10.0
+    ADMISSION_AUTH_DEADLINE_SECONDS: float = 5.0
+    ADMISSION_DEFAULT_DEADLINE_SECONDS: float = 10.0
+    # Retry-After of the 503 responses
+    ADMISSION_RETRY_AFTER_SECONDS: int = 1
+
+    model_config = _base_config
+
+
+admission_settings = AdmissionSettings()
+
+
+class RateLimitSettings(BaseSettings):
+    RATE_LIMIT_ENABLED: bool = True
+    # Requests allowed per client (IP address, or signed-in user for
+    # checkout) over each policy's window; 0 disables a policy
+    RATE_LIMIT_LOGIN_PER_MINUTE: int = 10
+    RATE_LIMIT_SIGNUP_PER_HOUR: int = 20
+    RATE_LIMIT_CHECKOUT_PER_MINUTE: int = 30
+    RATE_LIMIT_DEFAULT_PER_MINUTE: int = 1200
+    # How often each worker reconciles its local buckets with the shared
+    # counters in Redis. Between syncs, decisions are local; a client can
+    # overshoot its limit by what it gets through the other workers in the
+    # meantime.
+    RATE_LIMIT_SYNC_INTERVAL_SECONDS: float = 1.0
+
+    model_config = _base_config
+
+
+rate_limit_settings = RateLimitSettings()
+
+
+class HealthSettings(BaseSettings):
+    # Readiness checks are cached for this long, so frequent probes from
+    # several load balancers cost one round of checks
+    HEALTH_CHECK_CACHE_SECONDS: float = 2.0
+    # A dependency answering slower than this counts as down
+    HEALTH_CHECK_TIMEOUT_SECONDS: float = 1.0
+    # A worker whose event loop lags more than this reports itself not
+    # ready, so it's drained before its requests start timing out
+    HEALTH_MAX_LOOP_LAG_SECONDS: float = 0.5
+
+    model_config = _base_config
+
+
+health_settings = HealthSettings()
+
+
+class TracingSettings(BaseSettings):
+    # Share of requests traced; a request carrying a sampled W3C
+    # traceparent header is always traced
+    TRACING_SAMPLE_RATE: float = 0.0
+    TRACING_SERVICE_NAME: str = "kohyli-backend"
+    # Finished traces are appended to this file as OTLP/JSON lines, or,
+    # with an endpoint (e.g. http://localhost:4318), sent to a collector
+    TRACING_EXPORT_PATH: str = "traces.jsonl"
+    TRACING_OTLP_ENDPOINT: str = ""
+    TRACING_EXPORT_INTERVAL_SECONDS: float = 5.0
+    # Spans past this many in one trace are dropped (e.g. bulk imports)
+    TRACING_MAX_SPANS_PER_TRACE: int = 1000
+
+    model_config = _base_config
+
+
+tracing_settings = TracingSettings()
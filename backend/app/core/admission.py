@@ -0,0 +1,287 @@
+import asyncio
+import json
+import logging
+import re
+import time
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional, Pattern, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import admission_settings
+
+logger = logging.getLogger(__name__)
+
+# Monotonic time by which the current request must be done, if any
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+# Postgres "query_canceled", raised when a statement_timeout fires
+_QUERY_CANCELED = "57014"
+
+
+class DeadlineExceeded(Exception):
+    """The request ran out of time before a database statement could start."""
+
+
+def remaining_time() -> Optional[float]:
+    """Seconds left before the current request's deadline, if it has one."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def enforce_deadlines(engine: AsyncEngine):
+    """
+    Bound the database work of requests by their deadline: no statement
+    starts once it has passed, and on Postgres every transaction gets what
+    remains of it as its statement_timeout.
+    """
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def check_deadline(conn, cursor, statement, parameters, context, executemany):
+        remaining = remaining_time()
+        if remaining is not None and remaining <= 0:
+            raise DeadlineExceeded(statement.split(None, 1)[0])
+
+    @event.listens_for(engine.sync_engine, "begin")
+    def set_statement_timeout(conn):
+        remaining = remaining_time()
+        if remaining is not None and conn.dialect.name == "postgresql":
+            timeout_ms = max(1, int(remaining * 1000))
+            conn.exec_driver_sql(f"SET LOCAL statement_timeout = {timeout_ms}")
+
+
+class ConcurrencyLimiter:
+    """
+    Let at most `limit` holders in at a time; the others wait in line, in
+    arrival order, for at most the timeout given to `acquire`.
+
+    Unlike asyncio.Semaphore it isn't tied to an event loop, so a single
+    instance can serve the app across test clients.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_flight = 0
+        self.shed = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def waiting(self) -> int:
+        return sum(not waiter.done() for waiter in self._waiters)
+
+    async def acquire(self, timeout: float) -> bool:
+        """Wait up to `timeout` seconds for a slot; False if none came up."""
+        if self.in_flight < self.limit and not self.waiting:
+            self.in_flight += 1
+            return True
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            # The slot is handed over by `release`, without going through
+            # in_flight, so newcomers can't jump the queue
+            await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            self.shed += 1
+            return False
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+        return True
+
+    def release(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+
+@dataclass
+class RouteClass:
+    """Requests sharing a concurrency limit and a deadline."""
+
+    name: str
+    limiter: ConcurrencyLimiter
+    deadline_seconds: Optional[float]
+
+
+def _route_classes() -> Tuple[
+    List[Tuple[str, Pattern, Optional[RouteClass]]], RouteClass
+]:
+    settings = admission_settings
+
+    def route_class(name: str, concurrency: int, deadline: Optional[float]):
+        return RouteClass(name, ConcurrencyLimiter(concurrency), deadline)
+
+    auth = route_class(
+        "auth",
+        settings.ADMISSION_AUTH_CONCURRENCY,
+        settings.ADMISSION_AUTH_DEADLINE_SECONDS,
+    )
+    checkout = route_class(
+        "checkout",
+        settings.ADMISSION_CHECKOUT_CONCURRENCY,
+        settings.ADMISSION_CHECKOUT_DEADLINE_SECONDS,
+    )
+    export = route_class("export", settings.ADMISSION_EXPORT_CONCURRENCY, None)
+    catalog = route_class(
+        "catalog",
+        settings.ADMISSION_CATALOG_CONCURRENCY,
+        settings.ADMISSION_CATALOG_DEADLINE_SECONDS,
+    )
+    default = route_class(
+        "default",
+        settings.ADMISSION_DEFAULT_CONCURRENCY,
+        settings.ADMISSION_DEFAULT_DEADLINE_SECONDS,
+    )
+    # (method, path pattern, class); the first match wins. Health probes
+    # are never queued or shed: an overloaded worker answering its liveness
+    # probe with a 503 would be restarted by the orchestrator.
+    rules = [
+        ("GET", re.compile(r"^/health(/.*)?$"), None),
+        ("POST", re.compile(r"^/users/(login|signup)$"), auth),
+        ("POST", re.compile(r"^/orders/[^/]+$"), checkout),
+        ("POST", re.compile(r"^/cart/checkout$"), checkout),
+        ("GET", re.compile(r"^/(books|orders)/export$"), export),
+        ("GET", re.compile(r"^/(books|authors|storefront)(/.*)?$"), catalog),
+    ]
+    return rules, default
+
+
+class AdmissionMiddleware:
+    """
+    Admission control in front of the routes.
+
+    Each request is classified into a route class (see `_route_classes`)
+    and waits for one of its class's slots. A request that can't get one
+    within ADMISSION_MAX_QUEUE_SECONDS is shed with a 503 and a
+    Retry-After before any work is done for it, which keeps the latency of
+    the admitted ones bounded when the database slows down. Admitted
+    requests run under their class's deadline (see `enforce_deadlines`);
+    running out of it before the response starts is also a 503.
+    """
+
+    def __init__(self, app: ASGIApp, max_queue_seconds: Optional[float] = None):
+        self.app = app
+        self.max_queue_seconds = (
+            admission_settings.ADMISSION_MAX_QUEUE_SECONDS
+            if max_queue_seconds is None
+            else max_queue_seconds
+        )
+        self.rules, self.default = _route_classes()
+
+    @property
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Slots in use, requests waiting and requests shed, per class."""
+        classes = {
+            route_class.name: route_class
+            for *_, route_class in self.rules
+            if route_class is not None
+        }
+        classes[self.default.name] = self.default
+        return {
+            name: {
+                "limit": route_class.limiter.limit,
+                "in_flight": route_class.limiter.in_flight,
+                "waiting": route_class.limiter.waiting,
+                "shed": route_class.limiter.shed,
+            }
+            for name, route_class in classes.items()
+        }
+
+    def classify(self, method: str, path: str) -> Optional[RouteClass]:
+        for rule_method, pattern, route_class in self.rules:
+            if method == rule_method and pattern.match(path):
+                return route_class
+        return self.default
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] == "lifespan":
+            # Let the app report our stats (see /health/stats)
+            scope["app"].state.admission = self
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route_class = self.classify(scope["method"], scope["path"])
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+        limiter = route_class.limiter
+        if not await limiter.acquire(self.max_queue_seconds):
+            logger.warning(
+                "Shedding %s %s: no %s slot came up in %.2fs",
+                scope["method"],
+                scope["path"],
+                route_class.name,
+                self.max_queue_seconds,
+            )
+            await _service_unavailable(send, "The server is busy, retry later.")
+            return
+
+        started = False
+
+        async def send_tracking_start(message: Message):
+            nonlocal started
+            started = started or message["type"] == "http.response.start"
+            await send(message)
+
+        deadline = (
+            time.monotonic() + route_class.deadline_seconds
+            if route_class.deadline_seconds
+            else None
+        )
+        token = _deadline.set(deadline)
+        try:
+            await self.app(scope, receive, send_tracking_start)
+        except (DeadlineExceeded, DBAPIError) as exc:
+            if started or not _is_timeout(exc):
+                raise
+            logger.warning(
+                "%s %s ran out of its %.1fs deadline",
+                scope["method"],
+                scope["path"],
+                route_class.deadline_seconds,
+            )
+            await _service_unavailable(send, "The request timed out, retry later.")
+        finally:
+            _deadline.reset(token)
+            limiter.release()
+
+
+def _is_timeout(exc: Exception) -> bool:
+    if isinstance(exc, DeadlineExceeded):
+        return True
+    orig = getattr(exc, "orig", None)
+    return (
+        getattr(orig, "sqlstate", None) or getattr(orig, "pgcode", None)
+    ) == _QUERY_CANCELED
+
+
+async def _service_unavailable(send: Send, detail: str):
+    body = json.dumps({"detail": detail}).encode()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (
+                    b"retry-after",
+                    str(admission_settings.ADMISSION_RETRY_AFTER_SECONDS).encode(),
+                ),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,37 @@
+from collections import defaultdict
+from typing import DefaultDict, Dict
+
+from app.api.schemas.health import CacheStats
+
+
+class _Counter:
+    __slots__ = ("hits", "misses")
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+
+# Lookups of this worker's caches, by cache name
+_counters: DefaultDict[str, _Counter] = defaultdict(_Counter)
+
+
+def count_lookups(cache: str, hits: int = 0, misses: int = 0):
+    counter = _counters[cache]
+    counter.hits += hits
+    counter.misses += misses
+
+
+def cache_stats() -> Dict[str, CacheStats]:
+    return {
+        cache: CacheStats(
+            hits=counter.hits,
+            misses=counter.misses,
+            hit_ratio=(
+                counter.hits / (counter.hits + counter.misses)
+                if counter.hits + counter.misses
+                else None
+            ),
+        )
+        for cache, counter in _counters.items()
+    }
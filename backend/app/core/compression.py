@@ -0,0 +1,197 @@
+import zlib
+from typing import Callable, Dict, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import compression_settings
+
+# Optional content codings: served when their package is installed.
+try:
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class _Encoder:
+    """Incremental encoder: `compress` chunks, `flush` them out, `finish`."""
+
+    def __init__(self, compress, flush, finish):
+        self.compress: Callable[[bytes], bytes] = compress
+        self.flush: Callable[[], bytes] = flush
+        self.finish: Callable[[], bytes] = finish
+
+
+def _gzip_encoder() -> _Encoder:
+    # wbits=31: a zlib stream with a gzip header and trailer
+    compressor = zlib.compressobj(compression_settings.GZIP_LEVEL, zlib.DEFLATED, 31)
+    return _Encoder(
+        compressor.compress,
+        lambda: compressor.flush(zlib.Z_SYNC_FLUSH),
+        compressor.flush,
+    )
+
+
+def _brotli_encoder() -> _Encoder:
+    compressor = brotli.Compressor(quality=compression_settings.BROTLI_QUALITY)
+    return _Encoder(compressor.process, compressor.flush, compressor.finish)
+
+
+def _zstd_encoder() -> _Encoder:
+    compressor = zstandard.ZstdCompressor(
+        level=compression_settings.ZSTD_LEVEL
+    ).compressobj()
+    return _Encoder(
+        compressor.compress,
+        lambda: compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK),
+        compressor.flush,
+    )
+
+
+# The available content codings, most preferred first
+ENCODERS: Dict[str, Callable[[], _Encoder]] = {}
+if zstandard is not None:
+    ENCODERS["zstd"] = _zstd_encoder
+if brotli is not None:
+    ENCODERS["br"] = _brotli_encoder
+ENCODERS["gzip"] = _gzip_encoder
+
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Return the content coding to use for a request's Accept-Encoding
+    header: the one with the highest q-value, our preference breaking
+    ties, or None for the identity coding.
+    """
+    if not accept_encoding:
+        return None
+    weights = {}
+    for entry in accept_encoding.split(","):
+        coding, *params = entry.split(";")
+        weight = 1.0
+        for param in params:
+            name, _, value = param.strip().partition("=")
+            if name.lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[coding.strip().lower()] = weight
+
+    best, best_weight = None, 0.0
+    for coding in ENCODERS:
+        weight = weights.get(coding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+def compress(body: bytes, coding: str) -> bytes:
+    """Encode a whole body with one of the ENCODERS."""
+    encoder = ENCODERS[coding]()
+    return encoder.compress(body) + encoder.finish()
+
+
+def is_compressible(content_type: Optional[str]) -> bool:
+    """Whether responses of this media type are worth compressing."""
+    if not content_type:
+        return False
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return media_type in compression_settings.COMPRESSION_CONTENT_TYPES
+
+
+class CompressionMiddleware:
+    """
+    Compress response bodies with the best content coding the client
+    accepts (zstd, brotli or gzip).
+
+    Only the allowlisted media types are compressed, and only bodies of at
+    least `minimum_size` bytes, or streamed ones (e.g. the exports), which
+    are compressed chunk by chunk and flushed as they go. Responses that
+    already carry a Content-Encoding, such as cache entries stored
+    pre-compressed, are sent as they are.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: Optional[int] = None):
+        self.app = app
+        self.minimum_size = (
+            compression_settings.COMPRESSION_MINIMUM_SIZE
+            if minimum_size is None
+            else minimum_size
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        coding = negotiate(Headers(scope=scope).get("accept-encoding"))
+        responder = _CompressingResponder(send, coding, self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressingResponder:
+    def __init__(self, send: Send, coding: Optional[str], minimum_size: int):
+        self._send = send
+        self._coding = coding
+        self._minimum_size = minimum_size
+        self._start: Optional[Message] = None
+        self._encoder: Optional[_Encoder] = None
+        self._started = False
+
+    async def send(self, message: Message):
+        if message["type"] == "http.response.start":
+            # Held back until the first body chunk tells us its size
+            self._start = message
+            return
+        if message["type"] != "http.response.body" or self._started:
+            if self._encoder is not None and message["type"] == "http.response.body":
+                message = self._encode(message)
+            await self._send(message)
+            return
+
+        self._started = True
+        headers = MutableHeaders(raw=list(self._start["headers"]))
+        self._start["headers"] = headers.raw
+        body = message.get("body", b"")
+        streaming = message.get("more_body", False)
+
+        if "content-encoding" in headers or not is_compressible(
+            headers.get("content-type")
+        ):
+            await self._send_all(self._start, message)
+            return
+        # Caches must keep the variants for each Accept-Encoding apart
+        headers.add_vary_header("Accept-Encoding")
+        if self._coding is None or (not streaming and len(body) < self._minimum_size):
+            await self._send_all(self._start, message)
+            return
+
+        self._encoder = ENCODERS[self._coding]()
+        message = self._encode(message)
+        headers["Content-Encoding"] = self._coding
+        if streaming:
+            del headers["Content-Length"]
+        else:
+            headers["Content-Length"] = str(len(message["body"]))
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            # The encoded bytes differ from those the strong ETag names
+            headers["ETag"] = f"W/{etag}"
+        await self._send_all(self._start, message)
+
+    def _encode(self, message: Message) -> Message:
+        body = self._encoder.compress(message.get("body", b""))
+        if message.get("more_body", False):
+            # Don't hold streamed chunks back in the compressor's buffer
+            body += self._encoder.flush()
+        else:
+            body += self._encoder.finish()
+        return {**message, "body": body}
+
+    async def _send_all(self, *messages: Message):
+        for message in messages:
+            await self._send(message)
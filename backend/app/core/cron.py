@@ -0,0 +1,98 @@
+from datetime import datetime, timedelta
+from typing import FrozenSet, Tuple
+
+# (name, lowest, highest) of the five cron fields
+_FIELDS: Tuple[Tuple[str, int, int], ...] = (
+    ("minute", 0, 59),
+    ("hour", 0, 23),
+    ("day", 1, 31),
+    ("month", 1, 12),
+    ("weekday", 0, 6),
+)
+
+# Give up on expressions that never match (e.g. "0 0 31 2 *")
+_MAX_SEARCH = timedelta(days=366 * 5)
+
+
+def _parse_field(text: str, name: str, low: int, high: int) -> FrozenSet[int]:
+    values = set()
+    for part in text.split(","):
+        spec, _, step_text = part.partition("/")
+        step = int(step_text) if step_text else 1
+        if spec == "*":
+            start, end = low, high
+        elif "-" in spec:
+            start, end = (int(bound) for bound in spec.split("-", 1))
+        else:
+            start = int(spec)
+            end = high if step_text else start
+        if name == "weekday" and end == 7:
+            # Both 0 and 7 mean Sunday
+            values.add(0)
+            end = 6
+        if step < 1 or not low <= start <= end <= high:
+            raise ValueError(f"Invalid cron {name} field: {text!r}")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+class CronSchedule:
+    """
+    A standard five-field cron expression ("minute hour day month weekday",
+    weekday 0 = Sunday) supporting `*`, lists, ranges and steps.
+
+    As in cron, when both day and weekday are restricted a time matches if
+    either of them does.
+    """
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Expected 5 cron fields, got {expression!r}")
+        self.expression = expression
+        (
+            self._minutes,
+            self._hours,
+            self._days,
+            self._months,
+            self._weekdays,
+        ) = (
+            _parse_field(text, name, low, high)
+            for text, (name, low, high) in zip(fields, _FIELDS)
+        )
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    def __repr__(self) -> str:
+        return f"CronSchedule({self.expression!r})"
+
+    def matches(self, moment: datetime) -> bool:
+        return (
+            moment.minute in self._minutes
+            and moment.hour in self._hours
+            and moment.month in self._months
+            and self._matches_day(moment)
+        )
+
+    def next_after(self, moment: datetime) -> datetime:
+        """The first matching minute strictly after `moment`."""
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + _MAX_SEARCH
+        while candidate < limit:
+            if candidate.month not in self._months or not self._matches_day(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+            elif candidate.hour not in self._hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+            elif candidate.minute not in self._minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f"Cron expression {self.expression!r} never matches")
+
+    def _matches_day(self, moment: datetime) -> bool:
+        # isoweekday: Monday = 1 ... Sunday = 7
+        day = moment.day in self._days
+        weekday = moment.isoweekday() % 7 in self._weekdays
+        if self._any_day or self._any_weekday:
+            return day and weekday
+        return day or weekday
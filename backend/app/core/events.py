@@ -0,0 +1,47 @@
+import asyncio
+from collections import defaultdict
+from typing import Awaitable, Callable, Dict, List
+
+from app.database.models import OutboxEvent
+
+EventHandler = Callable[[OutboxEvent], Awaitable[None]]
+
+
+class EventBus:
+    """
+    In-process publish/subscribe for the events drained from the outbox.
+
+    Delivery is at-least-once: an event whose handlers failed is published
+    again later, to all of its handlers, so handlers must be idempotent
+    (`event.id` is stable across deliveries).
+    """
+
+    def __init__(self):
+        self._handlers: Dict[str, List[EventHandler]] = defaultdict(list)
+
+    def subscribe(self, *topics: str) -> Callable[[EventHandler], EventHandler]:
+        """Decorator registering an async handler for the given topics."""
+
+        def register(handler: EventHandler) -> EventHandler:
+            for topic in topics:
+                self._handlers[topic].append(handler)
+            return handler
+
+        return register
+
+    async def publish(self, event: OutboxEvent):
+        """
+        Run the handlers of the event's topic concurrently; re-raises the
+        first failure once they all finished.
+        """
+        handlers = self._handlers.get(event.topic, ())
+        results = await asyncio.gather(
+            *(handler(event) for handler in handlers), return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+
+
+# Shared bus the application's event handlers subscribe to:
+event_bus = EventBus()
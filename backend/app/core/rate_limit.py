@@ -0,0 +1,263 @@
+import json
+import logging
+import math
+import re
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Literal, Optional, Pattern, Tuple
+
+from fastapi import HTTPException
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import rate_limit_settings
+from app.database.redis import redis_client
+from app.utils import decode_access_token
+
+logger = logging.getLogger(__name__)
+
+# Add a worker's hits to the current window of a key and return the counts
+# of the current and the previous window (for a sliding-window estimate).
+_SYNC_SCRIPT = """
+local current = redis.call('INCRBY', KEYS[1], ARGV[1])
+if current == tonumber(ARGV[1]) then
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+return {current, previous}
+"""
+
+
+@dataclass(frozen=True)
+class RateLimitPolicy:
+    """`limit` requests per `window` seconds for each client `key`."""
+
+    name: str
+    limit: int
+    window: int
+    # What identifies a client: its IP address, or the user of its bearer
+    # token (falling back to the IP address for anonymous requests)
+    key: Literal["ip", "user"] = "ip"
+
+    @property
+    def rate(self) -> float:
+        return self.limit / self.window
+
+
+@dataclass
+class RateLimitDecision:
+    allowed: bool
+    limit: int
+    remaining: int
+    # Seconds until the client's allowance is whole again
+    reset: int
+    # Seconds until the next request would be allowed
+    retry_after: int
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        headers = {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(self.remaining),
+            "X-RateLimit-Reset": str(self.reset),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(self.retry_after)
+        return headers
+
+
+class _Bucket:
+    __slots__ = ("tokens", "updated", "pending", "dirty")
+
+    def __init__(self, tokens: float, now: float):
+        self.tokens = tokens
+        self.updated = now
+        # Hits not yet added to the shared counters
+        self.pending = 0
+        # Used since the last sync
+        self.dirty = False
+
+    def refill(self, policy: RateLimitPolicy, now: float):
+        self.tokens = min(
+            policy.limit, self.tokens + (now - self.updated) * policy.rate
+        )
+        self.updated = now
+
+
+class RateLimiter:
+    """
+    Token buckets per (policy, client), decided locally and shared through
+    Redis.
+
+    Every decision is made against the worker's own bucket, with no network
+    round trip. `sync`, run periodically, adds the hits of each bucket used
+    since the last sync to a per-window counter in Redis, and brings the
+    bucket down to what the sliding-window estimate of those counters
+    (the hits of all workers) leaves of the limit.
+    """
+
+    def __init__(self, redis: Redis):
+        self._redis = redis
+        self._sync_script = redis.register_script(_SYNC_SCRIPT)
+        self._buckets: Dict[Tuple[RateLimitPolicy, str], _Bucket] = {}
+
+    def hit(
+        self, policy: RateLimitPolicy, key: str, now: Optional[float] = None
+    ) -> RateLimitDecision:
+        """Count a request of client `key` against `policy`, if allowed."""
+        now = time.monotonic() if now is None else now
+        bucket = self._buckets.get((policy, key))
+        if bucket is None:
+            bucket = self._buckets[(policy, key)] = _Bucket(policy.limit, now)
+        bucket.refill(policy, now)
+        bucket.dirty = True
+
+        allowed = bucket.tokens >= 1
+        if allowed:
+            bucket.tokens -= 1
+            bucket.pending += 1
+        return RateLimitDecision(
+            allowed=allowed,
+            limit=policy.limit,
+            remaining=int(bucket.tokens),
+            reset=math.ceil((policy.limit - bucket.tokens) / policy.rate),
+            retry_after=max(1, math.ceil((1 - bucket.tokens) / policy.rate)),
+        )
+
+    async def sync(self, now: Optional[float] = None):
+        """Reconcile the buckets used since the last sync with Redis."""
+        monotonic = time.monotonic()
+        now = time.time() if now is None else now
+        used = [
+            (policy, key, bucket, bucket.pending)
+            for (policy, key), bucket in self._buckets.items()
+            if bucket.dirty
+        ]
+        for (policy, key), bucket in list(self._buckets.items()):
+            bucket.refill(policy, monotonic)
+            if not bucket.dirty and bucket.tokens >= policy.limit:
+                # Idle and whole: nothing worth remembering
+                del self._buckets[(policy, key)]
+            bucket.dirty = False
+        if not used:
+            return
+
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                for policy, key, _, sent in used:
+                    window = int(now // policy.window)
+                    await self._sync_script(
+                        keys=[
+                            f"ratelimit:{policy.name}:{key}:{window}",
+                            f"ratelimit:{policy.name}:{key}:{window - 1}",
+                        ],
+                        args=[sent, 2 * policy.window],
+                        client=pipe,
+                    )
+                counts = await pipe.execute()
+        except RedisError as exc:
+            # Decisions stay local until Redis is back
+            logger.warning("Could not sync the rate limits: %s", exc)
+            return
+
+        for (policy, _, bucket, sent), (current, previous) in zip(used, counts):
+            elapsed = (now % policy.window) / policy.window
+            estimate = previous * (1 - elapsed) + current
+            bucket.pending -= sent
+            # Hits let in while the sync was under way aren't in the estimate
+            remaining = policy.limit - estimate - bucket.pending
+            bucket.tokens = max(0.0, min(bucket.tokens, remaining))
+
+
+def _policies() -> Tuple[
+    List[Tuple[str, Pattern, Optional[RateLimitPolicy]]], RateLimitPolicy
+]:
+    settings = rate_limit_settings
+    login = RateLimitPolicy("login", settings.RATE_LIMIT_LOGIN_PER_MINUTE, 60)
+    signup = RateLimitPolicy("signup", settings.RATE_LIMIT_SIGNUP_PER_HOUR, 3600)
+    checkout = RateLimitPolicy(
+        "checkout", settings.RATE_LIMIT_CHECKOUT_PER_MINUTE, 60, key="user"
+    )
+    default = RateLimitPolicy("default", settings.RATE_LIMIT_DEFAULT_PER_MINUTE, 60)
+    # (method, path pattern, policy); the first match wins. Health probes
+    # come from the load balancers and orchestrator, not clients, and must
+    # never be throttled.
+    rules = [
+        ("GET", re.compile(r"^/health(/.*)?$"), None),
+        ("POST", re.compile(r"^/users/login$"), login),
+        ("POST", re.compile(r"^/users/signup$"), signup),
+        ("POST", re.compile(r"^/orders/[^/]+$"), checkout),
+        ("POST", re.compile(r"^/cart/checkout$"), checkout),
+    ]
+    return rules, default
+
+
+def _client_key(policy: RateLimitPolicy, scope: Scope) -> str:
+    if policy.key == "user":
+        authorization = Headers(scope=scope).get("authorization", "")
+        scheme, _, token = authorization.partition(" ")
+        if scheme.lower() == "bearer" and token:
+            try:
+                data = decode_access_token(token)
+            except HTTPException:
+                # Expired
+                data = None
+            if data and data.get("user_id"):
+                return f"user:{data['user_id']}"
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+class RateLimitMiddleware:
+    """
+    Apply the rate-limit policy of each route (see `_policies`) to every
+    request, answering 429 with Retry-After to the clients over their
+    limit, and adding X-RateLimit-* headers to the responses.
+    """
+
+    def __init__(self, app: ASGIApp, limiter: Optional[RateLimiter] = None):
+        self.app = app
+        self.limiter = limiter or rate_limiter
+        self.rules, self.default = _policies()
+
+    def policy(self, method: str, path: str) -> Optional[RateLimitPolicy]:
+        for rule_method, pattern, policy in self.rules:
+            if method == rule_method and pattern.match(path):
+                break
+        else:
+            policy = self.default
+        return policy if policy is not None and policy.limit > 0 else None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not rate_limit_settings.RATE_LIMIT_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        policy = self.policy(scope["method"], scope["path"])
+        if policy is None:
+            await self.app(scope, receive, send)
+            return
+
+        decision = self.limiter.hit(policy, _client_key(policy, scope))
+        if not decision.allowed:
+            body = json.dumps({"detail": "Too many requests, slow down."}).encode()
+            headers = MutableHeaders(decision.headers)
+            headers["Content-Type"] = "application/json"
+            headers["Content-Length"] = str(len(body))
+            await send(
+                {"type": "http.response.start", "status": 429, "headers": headers.raw}
+            )
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        async def send_with_headers(message: Message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.update(decision.headers)
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+
+rate_limiter = RateLimiter(redis_client)
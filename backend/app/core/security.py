@@ -1,8 +1,11 @@
-from typing import Annotated
+import secrets
+from typing import Annotated, Optional
 
 from fastapi import Depends, status, HTTPException
-from fastapi.security import OAuth2PasswordBearer
+from fastapi.security import APIKeyHeader, OAuth2PasswordBearer
 
+from app.config import admin_settings
+from app.core.tracing import traced
 from app.database.models import User
 from app.database.redis import is_token_blacklisted
 from app.services.users import UsersServiceDep
@@ -16,6 +19,7 @@ TokenDep = Annotated[str, Depends(oauth2_scheme)]
 
 # Utility function to ensure the presence of a valid access token.
 # To use used as a FastAPI dependency.
+@traced()
 async def get_access_token(token: TokenDep) -> dict:
     data = decode_access_token(token)
     # Perform additional validation on the token data so that later
@@ -37,6 +41,7 @@ TokenData = Annotated[dict, Depends(get_access_token)]
 
 # Utility function to retrieve a user by their ID from the database.
 # To use used as a FastAPI dependency for the routes.
+@traced()
 async def get_user_id(token_data: TokenData, users_service: UsersServiceDep) -> User:
     user = await users_service.get_by_id(token_data.get("user_id"))
     if not user:
@@ -48,3 +53,22 @@ async def get_user_id(token_data: TokenData, users_service: UsersServiceDep) ->
 
 # FastAPI dependency for the signed-in user.
 SignedInUserDep = Annotated[User, Depends(get_user_id)]
+
+
+admin_key_scheme = APIKeyHeader(name="X-Admin-Key", auto_error=False)
+
+
+# Guard for the operator-only admin routes: the request must carry the
+# configured ADMIN_API_KEY in the X-Admin-Key header.
+# To be used as a FastAPI dependency.
+async def require_admin(
+    key: Annotated[Optional[str], Depends(admin_key_scheme)],
+) -> None:
+    if not admin_settings.ADMIN_API_KEY:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Admin API is disabled."
+        )
+    if not key or not secrets.compare_digest(key, admin_settings.ADMIN_API_KEY):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid admin key."
+        )
@@ -0,0 +1,57 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask:
+    """
+    Run a coroutine function every `interval` seconds in the background of
+    the current event loop (e.g. from the application lifespan).
+
+    A failing run is logged and the task carries on with the next tick.
+    """
+
+    def __init__(
+        self, name: str, interval: float, func: Callable[[], Awaitable[object]]
+    ):
+        self.name = name
+        self._interval = interval
+        self._func = func
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if not self.running:
+            self._stopping.clear()
+            self._task = asyncio.create_task(self._run(), name=self.name)
+
+    async def stop(self):
+        """
+        Stop the task, letting a run in progress finish rather than
+        cancelling it half-way through (e.g. in the middle of a transaction).
+        """
+        if self._task is None:
+            return
+        self._stopping.set()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while not self._stopping.is_set():
+            try:
+                await self._func()
+            except Exception:
+                logger.exception("Background task %s failed", self.name)
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self._interval)
+            except asyncio.TimeoutError:
+                pass
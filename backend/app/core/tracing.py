@@ -0,0 +1,423 @@
+import asyncio
+import functools
+import inspect
+import json
+import logging
+import random
+import re
+import secrets
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+import httpx
+from redis.asyncio import Redis
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import tracing_settings
+
+logger = logging.getLogger(__name__)
+
+# Request tracing.
+#
+# A sampled request gets a trace, and the code it runs opens spans in it:
+# the dependencies and service methods decorated with `traced`, every SQL
+# statement of the instrumented engines and every Redis command of the
+# instrumented clients. The current span travels in a context variable, so
+# spans nest across awaits and into the tasks a request starts. Outside of
+# a sampled request, every instrumentation point costs one context variable
+# lookup. Finished traces are exported in the OpenTelemetry (OTLP/JSON)
+# format.
+
+# OTLP span kinds and status codes
+_KIND_INTERNAL, _KIND_SERVER, _KIND_CLIENT = 1, 2, 3
+_STATUS_OK, _STATUS_ERROR = 1, 2
+
+_TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class _Trace:
+    __slots__ = ("trace_id", "spans", "dropped")
+
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.spans: List["Span"] = []
+        self.dropped = 0
+
+
+class Span:
+    __slots__ = (
+        "trace",
+        "span_id",
+        "parent_id",
+        "name",
+        "kind",
+        "attributes",
+        "start_ns",
+        "end_ns",
+        "error",
+    )
+
+    def __init__(
+        self,
+        trace: _Trace,
+        name: str,
+        parent_id: Optional[str] = None,
+        kind: int = _KIND_INTERNAL,
+        attributes: Optional[Dict[str, Any]] = None,
+    ):
+        self.trace = trace
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes or {}
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def end(self, error: Optional[BaseException] = None):
+        self.end_ns = time.time_ns()
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        trace = self.trace
+        if len(trace.spans) < tracing_settings.TRACING_MAX_SPANS_PER_TRACE:
+            trace.spans.append(self)
+        else:
+            trace.dropped += 1
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [
+                {"key": key, "value": _otlp_value(value)}
+                for key, value in self.attributes.items()
+            ],
+            "status": (
+                {"code": _STATUS_ERROR, "message": self.error}
+                if self.error
+                else {"code": _STATUS_OK}
+            ),
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+# The innermost open span of the current (sampled) request, if any
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+class _SpanContext:
+    __slots__ = ("_name", "_kind", "_attributes", "_span", "_token")
+
+    def __init__(self, name: str, kind: int, attributes: Dict[str, Any]):
+        self._name = name
+        self._kind = kind
+        self._attributes = attributes
+
+    def __enter__(self) -> Span:
+        parent = _current_span.get()
+        self._span = Span(
+            parent.trace, self._name, parent.span_id, self._kind, self._attributes
+        )
+        self._token = _current_span.set(self._span)
+        return self._span
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_span.reset(self._token)
+        self._span.end(exc)
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, exc_type, exc, tb):
+        return None
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(name: str, **attributes: Any):
+    """
+    Context manager timing a block as a child of the current span; it
+    yields the Span, or None (and does nothing) if the request isn't
+    sampled.
+    """
+    if _current_span.get() is None:
+        return _NO_SPAN
+    return _SpanContext(name, _KIND_INTERNAL, attributes)
+
+
+def traced(name: Optional[str] = None) -> Callable[[F], F]:
+    """Decorator running each call of a function in a span of its own."""
+
+    def decorate(func: F) -> F:
+        span_name = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if _current_span.get() is None:
+                    return await func(*args, **kwargs)
+                with _SpanContext(span_name, _KIND_INTERNAL, {}):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current_span.get() is None:
+                return func(*args, **kwargs)
+            with _SpanContext(span_name, _KIND_INTERNAL, {}):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def traced_methods(cls: type) -> type:
+    """Class decorator tracing every public coroutine method of a service."""
+    for attr, value in list(vars(cls).items()):
+        if not attr.startswith("_") and inspect.iscoroutinefunction(value):
+            setattr(cls, attr, traced(f"{cls.__name__}.{attr}")(value))
+    return cls
+
+
+def instrument_engine(engine: AsyncEngine):
+    """Open a span around every SQL statement run through `engine`."""
+    sync_engine = engine.sync_engine
+    system = sync_engine.dialect.name
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def start_statement_span(conn, cursor, statement, parameters, context, executemany):
+        parent = _current_span.get()
+        if parent is None:
+            return
+        context._trace_span = Span(
+            parent.trace,
+            statement.split(None, 1)[0].upper(),
+            parent.span_id,
+            _KIND_CLIENT,
+            {"db.system": system, "db.statement": statement},
+        )
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def end_statement_span(conn, cursor, statement, parameters, context, executemany):
+        statement_span = getattr(context, "_trace_span", None)
+        if statement_span is not None:
+            statement_span.end()
+
+    @event.listens_for(sync_engine, "handle_error")
+    def end_failed_statement_span(exception_context):
+        context = exception_context.execution_context
+        statement_span = getattr(context, "_trace_span", None)
+        if statement_span is not None:
+            statement_span.end(exception_context.original_exception)
+
+
+def instrument_redis(client: Redis):
+    """Open a span around every command (and pipeline) sent through `client`."""
+    execute_command = client.execute_command
+    pipeline = client.pipeline
+
+    @functools.wraps(execute_command)
+    async def traced_execute_command(*args, **options):
+        if _current_span.get() is None:
+            return await execute_command(*args, **options)
+        with _SpanContext(f"redis {args[0]}", _KIND_CLIENT, {"db.system": "redis"}):
+            return await execute_command(*args, **options)
+
+    @functools.wraps(pipeline)
+    def traced_pipeline(*args, **kwargs):
+        pipe = pipeline(*args, **kwargs)
+        execute = pipe.execute
+
+        async def traced_execute(*args, **kwargs):
+            if _current_span.get() is None:
+                return await execute(*args, **kwargs)
+            with _SpanContext(
+                "redis pipeline", _KIND_CLIENT, {"db.system": "redis"}
+            ) as s:
+                s.set_attribute("redis.commands", len(pipe.command_stack))
+                return await execute(*args, **kwargs)
+
+        pipe.execute = traced_execute
+        return pipe
+
+    client.execute_command = traced_execute_command
+    client.pipeline = traced_pipeline
+
+
+class TraceExporter:
+    """
+    Buffer finished traces and write them out as OTLP/JSON: one
+    ExportTraceServiceRequest per line of TRACING_EXPORT_PATH, or POSTed to
+    the /v1/traces endpoint of the collector at TRACING_OTLP_ENDPOINT.
+    """
+
+    def __init__(self):
+        self._pending: List[Span] = []
+
+    def add(self, trace: _Trace):
+        if trace.dropped:
+            logger.warning(
+                "Dropped %d spans of trace %s", trace.dropped, trace.trace_id
+            )
+        self._pending.extend(trace.spans)
+
+    async def flush(self) -> int:
+        """Export the buffered spans; returns how many were exported."""
+        spans, self._pending = self._pending, []
+        if not spans:
+            return 0
+        request = {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            {
+                                "key": "service.name",
+                                "value": {
+                                    "stringValue": tracing_settings.TRACING_SERVICE_NAME
+                                },
+                            }
+                        ]
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": __name__},
+                            "spans": [span.to_otlp() for span in spans],
+                        }
+                    ],
+                }
+            ]
+        }
+        endpoint = tracing_settings.TRACING_OTLP_ENDPOINT
+        try:
+            if endpoint:
+                async with httpx.AsyncClient() as client:
+                    response = await client.post(
+                        f"{endpoint.rstrip('/')}/v1/traces", json=request
+                    )
+                    response.raise_for_status()
+            else:
+                await asyncio.to_thread(
+                    _append_line,
+                    tracing_settings.TRACING_EXPORT_PATH,
+                    json.dumps(request),
+                )
+        except (OSError, httpx.HTTPError) as exc:
+            logger.warning("Could not export %d spans: %s", len(spans), exc)
+            return 0
+        return len(spans)
+
+
+def _append_line(path: str, line: str):
+    with open(path, "a", encoding="utf-8") as file:
+        file.write(line + "\n")
+
+
+trace_exporter = TraceExporter()
+
+
+def _sampled_parent(scope: Scope) -> Optional[re.Match]:
+    traceparent = Headers(scope=scope).get("traceparent")
+    if not traceparent:
+        return None
+    return _TRACEPARENT_RE.match(traceparent.strip().lower())
+
+
+class TracingMiddleware:
+    """
+    Decide whether to trace each request and open its root span.
+
+    A request continuing a trace (W3C traceparent header) follows the
+    caller's sampling decision; others are sampled at TRACING_SAMPLE_RATE.
+    The trace context of sampled requests is echoed back in a traceparent
+    response header.
+    """
+
+    def __init__(self, app: ASGIApp, exporter: Optional[TraceExporter] = None):
+        self.app = app
+        self.exporter = exporter or trace_exporter
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        parent = _sampled_parent(scope)
+        if parent is not None:
+            sampled = int(parent.group(3), 16) & 1
+        else:
+            sampled = random.random() < tracing_settings.TRACING_SAMPLE_RATE
+        if not sampled:
+            await self.app(scope, receive, send)
+            return
+
+        trace = _Trace(parent.group(1) if parent else secrets.token_hex(16))
+        root = Span(
+            trace,
+            f"{scope['method']} {scope['path']}",
+            parent.group(2) if parent else None,
+            _KIND_SERVER,
+            {"http.method": scope["method"], "http.target": scope["path"]},
+        )
+
+        async def send_with_trace_context(message: Message):
+            if message["type"] == "http.response.start":
+                root.set_attribute("http.status_code", message["status"])
+                headers = MutableHeaders(scope=message)
+                headers["traceparent"] = f"00-{trace.trace_id}-{root.span_id}-01"
+            await send(message)
+
+        token = _current_span.set(root)
+        error = None
+        try:
+            await self.app(scope, receive, send_with_trace_context)
+        except BaseException as exc:
+            error = exc
+            raise
+        finally:
+            _current_span.reset(token)
+            route = scope.get("route")
+            if route is not None:
+                # Named after the route template, like "GET /books/{book_id}"
+                root.name = f"{scope['method']} {route.path}"
+                root.set_attribute("http.route", route.path)
+            root.end(error)
+            self.exporter.add(trace)
@@ -1,8 +1,9 @@
 from datetime import datetime
 from decimal import Decimal
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 
 from pydantic import EmailStr
+from sqlalchemy import JSON, Index
 from sqlmodel import SQLModel, Field, Relationship
 
 
@@ -11,6 +12,11 @@ class Author(SQLModel, table=True):
     Represents an author of books.
     """
 
+    # Authors are identified by name for catalog imports (upsert target)
+    __table_args__ = (
+        Index("ix_author_first_name_last_name", "first_name", "last_name", unique=True),
+    )
+
     id: int = Field(primary_key=True, index=True)
     first_name: str
     last_name: str
@@ -39,20 +45,52 @@ class Book(SQLModel, table=True):
     id: int = Field(primary_key=True, index=True)
     title: str
     author_id: int = Field(foreign_key="author.id")
-    isbn: str
+    isbn: str = Field(index=True, unique=True)
     price: Decimal
     published_date: datetime
     description: Optional[str] = None
     stock_quantity: int
+    # Number of StockShard counters holding the stock of a hot book (0 when
+    # the stock lives in stock_quantity itself)
+    stock_shards: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
     cover_image_url: Optional[str] = None
+    # Review aggregates, kept up to date by ReviewsService as reviews are
+    # added and deleted, so that reading them costs no extra query
+    rating_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    rating_sum: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    # Histogram: the number of reviews with 1, 2, ... 5 stars
+    rating_1_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    rating_2_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    rating_3_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    rating_4_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    rating_5_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
     author: Optional["Author"] = Relationship(back_populates="books")
 
+    @property
+    def rating_average(self) -> Optional[float]:
+        if not self.rating_count:
+            return None
+        return round(self.rating_sum / self.rating_count, 2)
+
+    @property
+    def rating_histogram(self) -> List[int]:
+        return [
+            self.rating_1_count,
+            self.rating_2_count,
+            self.rating_3_count,
+            self.rating_4_count,
+            self.rating_5_count,
+        ]
+
 
 class Review(SQLModel, table=True):
     """
     Represents a review for a specific book.
     """
 
+    # Pages of a book's reviews are read newest (highest id) first
+    __table_args__ = (Index("ix_review_book_id_id", "book_id", "id"),)
+
     id: int = Field(primary_key=True, index=True)
     book_id: int = Field(foreign_key="book.id")
     user_id: int = Field(foreign_key="user.id")
@@ -89,3 +127,140 @@ class Order(SQLModel, table=True):
     items: List[OrderItem] = Relationship(
         back_populates="order", sa_relationship_kwargs={"cascade": "all, delete"}
     )
+
+
+class StockShard(SQLModel, table=True):
+    """
+    One of the counters the stock of a hot book is split across, so that
+    concurrent checkouts update different rows. `Book.stock_quantity` is
+    kept in line with the sum of the slots by the stock reconciler.
+    """
+
+    book_id: int = Field(foreign_key="book.id", primary_key=True)
+    slot: int = Field(primary_key=True)
+    quantity: int = Field(..., ge=0)
+
+
+class StockReservation(SQLModel, table=True):
+    """
+    Stock held for an order until it is completed, cancelled or the hold
+    expires (see ReservationsService).
+    """
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    order_id: int = Field(foreign_key="order.id", index=True)
+    book_id: int = Field(foreign_key="book.id")
+    quantity: int = Field(..., gt=0)
+    # The expiry sweeper walks this index in time order
+    expires_at: datetime = Field(index=True)
+
+
+class OutboxEvent(SQLModel, table=True):
+    """
+    An event recorded in the same transaction as the change it describes,
+    waiting to be published by the outbox dispatcher.
+    """
+
+    # Events are published in id order
+    id: Optional[int] = Field(default=None, primary_key=True)
+    topic: str
+    payload: Dict[str, Any] = Field(default_factory=dict, sa_type=JSON)
+    created_at: datetime
+    # Failed deliveries; events over OUTBOX_MAX_ATTEMPTS are left alone
+    attempts: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    last_error: Optional[str] = None
+    # Not published before then: the retry backoff of a failed event, or the
+    # lease of the dispatcher publishing it. None is as soon as possible.
+    next_attempt_at: Optional[datetime] = None
+
+
+class HandledEvent(SQLModel, table=True):
+    """
+    An outbox event applied by a database-backed handler, recorded in the
+    same transaction as its effects so that redeliveries are skipped.
+    Dropped along with the event once it is published.
+    """
+
+    handler: str = Field(primary_key=True)
+    event_id: int = Field(primary_key=True)
+    handled_at: datetime
+
+
+class Job(SQLModel, table=True):
+    """
+    A unit of deferred work in the persistent job queue (see JobRunner).
+    """
+
+    # Workers claim the oldest due job of the queue
+    __table_args__ = (Index("ix_job_status_run_at", "status", "run_at"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    name: str
+    payload: Dict[str, Any] = Field(default_factory=dict, sa_type=JSON)
+    # queued, running, done or failed
+    status: str = "queued"
+    run_at: datetime
+    attempts: int = 0
+    max_attempts: int
+    # Lease of the worker running the job; an expired lease means the worker
+    # died and the job can be claimed again
+    locked_until: Optional[datetime] = None
+    last_error: Optional[str] = None
+    # Set on scheduled runs, so each schedule slot is enqueued once no matter
+    # how many workers run the scheduler
+    dedupe_key: Optional[str] = Field(default=None, unique=True)
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+
+# Cold storage for closed orders (see OrderArchiveService). On Postgres both
+# tables are partitioned by month of the order date; the partition key has
+# to be part of their primary keys.
+_ARCHIVE_PARTITIONING = {"postgresql_partition_by": "RANGE (order_date)"}
+
+
+class OrderArchive(SQLModel, table=True):
+    """
+    A closed order moved out of the `order` table by the order archiver.
+    """
+
+    __table_args__ = (_ARCHIVE_PARTITIONING,)
+
+    id: int = Field(primary_key=True)
+    order_date: datetime = Field(primary_key=True)
+    user_id: int = Field(index=True)
+    total_price: Decimal
+    status: str
+    archived_at: datetime
+
+
+class OrderItemArchive(SQLModel, table=True):
+    """
+    An item of an archived order; carries the order date to be partitioned
+    along with its order.
+    """
+
+    __table_args__ = (_ARCHIVE_PARTITIONING,)
+
+    id: int = Field(primary_key=True)
+    order_date: datetime = Field(primary_key=True)
+    order_id: int = Field(index=True)
+    book_id: int = Field(index=True)
+    quantity: int
+    price_at_purchase: Decimal
+
+
+class CoPurchase(SQLModel, table=True):
+    """
+    How many orders contained both `book_id` and `related_book_id` ("customers
+    who bought this also bought"). Every pair is stored in both directions,
+    so the related books of a book are a range scan of the index.
+    """
+
+    __table_args__ = (
+        Index("ix_copurchase_book_id_count", "book_id", "count", "related_book_id"),
+    )
+
+    book_id: int = Field(primary_key=True)
+    related_book_id: int = Field(primary_key=True)
+    count: int
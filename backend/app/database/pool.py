@@ -0,0 +1,64 @@
+import time
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import Pool
+
+from app.api.schemas.health import PoolStats
+
+
+class PoolMonitor:
+    """
+    Count the connections taken from an engine's pool and time how long
+    getting them took, for the health stats.
+    """
+
+    def __init__(self):
+        self.checkouts = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def track(self, engine: AsyncEngine):
+        sync_engine = engine.sync_engine
+        self._time_checkouts(sync_engine.pool)
+
+        # Disposing an engine replaces its pool
+        @event.listens_for(sync_engine, "engine_disposed")
+        def track_new_pool(engine):
+            self._time_checkouts(engine.pool)
+
+    def stats(self, engine: AsyncEngine) -> PoolStats:
+        pool = engine.sync_engine.pool
+        # Only the queue pools have a size
+        size = getattr(pool, "size", None)
+        checked_out = getattr(pool, "checkedout", None)
+        overflow = getattr(pool, "overflow", None)
+        return PoolStats(
+            size=size() if size else None,
+            checked_out=checked_out() if checked_out else None,
+            overflow=overflow() if overflow else None,
+            checkouts=self.checkouts,
+            average_wait_ms=(
+                self.total_wait_seconds / self.checkouts * 1000
+                if self.checkouts
+                else 0.0
+            ),
+            max_wait_ms=self.max_wait_seconds * 1000,
+        )
+
+    def _time_checkouts(self, pool: Pool):
+        connect = pool.connect
+
+        def timed_connect():
+            started = time.perf_counter()
+            connection = connect()
+            waited = time.perf_counter() - started
+            self.checkouts += 1
+            self.total_wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+            return connection
+
+        pool.connect = timed_connect
+
+
+pool_monitor = PoolMonitor()
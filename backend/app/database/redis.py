@@ -1,17 +1,21 @@
 from redis.asyncio import Redis
 
 from app.config import db_settings
+from app.core.tracing import instrument_redis
 
-_token_blacklist = Redis(
+# Shared client (and connection pool) for everything we keep in Redis.
+redis_client = Redis(
     host=db_settings.REDIS_HOST,
     port=db_settings.REDIS_PORT,
     db=db_settings.REDIS_DB,
 )
+# Commands of sampled requests get spans of their own
+instrument_redis(redis_client)
 
 
 async def add_token_to_blacklist(jti: str):
-    await _token_blacklist.set(jti, 1)
+    await redis_client.set(jti, 1)
 
 
 async def is_token_blacklisted(jti: str) -> bool:
-    return await _token_blacklist.exists(jti)
+    return await redis_client.exists(jti)
@@ -1,17 +1,73 @@
-from typing import Annotated
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Annotated, Tuple
 
 from fastapi import Depends
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy import event, make_url, text
+from sqlalchemy.exc import InvalidRequestError, OperationalError, ProgrammingError
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import Session
 from sqlmodel import SQLModel
 
+from app.config import db_settings
+from app.core.admission import enforce_deadlines
+from app.core.tracing import instrument_engine
+from app.database.pool import pool_monitor
+from app.database.versions import resource_versions
+
+DATABASE_URL = "sqlite+aiosqlite:///./kohyli.db"
+
+
+def driver_connect_args(url: str) -> dict:
+    """
+    Connect arguments for the driver of `url`.
+
+    The services run prebuilt statements whose SQL text never changes, so
+    the driver can prepare each of them once per connection and reuse it.
+    """
+    if make_url(url).get_driver_name() == "asyncpg":
+        # asyncpg prepares statements server side, keeping an LRU of them
+        # per connection
+        return {"prepared_statement_cache_size": db_settings.DB_STATEMENT_CACHE_SIZE}
+    return {
+        # We need to disable the check_same_thread flag for SQLite,
+        # as otherwise we will get an error when running multiple threads.
+        "check_same_thread": False,
+        "cached_statements": db_settings.DB_STATEMENT_CACHE_SIZE,
+    }
+
+
 engine = create_async_engine(
-    url="sqlite+aiosqlite:///./kohyli.db",
+    url=DATABASE_URL,
     # FOTIS: echo commands for now for debugging purposes
     echo=True,
-    # We need to disable the check_same_thread flag for SQLite,
-    # as otherwise we will get an error when running multiple threads.
-    connect_args={"check_same_thread": False},
+    connect_args=driver_connect_args(DATABASE_URL),
 )
+# Writes bump the versions behind the HTTP cache validators
+resource_versions.track(engine)
+# Statements don't outlive the deadline of the request they run for
+enforce_deadlines(engine)
+# Connection checkouts are counted and timed for the health stats
+pool_monitor.track(engine)
+# Statements of sampled requests get spans of their own
+instrument_engine(engine)
+
+
+ALEMBIC_INI = Path(__file__).resolve().parents[1] / "alembic.ini"
+MIGRATION_VERSIONS = Path(__file__).resolve().parents[1] / "migrations" / "versions"
+
+_REVISION_RE = re.compile(r"^revision(?:: str)? = [\"']([0-9a-zA-Z_]+)[\"']", re.M)
+_DOWN_REVISION_RE = re.compile(r"^down_revision(?:: [^=]+)? = (.+)$", re.M)
+
+
+class SchemaOutOfDateError(RuntimeError):
+    """The database is not at the revision this code expects."""
 
 
 async def create_tables():
@@ -21,7 +77,10 @@ async def create_tables():
         # create tables
         await conn.run_sync(SQLModel.metadata.create_all)
 
-        # seed some initial data (idempotent)
+
+async def seed_data():
+    """Insert the sample authors and books (idempotent)."""
+    async with engine.begin() as conn:
         await conn.exec_driver_sql(
             """
             INSERT OR IGNORE INTO author (id, first_name, last_name, biography) VALUES
@@ -41,11 +100,109 @@ async def create_tables():
         )
 
 
+@lru_cache
+def expected_schema_revisions() -> Tuple[str, ...]:
+    """
+    Return the Alembic head revision(s) shipped with this code.
+
+    Importing alembic and loading its script directory costs hundreds of
+    milliseconds per worker, so the revision graph is read straight from
+    the `revision` / `down_revision` lines of the migration scripts.
+    """
+    revisions, parents = set(), set()
+    for script in MIGRATION_VERSIONS.glob("*.py"):
+        source = script.read_text()
+        revision = _REVISION_RE.search(source)
+        down_revision = _DOWN_REVISION_RE.search(source)
+        if revision:
+            revisions.add(revision.group(1))
+        if down_revision:
+            parents.update(
+                re.findall(r"[\"']([0-9a-zA-Z_]+)[\"']", down_revision.group(1))
+            )
+    return tuple(sorted(revisions - parents))
+
+
+async def verify_schema():
+    """
+    Check that the database is at the latest Alembic revision.
+
+    This is a single-row read of Alembic's version table, cheap enough to
+    run on every worker boot, unlike `create_tables`.
+    """
+    expected = expected_schema_revisions()
+    try:
+        async with engine.connect() as conn:
+            result = await conn.execute(text("SELECT version_num FROM alembic_version"))
+            current = tuple(result.scalars().all())
+    except (OperationalError, ProgrammingError):
+        # The version table doesn't exist: migrations never ran
+        current = ()
+
+    if sorted(current) != sorted(expected):
+        raise SchemaOutOfDateError(
+            f"Database schema is at revision {', '.join(current) or '<none>'}, "
+            f"expected {', '.join(expected)}. "
+            "Run `python -m app.cli migrate` before starting the API."
+        )
+
+
+class ReadOnlySession(Session):
+    """A session that refuses to write, for the requests that only read."""
+
+
+@event.listens_for(ReadOnlySession, "before_flush")
+def _refuse_flush(session, flush_context, instances):
+    raise InvalidRequestError("Can't write through a read-only session.")
+
+
+@event.listens_for(ReadOnlySession, "do_orm_execute")
+def _refuse_dml(orm_execute_state):
+    state = orm_execute_state
+    if state.is_insert or state.is_update or state.is_delete:
+        raise InvalidRequestError("Can't write through a read-only session.")
+
+
+def session_factory(bind: AsyncEngine) -> async_sessionmaker:
+    """
+    Read-write sessions on `bind`. Objects stay loaded when a session
+    commits: writes return what they wrote (the primary keys through
+    RETURNING) instead of reloading it with a refresh round trip.
+    """
+    return async_sessionmaker(bind, expire_on_commit=False)
+
+
+def read_only_session_factory(bind: AsyncEngine) -> async_sessionmaker:
+    """
+    Read-only sessions on `bind`. They don't autoflush (there's nothing to
+    flush), and on Postgres run their transactions READ ONLY.
+    """
+    return async_sessionmaker(
+        bind.execution_options(postgresql_readonly=True),
+        sync_session_class=ReadOnlySession,
+        expire_on_commit=False,
+        autoflush=False,
+    )
+
+
+# The sessions of the app's engine
+async_session = session_factory(engine)
+read_only_session = read_only_session_factory(engine)
+
+
 async def get_session():
-    async with AsyncSession(engine) as session:
+    """A read-write session; the service using it commits its writes."""
+    async with async_session() as session:
+        yield session
+
+
+async def get_read_session():
+    """A read-only session, for the routes that only query."""
+    async with read_only_session() as session:
         yield session
 
 
-# Type hinting for the session dependency, which FastAPI
+# Type hinting for the session dependencies, which FastAPI
 # can leverage to inject the session object into the endpoint.
 SessionDep = Annotated[AsyncSession, Depends(get_session)]
+ReadSessionDep = Annotated[AsyncSession, Depends(get_read_session)]
@@ -0,0 +1,127 @@
+import logging
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional, Set, Tuple
+
+from redis.asyncio import Redis
+from sqlalchemy import event, inspect
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import ORMExecuteState, Session
+from sqlalchemy.util import await_only
+
+from app.database.redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+_VERSIONS_KEY = "versions"
+_MODIFIED_KEY = "versions:modified"
+
+
+class ResourceVersions:
+    """
+    A version counter, and the time of the last change, per database table.
+
+    Counters live in Redis, shared by the workers, and are bumped right
+    after every commit that wrote to their table (ORM flushes and Core
+    INSERT/UPDATE/DELETE statements that matched rows, run through a
+    session, alike). Bumping
+    after the commit, rather than in the transaction, keeps hot tables free
+    of a contended version row; a read in between sees the new data under
+    the old version, which only costs its client an extra revalidation.
+    """
+
+    def __init__(self, redis: Redis):
+        self._redis = redis
+        self._engines: Set[Engine] = set()
+        # Session.info entry of the tables written by the current transaction
+        self._written_key = f"written_tables:{id(self)}"
+
+    def track(self, engine: AsyncEngine):
+        """Bump the versions of the tables written through `engine`."""
+        if not self._engines:
+            event.listen(Session, "do_orm_execute", self._on_execute)
+            event.listen(Session, "after_flush", self._on_flush)
+            event.listen(Session, "after_commit", self._on_commit)
+            event.listen(Session, "after_rollback", self._on_rollback)
+        self._engines.add(engine.sync_engine)
+
+    async def get(self, tables: Iterable[str]) -> Tuple[List[int], datetime]:
+        """
+        Return the versions of `tables` and the last time any of them
+        changed (or first had its version read).
+        """
+        tables = list(tables)
+        versions, modified = await self._read(tables)
+        missing = [table for table, at in zip(tables, modified) if at is None]
+        if missing:
+            now = datetime.now(timezone.utc).timestamp()
+            async with self._redis.pipeline(transaction=False) as pipe:
+                for table in missing:
+                    pipe.hsetnx(_MODIFIED_KEY, table, now)
+                await pipe.execute()
+            versions, modified = await self._read(tables)
+
+        return (
+            [int(version or 0) for version in versions],
+            datetime.fromtimestamp(max(float(at) for at in modified), timezone.utc),
+        )
+
+    async def bump(self, tables: Iterable[str]):
+        """Record a change of `tables`."""
+        now = datetime.now(timezone.utc).timestamp()
+        async with self._redis.pipeline(transaction=True) as pipe:
+            for table in tables:
+                pipe.hincrby(_VERSIONS_KEY, table, 1)
+                pipe.hset(_MODIFIED_KEY, table, now)
+            await pipe.execute()
+
+    async def _read(self, tables: List[str]):
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.hmget(_VERSIONS_KEY, tables)
+            pipe.hmget(_MODIFIED_KEY, tables)
+            return await pipe.execute()
+
+    def _on_execute(self, state: ORMExecuteState):
+        if not (state.is_insert or state.is_update or state.is_delete):
+            return None
+        written = self._written(state.session)
+        if written is None:
+            return None
+        result = state.invoke_statement()
+        # A statement that matched no rows (like a reconciler pass with
+        # nothing to do) didn't change the table. The rowcount of a
+        # RETURNING statement isn't known before its rows are fetched, so
+        # those count as writes.
+        if result.returns_rows or result.rowcount != 0:
+            written.add(state.statement.table.name)
+        return result
+
+    def _on_flush(self, session: Session, flush_context):
+        written = self._written(session)
+        if written is not None:
+            for obj in (*session.new, *session.dirty, *session.deleted):
+                written.add(inspect(obj).mapper.local_table.name)
+
+    def _on_commit(self, session: Session):
+        written = session.info.pop(self._written_key, None)
+        if not written:
+            return
+        try:
+            # Commits of an AsyncSession run in a greenlet of the event loop,
+            # where the coroutine can be awaited inline
+            await_only(self.bump(sorted(written)))
+        except Exception as exc:
+            logger.warning(
+                "Could not bump the versions of %s: %s", sorted(written), exc
+            )
+
+    def _on_rollback(self, session: Session):
+        session.info.pop(self._written_key, None)
+
+    def _written(self, session: Session) -> Optional[Set[str]]:
+        if session.bind not in self._engines:
+            return None
+        return session.info.setdefault(self._written_key, set())
+
+
+resource_versions = ResourceVersions(redis_client)
@@ -1,21 +1,117 @@
+import logging
+import time
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from starlette.middleware.cors import CORSMiddleware
 
 from app.api.router import combined_router
-from app.database.session import create_tables
+from app.config import (
+    db_settings,
+    job_settings,
+    outbox_settings,
+    rate_limit_settings,
+    reservation_settings,
+    stock_settings,
+    tracing_settings,
+    trending_settings,
+)
+from app.core.admission import AdmissionMiddleware
+from app.core.compression import CompressionMiddleware
+from app.core.rate_limit import RateLimitMiddleware, rate_limiter
+from app.core.tasks import PeriodicTask
+from app.core.tracing import TracingMiddleware, trace_exporter
+from app.database.session import create_tables, engine, seed_data, verify_schema
+from app.services.jobs import JobRunner
+from app.services.outbox import OutboxDispatcher
+from app.services.reservations import sweep_expired_reservations
+from app.services.stock import reconcile_sharded_stock
+from app.services.trending import refresh_trending
+
+logger = logging.getLogger(__name__)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Anything that happens before the yield happens before the app starts
-    await create_tables()
+    started = time.perf_counter()
+
+    if db_settings.DB_STARTUP_MODE == "verify":
+        # Schema changes and seeding are owned by `python -m app.cli
+        # migrate/seed`; workers only make sure they run against it.
+        await verify_schema()
+    else:
+        await create_tables()
+        await seed_data()
+
+    app.state.startup_seconds = time.perf_counter() - started
+    logger.info(
+        "Worker ready in %.1f ms (DB_STARTUP_MODE=%s)",
+        app.state.startup_seconds * 1000,
+        db_settings.DB_STARTUP_MODE,
+    )
+
+    # Put the stock of orders that were never completed back on sale
+    reservation_sweeper = PeriodicTask(
+        "reservation-sweeper",
+        reservation_settings.RESERVATION_SWEEP_INTERVAL_SECONDS,
+        lambda: sweep_expired_reservations(engine),
+    )
+    if reservation_settings.RESERVATION_HOLDS_ENABLED:
+        reservation_sweeper.start()
+    # Keep the stock_quantity of sharded hot books in line with the counters
+    stock_reconciler = PeriodicTask(
+        "stock-reconciler",
+        stock_settings.STOCK_RECONCILE_INTERVAL_SECONDS,
+        lambda: reconcile_sharded_stock(engine),
+    )
+    stock_reconciler.start()
+    # Publish the order events recorded in the outbox to their handlers
+    app.state.outbox_dispatcher = OutboxDispatcher(engine)
+    outbox_dispatcher = PeriodicTask(
+        "outbox-dispatcher",
+        outbox_settings.OUTBOX_POLL_INTERVAL_SECONDS,
+        app.state.outbox_dispatcher.drain,
+    )
+    outbox_dispatcher.start()
+    # Slide the trending windows forward
+    trending_refresher = PeriodicTask(
+        "trending-refresher",
+        trending_settings.TRENDING_REFRESH_INTERVAL_SECONDS,
+        refresh_trending,
+    )
+    trending_refresher.start()
+    # Share this worker's rate-limit hits with the others
+    rate_limit_syncer = PeriodicTask(
+        "rate-limit-sync",
+        rate_limit_settings.RATE_LIMIT_SYNC_INTERVAL_SECONDS,
+        rate_limiter.sync,
+    )
+    rate_limit_syncer.start()
+    # Write out the traces of sampled requests
+    trace_flusher = PeriodicTask(
+        "trace-exporter",
+        tracing_settings.TRACING_EXPORT_INTERVAL_SECONDS,
+        trace_exporter.flush,
+    )
+    trace_flusher.start()
+    # Deferred and periodic jobs, unless a dedicated worker process runs them
+    app.state.job_runner = JobRunner(engine) if job_settings.JOBS_RUN_IN_API else None
+    if app.state.job_runner:
+        app.state.job_runner.start()
 
     yield
 
     # And anything that happens after the yield happens after the app stops
-    return
+    if app.state.job_runner:
+        await app.state.job_runner.stop()
+    await rate_limit_syncer.stop()
+    await trace_flusher.stop()
+    await trace_exporter.flush()
+    await trending_refresher.stop()
+    await outbox_dispatcher.stop()
+    await stock_reconciler.stop()
+    await reservation_sweeper.stop()
 
 
 app = FastAPI(
@@ -26,6 +122,10 @@ app = FastAPI(
     generate_unique_id_function=lambda route: route.name,
 )
 
+# Innermost, so that shed requests still get their CORS headers
+app.add_middleware(AdmissionMiddleware)
+# Throttled clients are turned away before they take an admission slot
+app.add_middleware(RateLimitMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:5173", "http://localhost:4173"],
@@ -33,5 +133,9 @@ app.add_middleware(
     allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
     allow_headers=["*"],
 )
+# Just inside tracing, so that it compresses everything the app sends
+app.add_middleware(CompressionMiddleware)
+# Outermost, so that the root span of a request covers all of it
+app.add_middleware(TracingMiddleware)
 
 app.include_router(combined_router)
@@ -1,13 +1,20 @@
 from typing import List, Annotated
 
 from fastapi import Depends
+from sqlalchemy import bindparam
 from sqlmodel import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.tracing import traced_methods
 from app.database.models import Author, Book
-from app.database.session import SessionDep
+from app.database.session import ReadSessionDep
 
+# Prebuilt, like the statements of the books service
+_ALL_AUTHORS = select(Author)
+_BOOKS_FOR_AUTHOR = select(Book).where(Book.author_id == bindparam("author_id"))
 
+
+@traced_methods
 class AuthorsService:
     """Encapsulate DB operations for authors."""
 
@@ -16,7 +23,7 @@ class AuthorsService:
 
     async def get_all(self) -> List[Author]:
         """Return all authors."""
-        result = await self._session.execute(select(Author))
+        result = await self._session.execute(_ALL_AUTHORS)
         return result.scalars().all()
 
     async def get_by_id(self, author_id: int) -> Author | None:
@@ -25,12 +32,13 @@ class AuthorsService:
 
     async def get_books_for_author(self, author_id: int) -> List[Book]:
         """Return books written by the specified author."""
-        stmt = select(Book).where(Book.author_id == author_id)
-        result = await self._session.execute(stmt)
+        result = await self._session.execute(
+            _BOOKS_FOR_AUTHOR, {"author_id": author_id}
+        )
         return result.scalars().all()
 
 
-async def get_authors_service(session: SessionDep) -> AuthorsService:
+async def get_authors_service(session: ReadSessionDep) -> AuthorsService:
     """
     Dependency factory for AuthorsService.
 
@@ -2,31 +2,264 @@ from datetime import datetime, timezone, timedelta
 from typing import List, Annotated, Tuple, Optional
 
 from fastapi import Depends
-from sqlalchemy import func, desc
+from sqlalchemy import Row, bindparam, func, desc, union_all
 from sqlalchemy.orm import selectinload
 from sqlmodel import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database.models import Book, Order, OrderItem
-from app.database.session import SessionDep
+from app.core.tracing import traced_methods
+from app.database.models import (
+    Author,
+    Book,
+    Order,
+    OrderArchive,
+    OrderItem,
+    OrderItemArchive,
+)
+from app.database.session import ReadSessionDep
+from app.services.order_archive import archive_cutoff
 
+# Columns for the list-view projection of a book. Listing pages never show
+# the description or the author's biography, so we select only what they
+# display and let the database do the author name concatenation.
+LIST_VIEW_COLUMNS = (
+    Book.id,
+    Book.title,
+    Book.price,
+    Book.cover_image_url,
+    (Author.first_name + " " + Author.last_name).label("author_name"),
+    (Book.stock_quantity > 0).label("in_stock"),
+)
 
+
+def list_view_select():
+    """Return a SELECT of the list-view columns, joined with the author."""
+    return select(*LIST_VIEW_COLUMNS).outerjoin(Author, Author.id == Book.author_id)
+
+
+def _with_authors(stmt, with_authors: bool):
+    """Eager-load the authors of the selected books, if asked to."""
+    return stmt.options(selectinload(Book.author)) if with_authors else stmt
+
+
+# Prebuilt statements of the hot catalog queries.
+#
+# Building a select() with its loader options on every call costs more
+# Python time than running it on a warm connection. These are built once
+# and take their values as bound parameters; a statement object also
+# memoizes its cache key, so SQLAlchemy finds its compiled form (and the
+# driver its prepared statement) without walking the construct again.
+# Variants are keyed by with_authors.
+_ALL_BOOKS = {
+    with_authors: _with_authors(select(Book), with_authors)
+    for with_authors in (True, False)
+}
+_FIRST_BOOKS = {
+    with_authors: stmt.order_by(Book.id).limit(bindparam("limit"))
+    for with_authors, stmt in _ALL_BOOKS.items()
+}
+_BOOKS_BY_IDS = {
+    with_authors: stmt.where(Book.id.in_(bindparam("book_ids", expanding=True)))
+    for with_authors, stmt in _ALL_BOOKS.items()
+}
+_BOOK_BY_ID = _ALL_BOOKS[True].where(Book.id == bindparam("book_id"))
+_BOOKS_BY_AUTHOR = _ALL_BOOKS[True].where(Book.author_id == bindparam("author_id"))
+_NEW_ARRIVALS = {
+    with_authors: stmt.where(Book.published_date >= bindparam("cutoff")).order_by(
+        desc(Book.published_date)
+    )
+    for with_authors, stmt in _ALL_BOOKS.items()
+}
+_FIRST_NEW_ARRIVALS = {
+    with_authors: stmt.limit(bindparam("limit"))
+    for with_authors, stmt in _NEW_ARRIVALS.items()
+}
+_SUMMARIES = list_view_select()
+LIST_VIEW_BY_IDS = _SUMMARIES.where(Book.id.in_(bindparam("book_ids", expanding=True)))
+_NEW_ARRIVAL_SUMMARIES_UNLIMITED = _SUMMARIES.where(
+    Book.published_date >= bindparam("cutoff")
+).order_by(desc(Book.published_date))
+_NEW_ARRIVAL_SUMMARIES = _NEW_ARRIVAL_SUMMARIES_UNLIMITED.limit(bindparam("limit"))
+
+
+def _bestseller_counts_select(with_archive: bool):
+    """(book_id, units_sold) of the orders placed in [:start, :end)."""
+    # First, collect the sold quantities of the month's orders.
+    sold = (
+        select(OrderItem.book_id, OrderItem.quantity)
+        .join(Order, Order.id == OrderItem.order_id)
+        .where(
+            # We want to take into account in-flight orders as well.
+            (Order.status == "Created") | (Order.status == "Completed"),
+            Order.order_date >= bindparam("start"),
+            Order.order_date < bindparam("end"),
+        )
+    )
+    if with_archive:
+        archived = (
+            select(OrderItemArchive.book_id, OrderItemArchive.quantity)
+            .join(
+                OrderArchive,
+                (OrderArchive.id == OrderItemArchive.order_id)
+                & (OrderArchive.order_date == OrderItemArchive.order_date),
+            )
+            .where(
+                # The same orders as above, wherever they are stored
+                (OrderArchive.status == "Created")
+                | (OrderArchive.status == "Completed"),
+                OrderItemArchive.order_date >= bindparam("start"),
+                OrderItemArchive.order_date < bindparam("end"),
+            )
+        )
+        sold = union_all(sold, archived)
+    sold = sold.subquery()
+
+    # Then aggregate them per book_id; aggregating on the book id avoids
+    # GROUP BY issues when selecting the full Book entity.
+    return (
+        select(sold.c.book_id, func.sum(sold.c.quantity).label("units_sold"))
+        .group_by(sold.c.book_id)
+        .order_by(desc(func.sum(sold.c.quantity)))
+        .limit(bindparam("limit"))
+    )
+
+
+# Keyed by whether the month reaches into the order archive
+_BESTSELLER_COUNTS = {
+    with_archive: _bestseller_counts_select(with_archive)
+    for with_archive in (True, False)
+}
+
+
+class AuthorRecord:
+    """An author as the lean read path returns it."""
+
+    __slots__ = ("id", "first_name", "last_name", "biography")
+
+    def __init__(self, id, first_name, last_name, biography):
+        self.id = id
+        self.first_name = first_name
+        self.last_name = last_name
+        self.biography = biography
+
+
+class BookRecord:
+    """
+    A book as the lean read path returns it: the attributes the book DTOs
+    read, including the rating aggregates, without an ORM instance (or a
+    session tracking it) behind them.
+    """
+
+    __slots__ = (
+        "id",
+        "title",
+        "author_id",
+        "isbn",
+        "price",
+        "published_date",
+        "description",
+        "stock_quantity",
+        "cover_image_url",
+        "rating_count",
+        "rating_sum",
+        "rating_1_count",
+        "rating_2_count",
+        "rating_3_count",
+        "rating_4_count",
+        "rating_5_count",
+        "author",
+    )
+
+    # Derived the same way as on the model
+    rating_average = Book.rating_average
+    rating_histogram = Book.rating_histogram
+
+    def __init__(self, *values, author: Optional[AuthorRecord]):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+        self.author = author
+
+
+# The lean read path: a single Core SELECT of the book and author columns,
+# joined, instead of hydrating Book and Author instances into the session
+# and loading the authors with a second query. The rows are turned into
+# records as they are.
+_book_table = Book.__table__
+_author_table = Author.__table__
+_BOOK_COLUMNS = [_book_table.c[name] for name in BookRecord.__slots__[:-1]]
+_AUTHOR_COLUMNS = [_author_table.c[name] for name in AuthorRecord.__slots__]
+_RECORDS = select(*_BOOK_COLUMNS, *_AUTHOR_COLUMNS).outerjoin(
+    _author_table, _author_table.c.id == _book_table.c.author_id
+)
+_FIRST_RECORDS = _RECORDS.order_by(_book_table.c.id).limit(bindparam("limit"))
+_RECORDS_BY_IDS = _RECORDS.where(
+    _book_table.c.id.in_(bindparam("book_ids", expanding=True))
+)
+_NEW_ARRIVAL_RECORDS = (
+    _RECORDS.where(_book_table.c.published_date >= bindparam("cutoff"))
+    .order_by(desc(_book_table.c.published_date))
+    .limit(bindparam("limit"))
+)
+
+
+def _to_records(rows) -> List[BookRecord]:
+    """Turn rows of the lean SELECT into book records."""
+    split = len(_BOOK_COLUMNS)
+    return [
+        BookRecord(
+            *row[:split],
+            # No author: the outer join filled the author columns with NULLs
+            author=AuthorRecord(*row[split:]) if row[split] is not None else None,
+        )
+        for row in rows
+    ]
+
+
+@traced_methods
 class BooksService:
-    """Encapsulate DB operations for books."""
+    """
+    Encapsulate DB operations for books.
+
+    The `*_records` methods are the lean read mode of their ORM
+    counterparts, for the callers that only serialize what they get back:
+    they return BookRecord objects built from a single joined SELECT.
+    """
 
     def __init__(self, session: AsyncSession):
         self._session = session
 
-    async def get_all(self) -> List[Book]:
-        """Return all books."""
-        stmt = select(Book).options(selectinload(Book.author))
-        result = await self._session.execute(stmt)
+    async def get_all(
+        self, limit: Optional[int] = None, with_authors: bool = True
+    ) -> List[Book]:
+        """
+        Return all books, or the first `limit` of them by id.
+        - with_authors=False leaves the authors unloaded, for callers that
+          load them once for several lists of books
+        """
+        if limit is None:
+            result = await self._session.execute(_ALL_BOOKS[with_authors])
+        else:
+            result = await self._session.execute(
+                _FIRST_BOOKS[with_authors], {"limit": limit}
+            )
         return result.scalars().all()
 
+    async def get_all_records(self, limit: Optional[int] = None) -> List[BookRecord]:
+        """Lean variant of `get_all`."""
+        if limit is None:
+            result = await self._session.execute(_RECORDS)
+        else:
+            result = await self._session.execute(_FIRST_RECORDS, {"limit": limit})
+        return _to_records(result)
+
+    async def get_all_summaries(self) -> List[Row]:
+        """Return all books as compact list-view rows."""
+        result = await self._session.execute(_SUMMARIES)
+        return result.all()
+
     async def get_by_id(self, book_id: int) -> Book | None:
         """Return a book by id or None if not found."""
-        stmt = select(Book).options(selectinload(Book.author)).where(Book.id == book_id)
-        result = await self._session.execute(stmt)
+        result = await self._session.execute(_BOOK_BY_ID, {"book_id": book_id})
         return result.scalar_one_or_none()
 
     # FOTIS: This is a mirror of books_service.get_books_for_author. We
@@ -34,25 +267,74 @@ class BooksService:
     # for now.
     async def get_by_author(self, author_id: int) -> List[Book]:
         """Return books for a specific author."""
-        stmt = (
-            select(Book)
-            .options(selectinload(Book.author))
-            .where(Book.author_id == author_id)
-        )
-        result = await self._session.execute(stmt)
+        result = await self._session.execute(_BOOKS_BY_AUTHOR, {"author_id": author_id})
         return result.scalars().all()
 
     async def get_monthly_bestsellers(
-        self, year: Optional[int] = None, month: Optional[int] = None, limit: int = 10
+        self,
+        year: Optional[int] = None,
+        month: Optional[int] = None,
+        limit: int = 10,
+        with_authors: bool = True,
     ) -> List[Tuple[Book, int]]:
         """
         Return top-selling books for a given calendar month.
 
         - If year or month is None, the current UTC year/month is used.
         - Only orders with status 'completed' are counted.
+        - with_authors=False leaves the authors of the books unloaded.
         - Returns a list of tuples: (Book, units_sold), ordered by units_sold desc.
         """
 
+        agg_rows = await self._get_bestseller_counts(year, month, limit)
+        if not agg_rows:
+            return []
+
+        # Preserve ordering from aggregation
+        book_ids = [row[0] for row in agg_rows]
+
+        # Fetch the Book objects for these ids (load authors too)
+        books_result = await self._session.execute(
+            _BOOKS_BY_IDS[with_authors], {"book_ids": book_ids}
+        )
+        books = books_result.scalars().all()
+
+        return self._pair_with_units(agg_rows, books)
+
+    async def get_monthly_bestseller_records(
+        self, year: Optional[int] = None, month: Optional[int] = None, limit: int = 10
+    ) -> List[Tuple[BookRecord, int]]:
+        """Lean variant of `get_monthly_bestsellers`."""
+        agg_rows = await self._get_bestseller_counts(year, month, limit)
+        if not agg_rows:
+            return []
+
+        book_ids = [row[0] for row in agg_rows]
+        result = await self._session.execute(_RECORDS_BY_IDS, {"book_ids": book_ids})
+        return self._pair_with_units(agg_rows, _to_records(result))
+
+    async def get_monthly_bestseller_summaries(
+        self, year: Optional[int] = None, month: Optional[int] = None, limit: int = 10
+    ) -> List[Tuple[Row, int]]:
+        """
+        List-view variant of `get_monthly_bestsellers`.
+
+        Returns a list of tuples: (list-view row, units_sold).
+        """
+        agg_rows = await self._get_bestseller_counts(year, month, limit)
+        if not agg_rows:
+            return []
+
+        book_ids = [row[0] for row in agg_rows]
+        rows_result = await self._session.execute(
+            LIST_VIEW_BY_IDS, {"book_ids": book_ids}
+        )
+        return self._pair_with_units(agg_rows, rows_result.all())
+
+    async def _get_bestseller_counts(
+        self, year: Optional[int], month: Optional[int], limit: int
+    ) -> List[Row]:
+        """Return (book_id, units_sold) rows for the month, best selling first."""
         # Default to current UTC month if not specified (use naive UTC times to match model datetimes)
         now = datetime.now(timezone.utc)
         if year is None:
@@ -67,42 +349,22 @@ class BooksService:
         else:
             end = datetime(year, month + 1, 1)
 
-        # First, aggregate sold quantities per book_id for completed orders within the month.
-        # Aggregate on OrderItem.book_id to avoid GROUP BY issues when selecting full Book entity.
-        agg_stmt = (
-            select(OrderItem.book_id, func.sum(OrderItem.quantity).label("units_sold"))
-            .join(Order, Order.id == OrderItem.order_id)
-            .where(
-                # We want to take into account in-flight orders as well.
-                (Order.status == "Created") | (Order.status == "Completed"),
-                Order.order_date >= start,
-                Order.order_date < end,
-            )
-            .group_by(OrderItem.book_id)
-            .order_by(desc(func.sum(OrderItem.quantity)))
-            .limit(limit)
+        # Only months reaching past the retention window have archived
+        # orders; recent months never touch the archive.
+        with_archive = start < archive_cutoff(now).replace(tzinfo=None)
+        agg_result = await self._session.execute(
+            _BESTSELLER_COUNTS[with_archive],
+            {"start": start, "end": end, "limit": limit},
         )
+        return agg_result.all()  # list of (book_id, units_sold)
 
-        agg_result = await self._session.execute(agg_stmt)
-        agg_rows = agg_result.all()  # list of (book_id, units_sold)
-        if not agg_rows:
-            return []
-
-        # Preserve ordering from aggregation
-        book_ids = [row[0] for row in agg_rows]
-
-        # Fetch the Book objects for these ids (load authors too)
-        books_stmt = (
-            select(Book).options(selectinload(Book.author)).where(Book.id.in_(book_ids))
-        )
-        books_result = await self._session.execute(books_stmt)
-        books = books_result.scalars().all()
-
+    @staticmethod
+    def _pair_with_units(agg_rows: List[Row], books) -> List[Tuple]:
+        """Reassemble the aggregation order as (book, units_sold) tuples."""
         # Map books by id for quick lookup
         books_by_id = {b.id: b for b in books}
 
-        # Reassemble ordered list of (Book, units_sold)
-        bestsellers: List[Tuple[Book, int]] = []
+        bestsellers = []
         for book_id, units in agg_rows:
             book_obj = books_by_id.get(book_id)
             if book_obj is None:
@@ -114,27 +376,53 @@ class BooksService:
         return bestsellers
 
     async def get_new_arrivals(
-        self, days: int = 30, limit: Optional[int] = 10
+        self, days: int = 30, limit: Optional[int] = 10, with_authors: bool = True
     ) -> List[Book]:
         """
         Return books published within the last `days` days (default 30).
-        Results are ordered by published_date descending and authors are loaded.
+        Results are ordered by published_date descending and authors are
+        loaded, unless with_authors=False.
         """
         cutoff = datetime.now(timezone.utc) - timedelta(days=days)
 
-        stmt = (
-            select(Book)
-            .options(selectinload(Book.author))
-            .where(Book.published_date >= cutoff)
-            .order_by(desc(Book.published_date))
-            .limit(limit)
+        if limit is None:
+            result = await self._session.execute(
+                _NEW_ARRIVALS[with_authors], {"cutoff": cutoff}
+            )
+        else:
+            result = await self._session.execute(
+                _FIRST_NEW_ARRIVALS[with_authors], {"cutoff": cutoff, "limit": limit}
+            )
+        return result.scalars().all()
+
+    async def get_new_arrival_records(
+        self, days: int = 30, limit: int = 10
+    ) -> List[BookRecord]:
+        """Lean variant of `get_new_arrivals`."""
+        cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+        result = await self._session.execute(
+            _NEW_ARRIVAL_RECORDS, {"cutoff": cutoff, "limit": limit}
         )
+        return _to_records(result)
 
-        result = await self._session.execute(stmt)
-        return result.scalars().all()
+    async def get_new_arrival_summaries(
+        self, days: int = 30, limit: Optional[int] = 10
+    ) -> List[Row]:
+        """List-view variant of `get_new_arrivals`."""
+        cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+
+        if limit is None:
+            result = await self._session.execute(
+                _NEW_ARRIVAL_SUMMARIES_UNLIMITED, {"cutoff": cutoff}
+            )
+        else:
+            result = await self._session.execute(
+                _NEW_ARRIVAL_SUMMARIES, {"cutoff": cutoff, "limit": limit}
+            )
+        return result.all()
 
 
-async def get_books_service(session: SessionDep) -> BooksService:
+async def get_books_service(session: ReadSessionDep) -> BooksService:
     """Dependency factory that returns a BooksService bound to the provided session."""
     return BooksService(session)
 
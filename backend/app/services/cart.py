@@ -0,0 +1,167 @@
+import json
+from decimal import Decimal
+from typing import Annotated, Optional
+
+from fastapi import Depends, HTTPException, status
+from redis.asyncio import Redis
+
+from app.api.schemas.cart import CartItemRead, CartRead
+from app.api.schemas.orders import OrderElement
+from app.config import cart_settings
+from app.core.tracing import traced_methods
+from app.database.models import Order
+from app.database.redis import redis_client
+from app.services.catalog_cache import CatalogCache, CatalogCacheDep
+from app.services.orders import OrdersService
+
+# Atomically add to (or set) the quantity of a cart item, refreshing its
+# catalog snapshot and refusing quantities above the stock in the snapshot.
+# Returns {1, quantity} on success and {0, quantity} when out of stock.
+_UPSERT_ITEM_SCRIPT = """
+local item = cjson.decode(ARGV[2])
+local quantity = tonumber(ARGV[3])
+if ARGV[4] == 'add' then
+    local current = redis.call('HGET', KEYS[1], ARGV[1])
+    if current then
+        quantity = quantity + cjson.decode(current)['quantity']
+    end
+end
+if quantity > item['stock_quantity'] then
+    return {0, quantity}
+end
+item['quantity'] = quantity
+redis.call('HSET', KEYS[1], ARGV[1], cjson.encode(item))
+redis.call('EXPIRE', KEYS[1], ARGV[5])
+return {1, quantity}
+"""
+
+# Remove the items of a checked-out cart (book_id/quantity pairs), unless
+# their quantity changed in the meantime: that change wasn't ordered.
+_REMOVE_ORDERED_SCRIPT = """
+for i = 1, #ARGV, 2 do
+    local current = redis.call('HGET', KEYS[1], ARGV[i])
+    if current and cjson.decode(current)['quantity'] == tonumber(ARGV[i + 1]) then
+        redis.call('HDEL', KEYS[1], ARGV[i])
+    end
+end
+"""
+
+
+def _key(user_id: int) -> str:
+    return f"cart:{user_id}"
+
+
+@traced_methods
+class CartService:
+    """
+    Shopping carts stored as Redis hashes (one field per book).
+
+    Every item carries the price/stock snapshot it was added with, so
+    reading a cart is a single HGETALL and never touches the database.
+    """
+
+    def __init__(
+        self, redis: Redis, catalog_cache: CatalogCache, ttl: Optional[int] = None
+    ):
+        self._redis = redis
+        self._catalog_cache = catalog_cache
+        self._ttl = ttl or cart_settings.CART_TTL_SECONDS
+        self._upsert_item = redis.register_script(_UPSERT_ITEM_SCRIPT)
+        self._remove_ordered = redis.register_script(_REMOVE_ORDERED_SCRIPT)
+
+    async def get(self, user_id: int) -> CartRead:
+        """Return the cart of the given user (empty if there is none)."""
+        raw_items = await self._redis.hgetall(_key(user_id))
+
+        items = [
+            CartItemRead(book_id=int(book_id), **json.loads(raw))
+            for book_id, raw in raw_items.items()
+        ]
+        items.sort(key=lambda item: item.book_id)
+        return CartRead(
+            items=items,
+            total_quantity=sum(item.quantity for item in items),
+            total_price=sum(
+                (item.price * item.quantity for item in items), Decimal("0.00")
+            ),
+        )
+
+    async def add_item(self, user_id: int, book_id: int, quantity: int) -> CartRead:
+        """Add `quantity` copies of a book to the cart."""
+        await self._upsert(user_id, book_id, quantity, "add")
+        return await self.get(user_id)
+
+    async def set_item(self, user_id: int, book_id: int, quantity: int) -> CartRead:
+        """Set the quantity of a book in the cart (0 removes it)."""
+        if quantity <= 0:
+            return await self.remove_item(user_id, book_id)
+        await self._upsert(user_id, book_id, quantity, "set")
+        return await self.get(user_id)
+
+    async def remove_item(self, user_id: int, book_id: int) -> CartRead:
+        """Remove a book from the cart."""
+        await self._redis.hdel(_key(user_id), str(book_id))
+        return await self.get(user_id)
+
+    async def clear(self, user_id: int):
+        """Empty the cart."""
+        await self._redis.delete(_key(user_id))
+
+    async def checkout(self, user_id: int, orders_service: OrdersService) -> Order:
+        """
+        Turn the cart into an order.
+
+        The whole cart is handed to `OrdersService.create` at once, which
+        validates and reserves the stock of all items in one transaction.
+        Only the items ordered are then removed: one added or changed while
+        the order was being created stays in the cart.
+        """
+        cart = await self.get(user_id)
+        if not cart.items:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Cart is empty."
+            )
+
+        order = await orders_service.create(
+            user_id,
+            [
+                OrderElement(book_id=item.book_id, quantity=item.quantity)
+                for item in cart.items
+            ],
+        )
+
+        ordered = []
+        for item in cart.items:
+            ordered += [item.book_id, item.quantity]
+        await self._remove_ordered(keys=[_key(user_id)], args=ordered)
+        # The cached stock of the books is dropped by the order.created
+        # event handler (see catalog_cache.invalidate_ordered_books)
+        return order
+
+    async def _upsert(self, user_id: int, book_id: int, quantity: int, mode: str):
+        snapshot = await self._catalog_cache.get_snapshot(book_id)
+        if snapshot is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Book with id {book_id} not found.",
+            )
+
+        item = snapshot.model_dump(mode="json", exclude={"id"})
+        ok, requested = await self._upsert_item(
+            keys=[_key(user_id)],
+            args=[book_id, json.dumps(item), quantity, mode, self._ttl],
+        )
+        if not ok:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Insufficient stock for book id {book_id}. Requested {requested}, available {snapshot.stock_quantity}.",
+            )
+
+
+async def get_cart_service(catalog_cache: CatalogCacheDep) -> CartService:
+    """Dependency factory for CartService."""
+    return CartService(redis_client, catalog_cache)
+
+
+# Typing helper for route parameter annotations:
+CartServiceDep = Annotated[CartService, Depends(get_cart_service)]
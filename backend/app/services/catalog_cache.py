@@ -0,0 +1,123 @@
+from typing import Annotated, Dict, Iterable, Optional
+
+from fastapi import Depends
+from redis.asyncio import Redis
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.schemas.cart import BookSnapshot
+from app.config import cart_settings
+from app.core.cache_stats import count_lookups
+from app.core.events import event_bus
+from app.core.tracing import traced_methods
+from app.database.models import Book, OutboxEvent
+from app.database.redis import redis_client
+from app.database.session import ReadSessionDep, read_only_session
+from app.services.books import BooksService
+from app.services.jobs import job_registry
+
+_KEY_PREFIX = "catalog:book:"
+
+
+def _key(book_id: int) -> str:
+    return f"{_KEY_PREFIX}{book_id}"
+
+
+@traced_methods
+class CatalogCache:
+    """
+    Read-through cache of book price/stock snapshots in Redis.
+
+    Each book is cached as a JSON string with a short TTL, so a batch of
+    snapshots is a single MGET; only the misses are loaded from the
+    database, with one query.
+    """
+
+    def __init__(self, redis: Redis, session: AsyncSession, ttl: Optional[int] = None):
+        self._redis = redis
+        self._session = session
+        self._ttl = ttl or cart_settings.CATALOG_CACHE_TTL_SECONDS
+
+    async def get_snapshot(self, book_id: int) -> BookSnapshot | None:
+        """Return the snapshot of a book, or None if the book doesn't exist."""
+        snapshots = await self.get_snapshots([book_id])
+        return snapshots.get(book_id)
+
+    async def get_snapshots(self, book_ids: Iterable[int]) -> Dict[int, BookSnapshot]:
+        """Return snapshots keyed by book id; unknown books are left out."""
+        book_ids = list(dict.fromkeys(book_ids))
+        if not book_ids:
+            return {}
+
+        cached = await self._redis.mget([_key(book_id) for book_id in book_ids])
+        snapshots = {
+            book_id: BookSnapshot.model_validate_json(raw)
+            for book_id, raw in zip(book_ids, cached)
+            if raw is not None
+        }
+
+        missing = [book_id for book_id in book_ids if book_id not in snapshots]
+        count_lookups("catalog_snapshots", hits=len(snapshots), misses=len(missing))
+        if missing:
+            loaded = await self._load(missing)
+            if loaded:
+                async with self._redis.pipeline(transaction=False) as pipe:
+                    for snapshot in loaded:
+                        pipe.set(
+                            _key(snapshot.id), snapshot.model_dump_json(), ex=self._ttl
+                        )
+                    await pipe.execute()
+            snapshots.update((snapshot.id, snapshot) for snapshot in loaded)
+
+        return snapshots
+
+    async def invalidate(self, book_ids: Iterable[int]):
+        """Drop cached snapshots, e.g. after the stock of the books changed."""
+        keys = [_key(book_id) for book_id in book_ids]
+        if keys:
+            await self._redis.delete(*keys)
+
+    async def _load(self, book_ids: list[int]) -> list[BookSnapshot]:
+        stmt = select(
+            Book.id, Book.title, Book.price, Book.stock_quantity, Book.cover_image_url
+        ).where(Book.id.in_(book_ids))
+        result = await self._session.execute(stmt)
+        return [BookSnapshot.model_validate(row._asdict()) for row in result.all()]
+
+
+@event_bus.subscribe("order.created", "order.cancelled")
+async def invalidate_ordered_books(event: OutboxEvent):
+    """The stock of the ordered books changed: drop their snapshots."""
+    keys = {_key(item["book_id"]) for item in event.payload["items"]}
+    if keys:
+        await redis_client.delete(*keys)
+
+
+@job_registry.job("catalog.warm_cache")
+async def warm_catalog_cache(limit: int = 50):
+    """
+    Load the snapshots of the books most likely to be put in a cart (this
+    month's bestsellers and the new arrivals) before shoppers ask for them.
+    """
+    async with read_only_session() as session:
+        books = BooksService(session)
+        bestsellers = await books.get_monthly_bestseller_summaries(limit=limit)
+        arrivals = await books.get_new_arrival_summaries(limit=limit)
+        book_ids = [row.id for row, _ in bestsellers] + [row.id for row in arrivals]
+        await CatalogCache(redis_client, session).get_snapshots(book_ids)
+
+
+job_registry.schedule("*/5 * * * *", "catalog.warm_cache")
+
+
+async def get_catalog_cache(session: ReadSessionDep) -> CatalogCache:
+    """
+    Dependency factory for CatalogCache.
+
+    The session only connects to the database on a cache miss.
+    """
+    return CatalogCache(redis_client, session)
+
+
+# Typing helper for route parameter annotations:
+CatalogCacheDep = Annotated[CatalogCache, Depends(get_catalog_cache)]
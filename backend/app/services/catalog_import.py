@@ -0,0 +1,360 @@
+import csv
+import json
+import time
+from typing import (
+    Annotated,
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Dict,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+)
+
+from fastapi import Depends, Query
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.schemas.catalog_import import (
+    CatalogImportError,
+    CatalogImportReport,
+    CatalogImportRow,
+)
+from app.config import catalog_import_settings
+from app.core.tracing import traced_methods
+from app.database.models import Author, Book
+from app.database.session import SessionDep
+
+ImportFormat = Literal["csv", "ndjson"]
+
+# A parsed input record, keyed by the line it started on. Records that could
+# not be parsed at all carry the parse error instead of the field dict.
+ImportRecord = Tuple[int, Dict[str, Any] | Exception]
+
+# Dialect-specific INSERT constructs supporting ON CONFLICT upserts.
+_UPSERT_INSERTS = {
+    "sqlite": sqlite_insert,
+    "postgresql": postgresql_insert,
+}
+
+# Keep transactions (and the per-batch parameter lists) reasonably sized
+_MAX_BATCH_SIZE = 10000
+
+_BOOK_UPSERT_COLUMNS = (
+    "title",
+    "author_id",
+    "price",
+    "published_date",
+    "description",
+    "stock_quantity",
+    "cover_image_url",
+)
+
+_row_adapter = TypeAdapter(CatalogImportRow)
+
+
+@traced_methods
+class CatalogImportService:
+    """
+    Bulk-load publisher feeds into the catalog.
+
+    Rows are validated one by one but written in batches: authors are
+    upserted on their name, then books on their ISBN, with one
+    `INSERT ... ON CONFLICT` statement per table and batch, and every batch
+    is committed in its own transaction. A batch the database rejects is
+    retried row by row, so one bad row costs its own import only.
+
+    The upserts are executed with the whole batch as parameter list: the
+    statement is compiled once and cached, and SQLAlchemy's
+    "insertmanyvalues" mode renders it as multi-row VALUES where the driver
+    benefits from it (Postgres, RETURNING on SQLite) instead of recompiling
+    a literal multi-row statement for every batch.
+    """
+
+    def __init__(
+        self,
+        session: AsyncSession,
+        batch_size: Optional[int] = None,
+        max_reported_errors: Optional[int] = None,
+    ):
+        self._session = session
+        self._batch_size = min(
+            batch_size or catalog_import_settings.IMPORT_BATCH_SIZE, _MAX_BATCH_SIZE
+        )
+        self._max_reported_errors = (
+            max_reported_errors
+            if max_reported_errors is not None
+            else catalog_import_settings.IMPORT_MAX_REPORTED_ERRORS
+        )
+
+    async def import_stream(
+        self,
+        chunks: AsyncIterable[bytes],
+        import_format: ImportFormat,
+        on_progress: Optional[Callable[[CatalogImportReport], None]] = None,
+    ) -> CatalogImportReport:
+        """Parse a raw CSV/NDJSON byte stream and import its rows."""
+        if import_format == "csv":
+            records = parse_csv(chunks)
+        else:
+            records = parse_ndjson(chunks)
+        return await self.import_records(records, on_progress)
+
+    async def import_records(
+        self,
+        records: AsyncIterable[ImportRecord],
+        on_progress: Optional[Callable[[CatalogImportReport], None]] = None,
+    ) -> CatalogImportReport:
+        """
+        Validate and upsert parsed records in batches.
+
+        `on_progress` is called with the running report after every batch.
+        Raises ValueError, before reading any record, if the database has
+        no upsert support.
+        """
+        self._dialect()
+        report = CatalogImportReport()
+        start = time.perf_counter()
+        batch: List[Tuple[int, CatalogImportRow]] = []
+
+        async for line, record in records:
+            report.rows_read += 1
+            if isinstance(record, Exception):
+                self._record_error(report, line, None, str(record))
+                continue
+
+            try:
+                row = _row_adapter.validate_python(record)
+            except ValidationError as exc:
+                self._record_error(report, line, record.get("isbn"), _describe(exc))
+                continue
+
+            batch.append((line, row))
+            if len(batch) >= self._batch_size:
+                await self._write_batch(batch, report)
+                batch = []
+                report.elapsed_seconds = time.perf_counter() - start
+                if on_progress:
+                    on_progress(report)
+
+        if batch:
+            await self._write_batch(batch, report)
+        report.elapsed_seconds = time.perf_counter() - start
+        if on_progress:
+            on_progress(report)
+
+        return report
+
+    async def _write_batch(
+        self, batch: List[Tuple[int, CatalogImportRow]], report: CatalogImportReport
+    ):
+        """Upsert one batch in its own transaction."""
+        # A multi-row upsert may not touch the same key twice: the last
+        # occurrence of an ISBN within the batch wins.
+        rows_by_isbn = {row.isbn: (line, row) for line, row in batch}
+        rows = [row for _, row in rows_by_isbn.values()]
+
+        try:
+            author_ids = await self._upsert_authors(rows)
+            await self._upsert_books(rows, author_ids)
+            await self._session.commit()
+        except DBAPIError as exc:
+            await self._session.rollback()
+            if len(rows_by_isbn) == 1:
+                line, row = next(iter(rows_by_isbn.values()))
+                self._record_error(report, line, row.isbn, str(exc.orig))
+                return
+            # Isolate the offending rows by retrying them one at a time
+            for item in rows_by_isbn.values():
+                await self._write_batch([item], report)
+            return
+
+        report.authors_upserted += len(author_ids)
+        report.books_upserted += len(rows)
+
+    async def _upsert_authors(
+        self, rows: List[CatalogImportRow]
+    ) -> Dict[Tuple[str, str], int]:
+        """Upsert the batch's authors and return their ids keyed by name."""
+        authors = {}
+        for row in rows:
+            key = (row.author_first_name, row.author_last_name)
+            # Keep a biography if any of the rows for this author has one
+            if key not in authors or row.author_biography:
+                authors[key] = {
+                    "first_name": row.author_first_name,
+                    "last_name": row.author_last_name,
+                    "biography": row.author_biography,
+                }
+
+        table = Author.__table__
+        stmt = self._insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["first_name", "last_name"],
+            # Never wipe an existing biography with an empty one
+            set_={
+                "biography": func.coalesce(stmt.excluded.biography, table.c.biography)
+            },
+        ).returning(table.c.id, table.c.first_name, table.c.last_name)
+
+        result = await self._session.execute(stmt, list(authors.values()))
+        return {(first, last): author_id for author_id, first, last in result.all()}
+
+    async def _upsert_books(
+        self, rows: List[CatalogImportRow], author_ids: Dict[Tuple[str, str], int]
+    ):
+        """Upsert the batch's books on their ISBN."""
+        values = [
+            {
+                "isbn": row.isbn,
+                "title": row.title,
+                "author_id": author_ids[(row.author_first_name, row.author_last_name)],
+                "price": row.price,
+                "published_date": row.published_date,
+                "description": row.description,
+                "stock_quantity": row.stock_quantity,
+                "cover_image_url": row.cover_image_url,
+            }
+            for row in rows
+        ]
+
+        stmt = self._insert(Book.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["isbn"],
+            set_={column: stmt.excluded[column] for column in _BOOK_UPSERT_COLUMNS},
+        )
+        await self._session.execute(stmt, values)
+
+    def _insert(self, table):
+        return _UPSERT_INSERTS[self._dialect()](table)
+
+    def _dialect(self) -> str:
+        dialect = self._session.bind.dialect.name
+        if dialect not in _UPSERT_INSERTS:
+            raise ValueError(f"Catalog imports are not supported on {dialect}.")
+        return dialect
+
+    def _record_error(
+        self,
+        report: CatalogImportReport,
+        line: int,
+        isbn: Optional[str],
+        message: str,
+    ):
+        report.rows_failed += 1
+        if len(report.errors) < self._max_reported_errors:
+            report.errors.append(
+                CatalogImportError(line=line, isbn=isbn, message=message)
+            )
+
+
+def _describe(exc: ValidationError) -> str:
+    """Condense a validation error into a single line."""
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}"
+        for err in exc.errors()
+    )
+
+
+async def _iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """Split a byte stream into text lines (newline included)."""
+    pending = b""
+    first = True
+    async for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            text = line.decode("utf-8", errors="replace") + "\n"
+            if first:
+                text = text.removeprefix("\ufeff")
+                first = False
+            yield text
+    if pending:
+        text = pending.decode("utf-8", errors="replace")
+        yield text.removeprefix("\ufeff") if first else text
+
+
+async def parse_ndjson(chunks: AsyncIterable[bytes]) -> AsyncIterator[ImportRecord]:
+    """Parse an NDJSON byte stream into records (blank lines are skipped)."""
+    line_no = 0
+    async for text in _iter_lines(chunks):
+        line_no += 1
+        if not text.strip():
+            continue
+        try:
+            record = json.loads(text)
+        except ValueError as exc:
+            yield line_no, ValueError(f"Invalid JSON: {exc}")
+            continue
+        if not isinstance(record, dict):
+            yield line_no, ValueError("Expected a JSON object.")
+            continue
+        yield line_no, record
+
+
+async def parse_csv(chunks: AsyncIterable[bytes]) -> AsyncIterator[ImportRecord]:
+    """
+    Parse a CSV byte stream with a header row into records.
+
+    Empty fields are treated as missing values.
+    """
+    header: Optional[List[str]] = None
+    line_no = 0
+    record_start = 0
+    pending = ""
+
+    async for text in _iter_lines(chunks):
+        line_no += 1
+        if not pending:
+            record_start = line_no
+        pending += text
+        # Quoted fields may span lines; RFC 4180 escapes quotes by doubling
+        # them, so an odd quote count means the record continues.
+        if pending.count('"') % 2:
+            continue
+
+        text, pending = pending, ""
+        if not text.strip():
+            continue
+        values = next(csv.reader((text,)))
+
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield (
+                record_start,
+                ValueError(f"Expected {len(header)} fields, got {len(values)}."),
+            )
+            continue
+        yield (
+            record_start,
+            {name: value for name, value in zip(header, values) if value != ""},
+        )
+
+    if pending.strip():
+        yield record_start, ValueError("Unterminated quoted field.")
+
+
+async def get_catalog_import_service(
+    session: SessionDep, batch_size: Annotated[Optional[int], Query(gt=0)] = None
+) -> CatalogImportService:
+    """
+    Dependency factory for CatalogImportService.
+
+    Exposes the batch size as an optional `batch_size` query parameter.
+    """
+    return CatalogImportService(session, batch_size=batch_size)
+
+
+# Typing helper for route parameter annotations:
+CatalogImportServiceDep = Annotated[
+    CatalogImportService, Depends(get_catalog_import_service)
+]
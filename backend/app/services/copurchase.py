@@ -0,0 +1,286 @@
+import logging
+from itertools import permutations
+from typing import Annotated, Iterable, List, Optional, Tuple
+
+from fastapi import Depends
+from sqlalchemy import Row, and_, bindparam, delete, desc, func, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import copurchase_settings
+from app.core.events import event_bus
+from app.core.tracing import traced_methods
+from app.database.models import (
+    Book,
+    CoPurchase,
+    Order,
+    OrderArchive,
+    OrderItem,
+    OrderItemArchive,
+    OutboxEvent,
+)
+from app.database.session import ReadSessionDep, async_session
+from app.services.books import list_view_select
+from app.services.jobs import job_registry
+from app.services.outbox import mark_handled
+
+logger = logging.getLogger(__name__)
+
+_copurchase_table = CoPurchase.__table__
+
+# Dialect-specific INSERT constructs supporting ON CONFLICT DO UPDATE.
+_UPSERT_INSERTS = {
+    "sqlite": sqlite_insert,
+    "postgresql": postgresql_insert,
+}
+
+# Orders that didn't end up being bought
+_UNSOLD_STATUSES = ("Cancelled", "Expired")
+
+# The related books of :book_id, prebuilt like the catalog queries
+_RELATED_BOOKS = (
+    list_view_select()
+    .add_columns(CoPurchase.count.label("bought_together"))
+    .join(CoPurchase, CoPurchase.related_book_id == Book.id)
+    .where(CoPurchase.book_id == bindparam("book_id"), CoPurchase.count > 0)
+    .order_by(desc(CoPurchase.count), desc(CoPurchase.related_book_id))
+    .limit(bindparam("limit"))
+)
+
+
+@traced_methods
+class CoPurchaseService:
+    """
+    "Customers who bought this also bought" index.
+
+    CoPurchase holds, for every ordered pair of books, the number of orders
+    containing both. It is kept up to date incrementally from the order
+    events (see `count_order_pairs`), can be rebuilt from the whole order
+    history with set-based INSERT ... SELECT passes, and is pruned to the
+    COPURCHASE_MAX_RELATED strongest pairs per book to bound its size.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self._session = session
+
+    async def get_related(self, book_id: int, limit: int = 10) -> List[Tuple[Row, int]]:
+        """
+        Return the books most often bought together with `book_id`, as
+        (list-view row, orders in common) tuples, strongest first. A single
+        range scan of the (book_id, count) index. Pruning keeps at most
+        COPURCHASE_MAX_RELATED of them.
+        """
+        result = await self._session.execute(
+            _RELATED_BOOKS,
+            {
+                "book_id": book_id,
+                "limit": min(limit, copurchase_settings.COPURCHASE_MAX_RELATED),
+            },
+        )
+        return [(row, row.bought_together) for row in result.all()]
+
+    async def add_orders(self, orders: Iterable[Iterable[int]], sign: int = 1):
+        """
+        Count (sign=1) or uncount (sign=-1) orders, each given as the ids of
+        its books, in the caller's transaction.
+        """
+        deltas = {}
+        for book_ids in orders:
+            book_ids = set(book_ids)
+            if len(book_ids) > copurchase_settings.COPURCHASE_MAX_ORDER_BOOKS:
+                continue
+            for pair in permutations(book_ids, 2):
+                deltas[pair] = deltas.get(pair, 0) + sign
+        if not deltas:
+            return
+
+        if sign > 0:
+            insert = self._insert()
+            stmt = insert.on_conflict_do_update(
+                index_elements=["book_id", "related_book_id"],
+                set_={"count": _copurchase_table.c.count + insert.excluded.count},
+            )
+            await self._session.execute(
+                stmt,
+                [
+                    {"book_id": a, "related_book_id": b, "count": count}
+                    for (a, b), count in deltas.items()
+                ],
+            )
+        else:
+            # Pairs that were pruned in the meantime stay pruned
+            await self._session.execute(
+                update(_copurchase_table)
+                .where(
+                    _copurchase_table.c.book_id == bindparam("b_book_id"),
+                    _copurchase_table.c.related_book_id
+                    == bindparam("b_related_book_id"),
+                )
+                .values(count=_copurchase_table.c.count + bindparam("b_count")),
+                [
+                    {"b_book_id": a, "b_related_book_id": b, "b_count": count}
+                    for (a, b), count in deltas.items()
+                ],
+            )
+
+    async def rebuild(self, batch_orders: Optional[int] = None) -> int:
+        """
+        Recount the index from the order history, live and archived, in one
+        transaction: readers keep seeing the previous index until it
+        commits. Each statement aggregates the pairs of a range of
+        `batch_orders` order ids in the database. Returns the number of
+        pairs kept.
+        """
+        batch_orders = (
+            batch_orders or copurchase_settings.COPURCHASE_REBUILD_BATCH_ORDERS
+        )
+        await self._session.execute(delete(_copurchase_table))
+
+        for items, orders in (
+            (OrderItem.__table__, Order.__table__),
+            (OrderItemArchive.__table__, OrderArchive.__table__),
+        ):
+            bounds = await self._session.execute(
+                select(func.min(items.c.order_id), func.max(items.c.order_id))
+            )
+            low, high = bounds.one()
+            if low is None:
+                continue
+            for start in range(low, high + 1, batch_orders):
+                await self._count_range(items, orders, start, start + batch_orders)
+
+        await self._session.execute(
+            delete(_copurchase_table).where(
+                _copurchase_table.c.count < copurchase_settings.COPURCHASE_MIN_COUNT
+            )
+        )
+        await self._prune()
+        kept = await self._session.execute(
+            select(func.count()).select_from(_copurchase_table)
+        )
+        await self._session.commit()
+        return kept.scalar_one()
+
+    async def prune(self) -> int:
+        """
+        Keep the COPURCHASE_MAX_RELATED strongest pairs of every book and
+        drop the rest. Returns the number of pairs dropped.
+        """
+        dropped = await self._prune()
+        await self._session.commit()
+        return dropped
+
+    async def _prune(self) -> int:
+        ranked = select(
+            _copurchase_table.c.book_id,
+            _copurchase_table.c.related_book_id,
+            func.row_number()
+            .over(
+                partition_by=_copurchase_table.c.book_id,
+                order_by=(
+                    desc(_copurchase_table.c.count),
+                    desc(_copurchase_table.c.related_book_id),
+                ),
+            )
+            .label("rank"),
+        ).subquery()
+        weak = select(ranked.c.book_id, ranked.c.related_book_id).where(
+            ranked.c.rank > copurchase_settings.COPURCHASE_MAX_RELATED
+        )
+        result = await self._session.execute(
+            delete(_copurchase_table).where(
+                (_copurchase_table.c.count <= 0)
+                | tuple_(
+                    _copurchase_table.c.book_id, _copurchase_table.c.related_book_id
+                ).in_(weak)
+            )
+        )
+        return result.rowcount
+
+    async def _count_range(self, items, orders, start: int, end: int):
+        a, b = items.alias("a"), items.alias("b")
+        joined = orders.c.id == items.c.order_id
+        if "order_date" in items.c:
+            # Archived items carry the partition key of their order
+            joined &= orders.c.order_date == items.c.order_date
+        # Orders of the range that were bought and aren't bulk orders
+        counted = (
+            select(items.c.order_id)
+            .join(orders, joined)
+            .where(
+                items.c.order_id >= start,
+                items.c.order_id < end,
+                orders.c.status.not_in(_UNSOLD_STATUSES),
+            )
+            .group_by(items.c.order_id)
+            .having(
+                func.count(items.c.book_id.distinct())
+                <= copurchase_settings.COPURCHASE_MAX_ORDER_BOOKS
+            )
+        )
+        pairs = (
+            select(
+                a.c.book_id,
+                b.c.book_id,
+                func.count(a.c.order_id.distinct()),
+            )
+            .join(
+                b,
+                and_(b.c.order_id == a.c.order_id, b.c.book_id != a.c.book_id),
+            )
+            .where(a.c.order_id >= start, a.c.order_id < end, a.c.order_id.in_(counted))
+            .group_by(a.c.book_id, b.c.book_id)
+        )
+        insert = self._insert().from_select(
+            ["book_id", "related_book_id", "count"], pairs
+        )
+        await self._session.execute(
+            insert.on_conflict_do_update(
+                index_elements=["book_id", "related_book_id"],
+                set_={"count": _copurchase_table.c.count + insert.excluded.count},
+            )
+        )
+
+    def _insert(self):
+        return _UPSERT_INSERTS[self._session.bind.dialect.name](_copurchase_table)
+
+
+@event_bus.subscribe("order.created", "order.cancelled")
+async def count_order_pairs(event: OutboxEvent):
+    """Count the book pairs of new orders; uncount those of cancelled ones."""
+    book_ids = [item["book_id"] for item in event.payload["items"]]
+    async with async_session() as session:
+        if not await mark_handled(session, "copurchase", event.id):
+            return
+        await CoPurchaseService(session).add_orders(
+            [book_ids], sign=1 if event.topic == "order.created" else -1
+        )
+        await session.commit()
+
+
+@job_registry.job("copurchase.prune")
+async def prune_copurchases():
+    async with async_session() as session:
+        dropped = await CoPurchaseService(session).prune()
+    logger.info("Pruned %d co-purchase pairs", dropped)
+
+
+@job_registry.job("copurchase.rebuild")
+async def rebuild_copurchases(batch_orders: Optional[int] = None):
+    async with async_session() as session:
+        kept = await CoPurchaseService(session).rebuild(batch_orders)
+    logger.info("Rebuilt the co-purchase index: %d pairs", kept)
+
+
+job_registry.schedule("23 * * * *", "copurchase.prune")
+job_registry.schedule("53 4 * * 0", "copurchase.rebuild")
+
+
+async def get_copurchase_service(session: ReadSessionDep) -> CoPurchaseService:
+    """Dependency factory for CoPurchaseService."""
+    return CoPurchaseService(session)
+
+
+# Typing helper for route parameters:
+CoPurchaseServiceDep = Annotated[CoPurchaseService, Depends(get_copurchase_service)]
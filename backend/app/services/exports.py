@@ -0,0 +1,162 @@
+from typing import Annotated, AsyncIterator, Optional, Sequence
+
+from fastapi import Depends
+from sqlalchemy import Row, func, select, union_all
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config import export_settings
+from app.core.tracing import traced_methods
+from app.database.models import (
+    Author,
+    Book,
+    Order,
+    OrderArchive,
+    OrderItem,
+    OrderItemArchive,
+)
+from app.database.session import engine, read_only_session_factory
+
+# Flat column sets for the exports. Core columns (rather than ORM entities)
+# keep the rows out of the session identity map, so memory stays constant
+# no matter how many rows are streamed.
+BOOK_EXPORT_COLUMNS = (
+    Book.id,
+    Book.title,
+    Book.isbn,
+    Book.price,
+    Book.published_date,
+    Book.description,
+    Book.stock_quantity,
+    Book.cover_image_url,
+    Book.author_id,
+    Author.first_name.label("author_first_name"),
+    Author.last_name.label("author_last_name"),
+)
+
+# One line per order item; orders without items still get a line.
+ORDER_EXPORT_COLUMNS = (
+    Order.id.label("order_id"),
+    Order.user_id,
+    Order.order_date,
+    Order.status,
+    Order.total_price,
+    OrderItem.book_id,
+    OrderItem.quantity,
+    OrderItem.price_at_purchase,
+)
+# The same columns for the orders moved to the archive
+_ARCHIVED_ORDER_EXPORT_COLUMNS = (
+    OrderArchive.id.label("order_id"),
+    OrderArchive.user_id,
+    OrderArchive.order_date,
+    OrderArchive.status,
+    OrderArchive.total_price,
+    OrderItemArchive.book_id,
+    OrderItemArchive.quantity,
+    OrderItemArchive.price_at_purchase,
+)
+
+# Field names of the exported records, in column order (CSV header)
+BOOK_EXPORT_FIELDS = [c.key for c in BOOK_EXPORT_COLUMNS]
+ORDER_EXPORT_FIELDS = [c.key for c in ORDER_EXPORT_COLUMNS]
+
+
+@traced_methods
+class ExportsService:
+    """
+    Stream the catalog and the order history for bulk exports.
+
+    Exports outlive the request handler (they are consumed by a
+    StreamingResponse), so the service opens its own session per stream
+    instead of using the request-scoped one.
+    """
+
+    def __init__(self, bind: AsyncEngine, chunk_size: Optional[int] = None):
+        self._session = read_only_session_factory(bind)
+        self._chunk_size = chunk_size or export_settings.EXPORT_CHUNK_SIZE
+
+    async def books_watermark(self, since: Optional[int] = None) -> int:
+        """Return the highest book id an export started now would include."""
+        return await self._watermark([Book.id], since)
+
+    async def orders_watermark(self, since: Optional[int] = None) -> int:
+        """Return the highest order id an export started now would include."""
+        return await self._watermark([Order.id, OrderArchive.id], since)
+
+    def stream_books(
+        self, until: int, since: Optional[int] = None
+    ) -> AsyncIterator[Sequence[Row]]:
+        """
+        Yield chunks of book rows with since < id <= until, in id order.
+        """
+        stmt = (
+            select(*BOOK_EXPORT_COLUMNS)
+            .outerjoin(Author, Author.id == Book.author_id)
+            .where(Book.id <= until)
+            .order_by(Book.id)
+        )
+        if since is not None:
+            stmt = stmt.where(Book.id > since)
+        return self._stream(stmt)
+
+    def stream_orders(
+        self, until: int, since: Optional[int] = None
+    ) -> AsyncIterator[Sequence[Row]]:
+        """
+        Yield chunks of order item rows for orders with since < id <= until,
+        in id order, the archived orders included.
+        """
+        live = (
+            select(*ORDER_EXPORT_COLUMNS, OrderItem.id.label("item_id"))
+            .outerjoin(OrderItem, OrderItem.order_id == Order.id)
+            .where(Order.id <= until)
+        )
+        archived = (
+            select(
+                *_ARCHIVED_ORDER_EXPORT_COLUMNS, OrderItemArchive.id.label("item_id")
+            )
+            .outerjoin(
+                OrderItemArchive,
+                (OrderItemArchive.order_id == OrderArchive.id)
+                & (OrderItemArchive.order_date == OrderArchive.order_date),
+            )
+            .where(OrderArchive.id <= until)
+        )
+        if since is not None:
+            live = live.where(Order.id > since)
+            archived = archived.where(OrderArchive.id > since)
+        rows = union_all(live, archived).subquery()
+        stmt = select(*(rows.c[field] for field in ORDER_EXPORT_FIELDS)).order_by(
+            rows.c.order_id, rows.c.item_id
+        )
+        return self._stream(stmt)
+
+    async def _watermark(self, columns: Sequence, since: Optional[int]) -> int:
+        # One max() per table, each answered from its primary key index
+        maxima = select(
+            *(select(func.max(column)).scalar_subquery() for column in columns)
+        )
+        async with self._session() as session:
+            row = (await session.execute(maxima)).one()
+        watermark = max((value for value in row if value is not None), default=None)
+        # Nothing new since the previous export: keep the caller's watermark
+        if watermark is None or (since is not None and watermark < since):
+            return since or 0
+        return watermark
+
+    async def _stream(self, stmt) -> AsyncIterator[Sequence[Row]]:
+        async with self._session() as session:
+            result = await session.stream(
+                stmt.execution_options(yield_per=self._chunk_size)
+            )
+            async for partition in result.partitions():
+                yield partition
+
+
+async def get_exports_service() -> ExportsService:
+    """Dependency factory for ExportsService, bound to the application engine."""
+    return ExportsService(engine)
+
+
+# Typing helper for route parameter annotations:
+ExportsServiceDep = Annotated[ExportsService, Depends(get_exports_service)]
@@ -0,0 +1,140 @@
+import asyncio
+import time
+from typing import Annotated, Awaitable, Callable, Optional
+
+from fastapi import Depends, Request
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.api.schemas.health import HealthCheck, HealthStats, Readiness, RedisStats
+from app.config import health_settings
+from app.core.cache_stats import cache_stats
+from app.database.pool import pool_monitor
+from app.database.redis import redis_client
+from app.database.session import engine
+
+
+# A database round trip. On SQLite, `SELECT 1` never opens the database
+# file, so the probe reads the schema version from its header instead,
+# which fails (or times out) while another connection holds it locked.
+_PING = {"sqlite": text("PRAGMA schema_version")}
+_SELECT_ONE = text("SELECT 1")
+
+
+class HealthService:
+    """
+    Readiness checks and runtime stats of a worker.
+
+    Readiness probes the database and Redis with a trivial round trip each,
+    and times one turn of the event loop: a worker that is saturated, or
+    whose dependencies are slow, reports itself unavailable so that load
+    balancers stop routing to it. The outcome is cached for
+    HEALTH_CHECK_CACHE_SECONDS.
+    """
+
+    def __init__(self, engine: AsyncEngine, redis: Redis):
+        self._engine = engine
+        self._redis = redis
+        self._readiness: Optional[Readiness] = None
+        self._checked_at = 0.0
+
+    async def readiness(self) -> Readiness:
+        now = time.monotonic()
+        if (
+            self._readiness is None
+            or now - self._checked_at >= health_settings.HEALTH_CHECK_CACHE_SECONDS
+        ):
+            checks = {
+                "database": await self._check(self._ping_database),
+                "redis": await self._check(self._redis.ping),
+                "event_loop": await self._check_loop_lag(),
+            }
+            ok = all(check.ok for check in checks.values())
+            self._readiness = Readiness(
+                status="ready" if ok else "unavailable", checks=checks
+            )
+            self._checked_at = time.monotonic()
+        return self._readiness
+
+    async def stats(self, request: Request) -> HealthStats:
+        """Stats of the pool, caches, admission queues and background work."""
+        state = request.app.state
+        admission = getattr(state, "admission", None)
+        job_runner = getattr(state, "job_runner", None)
+        dispatcher = getattr(state, "outbox_dispatcher", None)
+        return HealthStats(
+            readiness=await self.readiness(),
+            pool=pool_monitor.stats(self._engine),
+            caches=cache_stats(),
+            redis=await self._redis_stats(),
+            admission=admission.stats if admission else {},
+            jobs=job_runner.stats if job_runner else None,
+            outbox=dispatcher.stats if dispatcher else None,
+            outbox_pending=await dispatcher.pending() if dispatcher else None,
+        )
+
+    async def _ping_database(self):
+        async with self._engine.connect() as conn:
+            await conn.execute(_PING.get(conn.dialect.name, _SELECT_ONE))
+
+    async def _check(self, probe: Callable[[], Awaitable]) -> HealthCheck:
+        started = time.perf_counter()
+        task = asyncio.ensure_future(probe())
+        # Not wait_for: cancelling a probe stuck in a driver call (e.g. on
+        # a locked SQLite file) only completes once the call returns, and
+        # the probe must answer within its timeout regardless
+        done, _ = await asyncio.wait(
+            {task}, timeout=health_settings.HEALTH_CHECK_TIMEOUT_SECONDS
+        )
+        if not done:
+            task.cancel()
+            error = "Timed out."
+        elif task.exception():
+            exc = task.exception()
+            error = str(exc) or type(exc).__name__
+        else:
+            error = None
+        return HealthCheck(
+            ok=error is None,
+            latency_ms=(time.perf_counter() - started) * 1000,
+            error=error,
+        )
+
+    async def _check_loop_lag(self) -> HealthCheck:
+        # How long the ready callbacks ahead of us keep us waiting
+        started = time.perf_counter()
+        await asyncio.sleep(0)
+        lag = time.perf_counter() - started
+        ok = lag <= health_settings.HEALTH_MAX_LOOP_LAG_SECONDS
+        return HealthCheck(
+            ok=ok,
+            latency_ms=lag * 1000,
+            error=None if ok else "The event loop is lagging.",
+        )
+
+    async def _redis_stats(self) -> Optional[RedisStats]:
+        try:
+            keys = await self._redis.dbsize()
+        except RedisError:
+            return None
+        try:
+            memory = (await self._redis.info("memory")).get("used_memory")
+        except RedisError:
+            # INFO may be disabled (e.g. on managed instances)
+            memory = None
+        return RedisStats(keys=keys, used_memory_bytes=memory)
+
+
+# One per worker, so the readiness cache is shared by the probes
+_health_service = HealthService(engine, redis_client)
+
+
+async def get_health_service() -> HealthService:
+    """Dependency factory for HealthService."""
+    return _health_service
+
+
+# Typing helper for route parameter annotations:
+HealthServiceDep = Annotated[HealthService, Depends(get_health_service)]
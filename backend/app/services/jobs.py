@@ -0,0 +1,404 @@
+import asyncio
+import logging
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import and_, delete, exists, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.api.schemas.jobs import JobStats
+from app.config import job_settings
+from app.core.cron import CronSchedule
+from app.database.models import Job
+from app.database.session import (
+    async_session,
+    read_only_session_factory,
+    session_factory,
+)
+
+logger = logging.getLogger(__name__)
+
+JobFunc = Callable[..., Awaitable[Any]]
+
+_job_table = Job.__table__
+
+# Dialect-specific INSERT constructs supporting ON CONFLICT DO NOTHING.
+_DEDUPE_INSERTS = {
+    "sqlite": sqlite_insert,
+    "postgresql": postgresql_insert,
+}
+
+
+class JobType(NamedTuple):
+    name: str
+    func: JobFunc
+    max_attempts: int
+
+
+class Schedule(NamedTuple):
+    cron: CronSchedule
+    name: str
+    payload: Dict[str, Any]
+
+
+class JobRegistry:
+    """The job types a runner knows about, and their periodic schedules."""
+
+    def __init__(self):
+        self._types: Dict[str, JobType] = {}
+        self.schedules: List[Schedule] = []
+
+    def job(
+        self, name: str, max_attempts: Optional[int] = None
+    ) -> Callable[[JobFunc], JobFunc]:
+        """
+        Decorator registering an async function as a job type; it is called
+        with the job payload as keyword arguments.
+        """
+
+        def register(func: JobFunc) -> JobFunc:
+            self._types[name] = JobType(
+                name, func, max_attempts or job_settings.JOB_MAX_ATTEMPTS
+            )
+            return func
+
+        return register
+
+    def schedule(self, cron: str, name: str, **payload: Any):
+        """Enqueue the job `name` at every minute matching `cron`."""
+        self.schedules.append(Schedule(CronSchedule(cron), name, payload))
+
+    def get(self, name: str) -> JobType | None:
+        return self._types.get(name)
+
+
+# Shared registry the application's jobs are registered on:
+job_registry = JobRegistry()
+
+
+def enqueue(
+    session: AsyncSession,
+    name: str,
+    payload: Optional[Dict[str, Any]] = None,
+    run_at: Optional[datetime] = None,
+    registry: JobRegistry = job_registry,
+) -> Job:
+    """
+    Add a job to the queue as part of the caller's transaction, so it only
+    runs if the surrounding change commits.
+    """
+    job_type = registry.get(name)
+    now = _utcnow()
+    job = Job(
+        name=name,
+        payload=payload or {},
+        run_at=run_at or now,
+        max_attempts=_max_attempts(job_type),
+        created_at=now,
+    )
+    session.add(job)
+    return job
+
+
+class JobRunner:
+    """
+    Execute queued jobs with a pool of async workers, and enqueue the
+    registry's periodic schedules.
+
+    Workers claim due jobs one at a time with a conditional UPDATE (plus
+    SKIP LOCKED on Postgres), so any number of runners, in API workers or
+    dedicated `python -m app.cli worker` processes, can share the queue.
+    The UPDATE is only issued once a plain read found a due job, and idle
+    workers poll less and less often, so an empty queue doesn't keep
+    taking the write lock.
+    A claimed job is leased to its worker for JOB_LEASE_SECONDS; if the
+    worker dies, the job becomes claimable again once the lease expires.
+    Failed jobs are retried with exponential backoff and jitter until
+    their max_attempts, then left in the queue as "failed".
+
+    `stop()` drains gracefully: workers stop claiming jobs and the running
+    ones get JOB_DRAIN_TIMEOUT_SECONDS to finish.
+    """
+
+    def __init__(
+        self,
+        bind: AsyncEngine,
+        registry: JobRegistry = job_registry,
+        concurrency: Optional[int] = None,
+        poll_interval: Optional[float] = None,
+    ):
+        self._session = session_factory(bind)
+        self._read_session = read_only_session_factory(bind)
+        self._registry = registry
+        self._concurrency = concurrency or job_settings.JOB_CONCURRENCY
+        self._poll_interval = (
+            poll_interval
+            if poll_interval is not None
+            else job_settings.JOB_POLL_INTERVAL_SECONDS
+        )
+        self._stopping = asyncio.Event()
+        # Set when this runner enqueued due work, or stops
+        self._wakeup = asyncio.Event()
+        self._workers: List[asyncio.Task] = []
+        self._scheduler: Optional[asyncio.Task] = None
+        self.stats = JobStats()
+
+    def start(self):
+        self._stopping.clear()
+        self._workers = [
+            asyncio.create_task(self._work(), name=f"job-worker-{n}")
+            for n in range(self._concurrency)
+        ]
+        if self._registry.schedules:
+            self._scheduler = asyncio.create_task(
+                self._schedule(), name="job-scheduler"
+            )
+
+    async def stop(self, timeout: Optional[float] = None):
+        """Stop claiming jobs and wait for the running ones to finish."""
+        self._stopping.set()
+        self._wakeup.set()
+        if self._scheduler:
+            self._scheduler.cancel()
+        tasks = [*self._workers, *filter(None, [self._scheduler])]
+        if not tasks:
+            return
+
+        if timeout is None:
+            timeout = job_settings.JOB_DRAIN_TIMEOUT_SECONDS
+        if self._workers:
+            _, pending = await asyncio.wait(self._workers, timeout=timeout)
+            if pending:
+                # Their jobs are picked up again once the lease expires
+                logger.warning("Abandoning %d running jobs on shutdown", len(pending))
+                for task in pending:
+                    task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers, self._scheduler = [], None
+
+    async def run_pending(self) -> int:
+        """Run due jobs in the current task until none is left."""
+        ran = 0
+        while job := await self._claim():
+            await self._execute(job)
+            ran += 1
+        return ran
+
+    async def enqueue_due(self, now: datetime, since: datetime) -> int:
+        """
+        Enqueue the runs of every schedule that fell due in (since, now].
+        Returns the number of runs enqueued by this call.
+        """
+        values = []
+        for schedule in self._registry.schedules:
+            slot = schedule.cron.next_after(since)
+            while slot <= now:
+                job_type = self._registry.get(schedule.name)
+                values.append(
+                    {
+                        "name": schedule.name,
+                        "payload": schedule.payload,
+                        "status": "queued",
+                        "run_at": slot,
+                        "attempts": 0,
+                        "max_attempts": _max_attempts(job_type),
+                        "dedupe_key": f"{schedule.name}@{slot:%Y-%m-%dT%H:%M}",
+                        "created_at": now,
+                    }
+                )
+                slot = schedule.cron.next_after(slot)
+        if not values:
+            return 0
+
+        async with self._session() as session:
+            insert = _DEDUPE_INSERTS[session.bind.dialect.name](_job_table)
+            stmt = insert.on_conflict_do_nothing(
+                index_elements=["dedupe_key"]
+            ).returning(_job_table.c.id)
+            result = await session.execute(stmt, values)
+            enqueued = len(result.all())
+            await session.commit()
+        if enqueued:
+            self._wakeup.set()
+        return enqueued
+
+    async def _work(self):
+        idle_wait = self._poll_interval
+        while not self._stopping.is_set():
+            try:
+                job = await self._claim()
+            except Exception:
+                logger.exception("Claiming a job failed")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=idle_wait)
+                except asyncio.TimeoutError:
+                    idle_wait = min(
+                        idle_wait * 2,
+                        max(
+                            self._poll_interval, job_settings.JOB_IDLE_POLL_MAX_SECONDS
+                        ),
+                    )
+                else:
+                    idle_wait = self._poll_interval
+                    if not self._stopping.is_set():
+                        self._wakeup.clear()
+                continue
+            idle_wait = self._poll_interval
+            await self._execute(job)
+
+    async def _schedule(self):
+        # Schedules are only caught up from when this runner started
+        since = _utcnow().replace(second=0, microsecond=0)
+        while True:
+            now = _utcnow()
+            try:
+                await self.enqueue_due(now, since)
+                since = now
+            except Exception:
+                logger.exception("Enqueueing scheduled jobs failed")
+            next_minute = now.replace(second=0, microsecond=0) + timedelta(minutes=1)
+            await asyncio.sleep((next_minute - now).total_seconds())
+
+    async def _claim(self):
+        now = _utcnow()
+        is_due = or_(
+            and_(_job_table.c.status == "queued", _job_table.c.run_at <= now),
+            # Leases of workers that died
+            and_(
+                _job_table.c.status == "running",
+                _job_table.c.locked_until < now,
+            ),
+        )
+        # Look before taking the write lock: the queue is mostly empty
+        async with self._read_session() as session:
+            if not await session.scalar(select(exists().where(is_due))):
+                return None
+
+        due = (
+            select(_job_table.c.id)
+            .where(is_due)
+            .order_by(_job_table.c.run_at)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        stmt = (
+            update(_job_table)
+            .where(_job_table.c.id == due)
+            .values(
+                status="running",
+                attempts=_job_table.c.attempts + 1,
+                locked_until=now + timedelta(seconds=job_settings.JOB_LEASE_SECONDS),
+            )
+            .returning(
+                _job_table.c.id,
+                _job_table.c.name,
+                _job_table.c.payload,
+                _job_table.c.attempts,
+                _job_table.c.max_attempts,
+                _job_table.c.run_at,
+            )
+        )
+        async with self._session() as session:
+            result = await session.execute(stmt)
+            job = result.first()
+            await session.commit()
+
+        if job is not None:
+            lag = max((now - _as_utc(job.run_at)).total_seconds(), 0.0)
+            self.stats.last_lag_seconds = lag
+            self.stats.max_lag_seconds = max(self.stats.max_lag_seconds, lag)
+        return job
+
+    async def _execute(self, job):
+        job_type = self._registry.get(job.name)
+        if job_type is None:
+            # Retrying won't make it known
+            logger.error("Job %s (%d) has an unknown type", job.name, job.id)
+            await self._finish(job.id, status="failed", last_error="Unknown job type")
+            self.stats.failed += 1
+            return
+
+        self.stats.running += 1
+        try:
+            await job_type.func(**job.payload)
+        except Exception as exc:
+            await self._failed(job, exc)
+        else:
+            await self._finish(job.id, status="done")
+            self.stats.succeeded += 1
+        finally:
+            self.stats.running -= 1
+
+    async def _failed(self, job, exc: Exception):
+        error = repr(exc)[:500]
+        if job.attempts >= job.max_attempts:
+            logger.error("Job %s (%d) failed for good: %s", job.name, job.id, error)
+            await self._finish(job.id, status="failed", last_error=error)
+            self.stats.failed += 1
+            return
+
+        delay = min(
+            job_settings.JOB_RETRY_BASE_SECONDS * 2 ** (job.attempts - 1),
+            job_settings.JOB_RETRY_MAX_SECONDS,
+        ) * random.uniform(0.5, 1.0)
+        logger.warning(
+            "Job %s (%d) failed, retrying in %.1fs: %s", job.name, job.id, delay, error
+        )
+        async with self._session() as session:
+            await session.execute(
+                update(_job_table)
+                .where(_job_table.c.id == job.id)
+                .values(
+                    status="queued",
+                    run_at=_utcnow() + timedelta(seconds=delay),
+                    locked_until=None,
+                    last_error=error,
+                )
+            )
+            await session.commit()
+        self.stats.retried += 1
+
+    async def _finish(self, job_id: int, **values: Any):
+        async with self._session() as session:
+            await session.execute(
+                update(_job_table)
+                .where(_job_table.c.id == job_id)
+                .values(locked_until=None, finished_at=_utcnow(), **values)
+            )
+            await session.commit()
+
+
+def _max_attempts(job_type: JobType | None) -> int:
+    return job_type.max_attempts if job_type else job_settings.JOB_MAX_ATTEMPTS
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+@job_registry.job("jobs.purge_finished")
+async def purge_finished_jobs(days: Optional[int] = None):
+    """Delete jobs that finished (or failed for good) more than `days` ago."""
+    cutoff = _utcnow() - timedelta(days=days or job_settings.JOB_RETENTION_DAYS)
+    async with async_session() as session:
+        result = await session.execute(
+            delete(Job).where(
+                Job.status.in_(("done", "failed")), Job.finished_at < cutoff
+            )
+        )
+        await session.commit()
+    logger.info("Purged %d finished jobs", result.rowcount)
+
+
+job_registry.schedule("17 3 * * *", "jobs.purge_finished")
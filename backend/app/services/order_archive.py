@@ -0,0 +1,215 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Optional
+
+from sqlalchemy import delete, exists, insert, literal, or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import order_archive_settings
+from app.core.tracing import traced_methods
+from app.database.models import (
+    Order,
+    OrderArchive,
+    OrderItem,
+    OrderItemArchive,
+    StockReservation,
+)
+from app.database.session import async_session
+from app.services.jobs import job_registry
+
+logger = logging.getLogger(__name__)
+
+_ARCHIVE_TABLES = (OrderArchive.__tablename__, OrderItemArchive.__tablename__)
+
+
+def archive_cutoff(now: Optional[datetime] = None) -> datetime:
+    """
+    Orders placed before this moment belong in the archive; newer ones are
+    in the `order` table.
+    """
+    now = now or datetime.now(timezone.utc)
+    return now - timedelta(days=order_archive_settings.ORDER_RETENTION_DAYS)
+
+
+def _month_start(moment: datetime) -> datetime:
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0, tzinfo=None)
+
+
+def _next_month(month: datetime) -> datetime:
+    return (month + timedelta(days=32)).replace(day=1)
+
+
+@traced_methods
+class OrderArchiveService:
+    """
+    Move old orders out of the hot `order`/`orderitem` tables into the
+    `orderarchive`/`orderitemarchive` tables, and read them back.
+
+    Every order past the retention window is archived, whatever its status:
+    without stock holds nothing completes an order, so most stay Created
+    for good. Only a Created order still holding stock is kept back, until
+    the reservation sweeper releases its holds.
+
+    On Postgres the archive tables are partitioned by month of the order
+    date; the partitions are created as orders of a new month arrive. On
+    SQLite they are plain tables.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self._session = session
+
+    async def archive_batch(
+        self, cutoff: Optional[datetime] = None, batch_size: Optional[int] = None
+    ) -> int:
+        """
+        Archive up to `batch_size` orders placed before `cutoff`, oldest
+        first, in one transaction. Returns the number of orders archived.
+        """
+        cutoff = cutoff or archive_cutoff()
+        batch_size = batch_size or order_archive_settings.ORDER_ARCHIVE_BATCH_SIZE
+
+        result = await self._session.execute(
+            select(Order.id, Order.order_date)
+            .where(
+                Order.order_date < cutoff,
+                or_(
+                    Order.status != "Created",
+                    ~exists().where(StockReservation.order_id == Order.id),
+                ),
+            )
+            .order_by(Order.order_date)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        candidates = result.all()
+        if not candidates:
+            return 0
+        order_ids = [order_id for order_id, _ in candidates]
+
+        if self._session.bind.dialect.name == "postgresql":
+            await self._create_partitions(order_date for _, order_date in candidates)
+
+        archived_at = datetime.now(timezone.utc)
+        await self._session.execute(
+            insert(OrderArchive).from_select(
+                ["id", "order_date", "user_id", "total_price", "status", "archived_at"],
+                select(
+                    Order.id,
+                    Order.order_date,
+                    Order.user_id,
+                    Order.total_price,
+                    Order.status,
+                    literal(archived_at, OrderArchive.archived_at.type),
+                ).where(Order.id.in_(order_ids)),
+            )
+        )
+        await self._session.execute(
+            insert(OrderItemArchive).from_select(
+                [
+                    "id",
+                    "order_date",
+                    "order_id",
+                    "book_id",
+                    "quantity",
+                    "price_at_purchase",
+                ],
+                select(
+                    OrderItem.id,
+                    Order.order_date,
+                    OrderItem.order_id,
+                    OrderItem.book_id,
+                    OrderItem.quantity,
+                    OrderItem.price_at_purchase,
+                )
+                .join(Order, Order.id == OrderItem.order_id)
+                .where(OrderItem.order_id.in_(order_ids)),
+            )
+        )
+        # These orders have no live holds, but a stray one (e.g. left on a
+        # completed order by a crashed request) would block the delete
+        for stmt in (
+            delete(StockReservation).where(StockReservation.order_id.in_(order_ids)),
+            delete(OrderItem).where(OrderItem.order_id.in_(order_ids)),
+            delete(Order).where(Order.id.in_(order_ids)),
+        ):
+            await self._session.execute(stmt)
+        await self._session.commit()
+        return len(order_ids)
+
+    async def get_order(self, order_id: int) -> Order | None:
+        """Return an archived order, as a detached Order, or None."""
+        result = await self._session.execute(
+            select(OrderArchive).where(OrderArchive.id == order_id)
+        )
+        archived = result.scalar_one_or_none()
+        return _as_order(archived) if archived else None
+
+    async def get_items(self, order_id: int) -> List[OrderItem]:
+        """Return the items of an archived order, as detached OrderItems."""
+        result = await self._session.execute(
+            select(OrderItemArchive)
+            .where(OrderItemArchive.order_id == order_id)
+            .order_by(OrderItemArchive.id)
+        )
+        return [
+            OrderItem(
+                id=item.id,
+                order_id=item.order_id,
+                book_id=item.book_id,
+                quantity=item.quantity,
+                price_at_purchase=item.price_at_purchase,
+            )
+            for item in result.scalars().all()
+        ]
+
+    async def get_orders_for_user(self, user_id: int) -> List[Order]:
+        """Return the archived orders of a user, oldest first."""
+        result = await self._session.execute(
+            select(OrderArchive)
+            .where(OrderArchive.user_id == user_id)
+            .order_by(OrderArchive.order_date)
+        )
+        return [_as_order(archived) for archived in result.scalars().all()]
+
+    async def _create_partitions(self, order_dates: Iterable[datetime]):
+        for month in sorted({_month_start(order_date) for order_date in order_dates}):
+            bounds = f"FROM ('{month:%Y-%m-%d}') TO ('{_next_month(month):%Y-%m-%d}')"
+            for table in _ARCHIVE_TABLES:
+                await self._session.execute(
+                    text(
+                        f"CREATE TABLE IF NOT EXISTS {table}_p{month:%Y%m} "
+                        f"PARTITION OF {table} FOR VALUES {bounds}"
+                    )
+                )
+
+
+def _as_order(archived: OrderArchive) -> Order:
+    return Order(
+        id=archived.id,
+        user_id=archived.user_id,
+        order_date=archived.order_date,
+        total_price=archived.total_price,
+        status=archived.status,
+    )
+
+
+@job_registry.job("orders.archive")
+async def archive_orders(
+    retention_days: Optional[int] = None, batch_size: Optional[int] = None
+):
+    """Archive every order older than the retention window, in batches."""
+    now = datetime.now(timezone.utc)
+    cutoff = (
+        now - timedelta(days=retention_days)
+        if retention_days is not None
+        else archive_cutoff(now)
+    )
+    archived = 0
+    async with async_session() as session:
+        archive = OrderArchiveService(session)
+        while batch := await archive.archive_batch(cutoff, batch_size):
+            archived += batch
+    logger.info("Archived %d orders placed before %s", archived, cutoff)
+
+
+job_registry.schedule("41 2 * * *", "orders.archive")
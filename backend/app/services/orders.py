@@ -1,14 +1,29 @@
-from typing import List, Annotated
+from typing import Annotated, Any, Dict, List, Optional, Set, Tuple
 
 from fastapi import Depends, HTTPException, status
+from sqlalchemy import insert, update
 from sqlmodel import select
 from datetime import datetime, timezone
 from decimal import Decimal
 
+from app.api.schemas.orders import BatchOrder, BatchOrderResult, OrderBatchResult
+from app.config import order_batch_settings, reservation_settings
+from app.core.tracing import traced_methods
 from app.database.models import Order, OrderItem, Book, User
 from app.database.session import SessionDep
+from app.services.order_archive import OrderArchiveService
+from app.services.outbox import order_payload, record_event, record_events
+from app.services.reservations import ReservationsService
+from app.services.stock import StockService, sum_quantities
 
+_order_table = Order.__table__
+_order_item_table = OrderItem.__table__
 
+# Times a batch chunk is planned again when its stock was sold concurrently
+_BATCH_STOCK_ATTEMPTS = 3
+
+
+@traced_methods
 class OrdersService:
     """Encapsulate DB operations and other logic for orders."""
 
@@ -19,8 +34,17 @@ class OrdersService:
         result = await self._session.execute(select(Order))
         return result.scalars().all()
 
-    async def get_by_id(self, order_id: int) -> Order | None:
-        return await self._session.get(Order, order_id)
+    async def get_by_id(
+        self, order_id: int, include_archived: bool = False
+    ) -> Order | None:
+        """
+        Return an order by id. Archived orders are only looked up with
+        include_archived, and come back detached (they can't be changed).
+        """
+        order = await self._session.get(Order, order_id)
+        if order is None and include_archived:
+            order = await OrderArchiveService(self._session).get_order(order_id)
+        return order
 
     async def get_by_user(self, user_id: int) -> List[Order]:
         stmt = select(Order).where(Order.user_id == user_id)
@@ -28,23 +52,93 @@ class OrdersService:
         return result.scalars().all()
 
     async def cancel(self, order_id: int) -> Order | None:
+        """
+        Cancel an order and put the stock of its items back.
+
+        The status change is a conditional UPDATE, so only the request that
+        actually moves the order out of Created/Completed restores stock;
+        everything happens in one transaction.
+        """
         order = await self.get_by_id(order_id)
         if not order:
             return None
-        order.status = "Cancelled"
+
+        if await self._transition(order_id, ("Created", "Completed"), "Cancelled"):
+            result = await self._session.execute(
+                select(
+                    OrderItem.book_id, OrderItem.quantity, OrderItem.price_at_purchase
+                ).where(OrderItem.order_id == order_id)
+            )
+            lines = result.all()
+            await StockService(self._session).restore(
+                sum_quantities((book_id, quantity) for book_id, quantity, _ in lines)
+            )
+            await ReservationsService(self._session).release(order_id)
+            record_event(
+                self._session,
+                "order.cancelled",
+                order_payload(
+                    order_id,
+                    order.user_id,
+                    order.total_price,
+                    lines,
+                    reason="cancelled",
+                ),
+            )
+        else:
+            # Expired orders already gave their stock back
+            order.status = "Cancelled"
+
         await self._session.commit()
-        await self._session.refresh(order)
         return order
 
+    async def complete(self, order_id: int) -> Order | None:
+        """
+        Mark a Created order as Completed (paid): its stock holds are
+        dropped and the stock stays sold.
+        """
+        order = await self.get_by_id(order_id)
+        if not order:
+            return None
+
+        if not await self._transition(order_id, ("Created",), "Completed"):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Order {order_id} is {order.status} and can't be completed.",
+            )
+        await ReservationsService(self._session).release(order_id)
+
+        await self._session.commit()
+        return order
+
+    async def _transition(
+        self, order_id: int, from_statuses: Tuple[str, ...], to_status: str
+    ) -> bool:
+        # The matched row comes back through RETURNING, and the order
+        # loaded in the session gets the new status without a reload
+        stmt = (
+            update(Order)
+            .where(Order.id == order_id, Order.status.in_(from_statuses))
+            .values(status=to_status)
+            .returning(Order.id)
+            .execution_options(synchronize_session="fetch")
+        )
+        result = await self._session.execute(stmt)
+        return result.first() is not None
+
     async def get_items(self, order_id: int) -> List[OrderItem] | None:
         """
         Return list of specific order items for the given order_id.
         Avoids lazy-loading the relationship on the order instance,
         by querying the OrderItem table directly in the async context.
+        Falls back to the archive for orders that were archived.
         """
         order = await self.get_by_id(order_id)
         if not order:
-            return None
+            archive = OrderArchiveService(self._session)
+            if not await archive.get_order(order_id):
+                return None
+            return await archive.get_items(order_id)
 
         stmt = select(OrderItem).where(OrderItem.order_id == order_id)
         result = await self._session.execute(stmt)
@@ -96,9 +190,16 @@ class OrdersService:
                 status_code=status.HTTP_404_NOT_FOUND, detail="User not found."
             )
 
+        # Load every book of the order with a single query
+        books_result = await self._session.execute(
+            select(Book).where(Book.id.in_({elem.book_id for elem in elements}))
+        )
+        books_by_id = {book.id: book for book in books_result.scalars().all()}
+
         # Prepare items and validate stock
         items_objs: List[OrderItem] = []
         total_price = Decimal("0.00")
+        quantities: Dict[int, int] = {}
 
         for elem in elements:
             book_id = elem.book_id
@@ -109,20 +210,25 @@ class OrdersService:
                     detail=f"Invalid quantity for book {book_id}.",
                 )
 
-            book = await self._session.get(Book, book_id)
+            book = books_by_id.get(book_id)
             if not book:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail=f"Book with id {book_id} not found.",
                 )
 
-            if book.stock_quantity < quantity:
+            # Repeated lines for the same book draw from the same stock.
+            # The stock_quantity of a sharded book lags behind its counters,
+            # so those are only checked when the stock is taken.
+            available = book.stock_quantity - quantities.get(book_id, 0)
+            if not book.stock_shards and available < quantity:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Insufficient stock for book id {book_id}. Requested {quantity}, available {book.stock_quantity}.",
+                    detail=f"Insufficient stock for book id {book_id}. Requested {quantity}, available {available}.",
                 )
+            quantities[book_id] = quantities.get(book_id, 0) + quantity
 
-            # Create OrderItem and reserve stock
+            # Create OrderItem (the stock is taken below)
             item_price: Decimal = book.price
             items_objs.append(
                 OrderItem(
@@ -132,9 +238,17 @@ class OrdersService:
 
             total_price += item_price * quantity
 
-            # decrement stock
-            book.stock_quantity = book.stock_quantity - quantity
-            self._session.add(book)
+        # Take the stock with conditional decrements: the check above ran on
+        # a snapshot, a concurrent checkout may have sold the last copies.
+        stock = StockService(self._session)
+        for book_id, quantity in quantities.items():
+            shards = books_by_id[book_id].stock_shards
+            if not await stock.take(book_id, quantity, shards):
+                await self._session.rollback()
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Insufficient stock for book id {book_id}. Requested {quantity}.",
+                )
 
         # Create Order with items (SQLModel relationship will persist OrderItems)
         order = Order(
@@ -146,10 +260,253 @@ class OrdersService:
         )
 
         self._session.add(order)
+        await self._session.flush()
+        # Hold the stock until the order is completed or the hold expires
+        if reservation_settings.RESERVATION_HOLDS_ENABLED:
+            ReservationsService(self._session).hold(order.id, quantities)
+        # Consumers react to the order after the fact, off the checkout path
+        self._record_created(order, items_objs)
+
         await self._session.commit()
-        await self._session.refresh(order)
         return order
 
+    async def create_batch(
+        self,
+        orders: List[BatchOrder],
+        atomic: bool = False,
+        chunk_size: Optional[int] = None,
+    ) -> OrderBatchResult:
+        """
+        Create many orders (of possibly different users) at once.
+
+        Users and books are validated for the whole batch with one query
+        each. Orders are then created chunk by chunk, each chunk in one
+        transaction: the stock of every book in the chunk is taken with a
+        single conditional decrement, and the orders, items, holds and
+        events are inserted in bulk.
+
+        An invalid order (unknown user or book, bad quantity, not enough
+        stock) is rejected on its own; with `atomic`, it aborts the whole
+        batch instead and nothing is created.
+        """
+        if len(orders) > order_batch_settings.ORDER_BATCH_MAX_ORDERS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"At most {order_batch_settings.ORDER_BATCH_MAX_ORDERS} orders per batch.",
+            )
+
+        user_ids = {order.user_id for order in orders}
+        users_result = await self._session.execute(
+            select(User.id).where(User.id.in_(user_ids))
+        )
+        known_users = set(users_result.scalars().all())
+        book_ids = {elem.book_id for order in orders for elem in order.items}
+        books_result = await self._session.execute(
+            select(Book.id, Book.price, Book.stock_shards).where(Book.id.in_(book_ids))
+        )
+        books_by_id = {book.id: book for book in books_result.all()}
+
+        results: Dict[int, BatchOrderResult] = {}
+        valid: List[int] = []
+        for index, order in enumerate(orders):
+            error = _batch_order_error(order, known_users, books_by_id)
+            if error:
+                results[index] = BatchOrderResult(
+                    index=index, status="rejected", detail=error
+                )
+            else:
+                valid.append(index)
+
+        if atomic:
+            if not results:
+                results.update(
+                    await self._create_chunk(orders, valid, books_by_id, atomic=True)
+                )
+        else:
+            size = chunk_size or order_batch_settings.ORDER_BATCH_CHUNK_SIZE
+            for start in range(0, len(valid), size):
+                results.update(
+                    await self._create_chunk(
+                        orders, valid[start : start + size], books_by_id
+                    )
+                )
+
+        ordered = [
+            results.get(index) or BatchOrderResult(index=index, status="aborted")
+            for index in range(len(orders))
+        ]
+        if atomic and any(result.status != "created" for result in ordered):
+            ordered = [
+                BatchOrderResult(index=result.index, status="aborted")
+                if result.status == "created"
+                else result
+                for result in ordered
+            ]
+        return OrderBatchResult(
+            created=sum(result.status == "created" for result in ordered),
+            rejected=sum(result.status == "rejected" for result in ordered),
+            results=ordered,
+        )
+
+    async def _create_chunk(
+        self,
+        orders: List[BatchOrder],
+        indexes: List[int],
+        books_by_id: Dict[int, Any],
+        atomic: bool = False,
+    ) -> Dict[int, BatchOrderResult]:
+        """Create the orders at `indexes` in one transaction."""
+        stock = StockService(self._session)
+        for _ in range(_BATCH_STOCK_ATTEMPTS):
+            # Plan against the current stock, first come first served
+            available = await stock.available(
+                elem.book_id for index in indexes for elem in orders[index].items
+            )
+            results: Dict[int, BatchOrderResult] = {}
+            accepted: List[Tuple[int, Dict[int, int]]] = []
+            for index in indexes:
+                quantities = sum_quantities(
+                    (elem.book_id, elem.quantity) for elem in orders[index].items
+                )
+                short = next(
+                    (
+                        book_id
+                        for book_id, quantity in quantities.items()
+                        if available.get(book_id, 0) < quantity
+                    ),
+                    None,
+                )
+                if short is not None:
+                    results[index] = BatchOrderResult(
+                        index=index,
+                        status="rejected",
+                        detail=f"Insufficient stock for book id {short}.",
+                    )
+                    continue
+                for book_id, quantity in quantities.items():
+                    available[book_id] -= quantity
+                accepted.append((index, quantities))
+            if atomic and results:
+                return results
+
+            totals = sum_quantities(
+                pair for _, quantities in accepted for pair in quantities.items()
+            )
+            shards = {book_id: books_by_id[book_id].stock_shards for book_id in totals}
+            if await stock.take_many(totals, shards):
+                break
+            # Sold concurrently since we looked: plan again
+            await self._session.rollback()
+        else:
+            return {
+                index: BatchOrderResult(
+                    index=index,
+                    status="rejected",
+                    detail="The stock changed concurrently, please retry.",
+                )
+                for index in indexes
+            }
+
+        # Bulk insert the orders (their ids come back in parameter order),
+        # then their items, holds and events.
+        order_rows, lines_by_index = [], {}
+        for index, _ in accepted:
+            lines = [
+                (elem.book_id, elem.quantity, books_by_id[elem.book_id].price)
+                for elem in orders[index].items
+            ]
+            lines_by_index[index] = lines
+            order_rows.append(
+                {
+                    "user_id": orders[index].user_id,
+                    "order_date": datetime.now(timezone.utc),
+                    "total_price": sum(
+                        (price * quantity for _, quantity, price in lines),
+                        Decimal("0.00"),
+                    ),
+                    "status": "Created",
+                }
+            )
+        if not order_rows:
+            await self._session.commit()
+            return results
+
+        inserted = await self._session.execute(
+            insert(_order_table).returning(
+                _order_table.c.id, sort_by_parameter_order=True
+            ),
+            order_rows,
+        )
+        order_ids = inserted.scalars().all()
+        await self._session.execute(
+            insert(_order_item_table),
+            [
+                {
+                    "order_id": order_id,
+                    "book_id": book_id,
+                    "quantity": quantity,
+                    "price_at_purchase": price,
+                }
+                for order_id, (index, _) in zip(order_ids, accepted)
+                for book_id, quantity, price in lines_by_index[index]
+            ],
+        )
+        if reservation_settings.RESERVATION_HOLDS_ENABLED:
+            await ReservationsService(self._session).hold_many(
+                {
+                    order_id: quantities
+                    for order_id, (_, quantities) in zip(order_ids, accepted)
+                }
+            )
+        await record_events(
+            self._session,
+            "order.created",
+            (
+                order_payload(
+                    order_id, row["user_id"], row["total_price"], lines_by_index[index]
+                )
+                for order_id, row, (index, _) in zip(order_ids, order_rows, accepted)
+            ),
+        )
+        await self._session.commit()
+
+        for order_id, (index, _) in zip(order_ids, accepted):
+            results[index] = BatchOrderResult(
+                index=index, status="created", order_id=order_id
+            )
+        return results
+
+    def _record_created(self, order: Order, items: List[OrderItem]):
+        record_event(
+            self._session,
+            "order.created",
+            order_payload(
+                order.id,
+                order.user_id,
+                order.total_price,
+                (
+                    (item.book_id, item.quantity, item.price_at_purchase)
+                    for item in items
+                ),
+            ),
+        )
+
+
+def _batch_order_error(
+    order: BatchOrder, known_users: Set[int], books_by_id: Dict[int, Any]
+) -> str | None:
+    """Why an order of a batch is invalid regardless of stock, if it is."""
+    if order.user_id not in known_users:
+        return "User not found."
+    if not order.items:
+        return "The order has no items."
+    for elem in order.items:
+        if elem.quantity <= 0:
+            return f"Invalid quantity for book {elem.book_id}."
+        if elem.book_id not in books_by_id:
+            return f"Book with id {elem.book_id} not found."
+    return None
+
 
 async def get_orders_service(session: SessionDep) -> OrdersService:
     """
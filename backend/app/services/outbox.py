@@ -0,0 +1,232 @@
+import logging
+import random
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.api.schemas.outbox import OutboxStats
+from app.config import outbox_settings
+from app.core.events import EventBus, event_bus
+from app.database.models import HandledEvent, OutboxEvent
+from app.database.session import read_only_session_factory, session_factory
+
+logger = logging.getLogger(__name__)
+
+# (book_id, quantity, price) of an order line
+OrderLine = Tuple[int, int, Decimal]
+
+# Dialect-specific INSERT constructs supporting ON CONFLICT DO NOTHING.
+_INSERTS = {
+    "sqlite": sqlite_insert,
+    "postgresql": postgresql_insert,
+}
+
+
+def record_event(session: AsyncSession, topic: str, payload: Dict[str, Any]):
+    """
+    Add an event to the outbox as part of the caller's transaction, so it is
+    published if and only if the surrounding change commits.
+    """
+    session.add(
+        OutboxEvent(topic=topic, payload=payload, created_at=datetime.now(timezone.utc))
+    )
+
+
+async def record_events(
+    session: AsyncSession, topic: str, payloads: Iterable[Dict[str, Any]]
+):
+    """`record_event` for many events at once, with a single multi-row INSERT."""
+    created_at = datetime.now(timezone.utc)
+    rows = [
+        {"topic": topic, "payload": payload, "created_at": created_at, "attempts": 0}
+        for payload in payloads
+    ]
+    if rows:
+        await session.execute(insert(OutboxEvent), rows)
+
+
+async def mark_handled(session: AsyncSession, handler: str, event_id: int) -> bool:
+    """
+    Record that `handler` applied the event `event_id`, in the caller's
+    transaction. Returns False if it already did: the event is being
+    redelivered (another of its handlers failed) and must be skipped.
+    """
+    stmt = (
+        _INSERTS[session.bind.dialect.name](HandledEvent)
+        .values(
+            handler=handler, event_id=event_id, handled_at=datetime.now(timezone.utc)
+        )
+        .on_conflict_do_nothing()
+    )
+    result = await session.execute(stmt)
+    return result.rowcount == 1
+
+
+def order_payload(
+    order_id: int,
+    user_id: int,
+    total_price: Decimal,
+    lines: Iterable[OrderLine],
+    **extra: Any,
+) -> Dict[str, Any]:
+    """The JSON payload of the order.* events."""
+    return {
+        "order_id": order_id,
+        "user_id": user_id,
+        "total_price": str(total_price),
+        "items": [
+            {"book_id": book_id, "quantity": quantity, "price": str(price)}
+            for book_id, quantity, price in lines
+        ],
+        **extra,
+    }
+
+
+class OutboxDispatcher:
+    """
+    Drain the outbox and publish its events on an EventBus.
+
+    Events are claimed in id order, a batch at a time, by leasing them to
+    the dispatcher for OUTBOX_CLAIM_LEASE_SECONDS in a short transaction of
+    their own (with SKIP LOCKED on Postgres), so dispatchers in several
+    workers don't publish the same events concurrently and no row lock is
+    held while the handlers run. Once published, an event whose handlers
+    all succeeded is deleted; one with a failing handler stays in the
+    outbox and is published again after an exponential backoff
+    (at-least-once), until it has failed OUTBOX_MAX_ATTEMPTS times.
+    """
+
+    def __init__(
+        self,
+        bind: AsyncEngine,
+        bus: EventBus = event_bus,
+        batch_size: Optional[int] = None,
+        max_attempts: Optional[int] = None,
+    ):
+        self._session = session_factory(bind)
+        self._read_session = read_only_session_factory(bind)
+        self._bus = bus
+        self._batch_size = batch_size or outbox_settings.OUTBOX_BATCH_SIZE
+        self._max_attempts = max_attempts or outbox_settings.OUTBOX_MAX_ATTEMPTS
+        self.stats = OutboxStats()
+
+    async def drain(self) -> int:
+        """Publish batches until the outbox is empty; returns the events handled."""
+        total = 0
+        while True:
+            published = self.stats.published
+            handled = await self.dispatch_batch()
+            total += handled
+            # Stop on a partial batch, or when nothing but failing events is
+            # left: those are retried on the next pass.
+            if handled < self._batch_size or self.stats.published == published:
+                return total
+
+    async def dispatch_batch(self) -> int:
+        """Publish one batch of events; returns the number of events handled."""
+        events = await self._claim()
+        if not events:
+            return 0
+
+        now = datetime.now(timezone.utc)
+        lag = now - _as_utc(events[0].created_at)
+        published, failed = [], []
+        for event in events:
+            try:
+                await self._bus.publish(event)
+            except Exception as exc:
+                logger.warning(
+                    "Handling %s event %d failed: %r", event.topic, event.id, exc
+                )
+                failed.append(
+                    {
+                        "id": event.id,
+                        "attempts": event.attempts + 1,
+                        "last_error": repr(exc)[:500],
+                        "next_attempt_at": now + _retry_delay(event.attempts + 1),
+                    }
+                )
+                self.stats.failed += 1
+            else:
+                published.append(event.id)
+
+        async with self._session() as session:
+            if published:
+                await session.execute(
+                    delete(OutboxEvent)
+                    .where(OutboxEvent.id.in_(published))
+                    .execution_options(synchronize_session=False)
+                )
+                # Published events are never delivered again
+                await session.execute(
+                    delete(HandledEvent).where(HandledEvent.event_id.in_(published))
+                )
+            if failed:
+                await session.execute(update(OutboxEvent), failed)
+            await session.commit()
+
+        self.stats.published += len(published)
+        self.stats.batches += 1
+        self.stats.last_lag_seconds = lag.total_seconds()
+        self.stats.max_lag_seconds = max(
+            self.stats.max_lag_seconds, self.stats.last_lag_seconds
+        )
+        return len(events)
+
+    async def _claim(self) -> List[OutboxEvent]:
+        """Lease the next batch of due events to this dispatcher."""
+        now = datetime.now(timezone.utc)
+        due = (
+            select(OutboxEvent.id)
+            .where(
+                OutboxEvent.attempts < self._max_attempts,
+                or_(
+                    OutboxEvent.next_attempt_at.is_(None),
+                    OutboxEvent.next_attempt_at <= now,
+                ),
+            )
+            .order_by(OutboxEvent.id)
+            .limit(self._batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        lease = timedelta(seconds=outbox_settings.OUTBOX_CLAIM_LEASE_SECONDS)
+        async with self._session() as session:
+            result = await session.scalars(
+                update(OutboxEvent)
+                .where(OutboxEvent.id.in_(due))
+                .values(next_attempt_at=now + lease)
+                .returning(OutboxEvent)
+                .execution_options(synchronize_session=False)
+            )
+            events = sorted(result.all(), key=lambda event: event.id)
+            await session.commit()
+        return events
+
+    async def pending(self) -> int:
+        """Number of events waiting to be published."""
+        async with self._read_session() as session:
+            result = await session.execute(
+                select(func.count())
+                .select_from(OutboxEvent)
+                .where(OutboxEvent.attempts < self._max_attempts)
+            )
+            return result.scalar_one()
+
+
+def _retry_delay(attempts: int) -> timedelta:
+    """Exponential backoff, with jitter, before the next delivery attempt."""
+    seconds = min(
+        outbox_settings.OUTBOX_RETRY_BASE_SECONDS * 2 ** (attempts - 1),
+        outbox_settings.OUTBOX_RETRY_MAX_SECONDS,
+    ) * random.uniform(0.5, 1.0)
+    return timedelta(seconds=seconds)
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
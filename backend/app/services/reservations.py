@@ -0,0 +1,179 @@
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Sequence
+
+from sqlalchemy import Row, delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.config import reservation_settings
+from app.core.tracing import traced_methods
+from app.database.models import Order, OrderItem, StockReservation
+from app.database.session import session_factory
+from app.services.outbox import order_payload, record_event
+from app.services.stock import StockService
+
+logger = logging.getLogger(__name__)
+
+_order_table = Order.__table__
+
+
+@traced_methods
+class ReservationsService:
+    """
+    Ledger of the stock held by orders that haven't been completed yet.
+
+    Checkout takes the stock out of `Book.stock_quantity` right away and
+    records a hold per book that expires after a configurable window.
+    Completing an order drops its holds (the stock stays sold), cancelling
+    or expiring it puts the held stock back. Every transition is guarded by
+    a conditional status UPDATE, so stock is restored at most once even
+    when a cancellation races the sweeper.
+    """
+
+    def __init__(self, session: AsyncSession, hold_seconds: Optional[int] = None):
+        self._session = session
+        self._hold_seconds = (
+            hold_seconds or reservation_settings.RESERVATION_HOLD_SECONDS
+        )
+
+    def hold(self, order_id: int, quantities: Dict[int, int]) -> datetime:
+        """
+        Record holds for the (already taken) stock of an order, in the
+        caller's transaction. Returns the expiry time of the holds.
+        """
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=self._hold_seconds)
+        self._session.add_all(
+            StockReservation(
+                order_id=order_id,
+                book_id=book_id,
+                quantity=quantity,
+                expires_at=expires_at,
+            )
+            for book_id, quantity in quantities.items()
+        )
+        return expires_at
+
+    async def hold_many(self, quantities_by_order: Dict[int, Dict[int, int]]):
+        """`hold` for many orders at once, with a single multi-row INSERT."""
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=self._hold_seconds)
+        rows = [
+            {
+                "order_id": order_id,
+                "book_id": book_id,
+                "quantity": quantity,
+                "expires_at": expires_at,
+            }
+            for order_id, quantities in quantities_by_order.items()
+            for book_id, quantity in quantities.items()
+        ]
+        if rows:
+            await self._session.execute(insert(StockReservation), rows)
+
+    async def release(self, order_id: int):
+        """Drop the holds of an order without touching the stock."""
+        await self._session.execute(
+            delete(StockReservation).where(StockReservation.order_id == order_id)
+        )
+
+    async def expire_batch(
+        self, now: Optional[datetime] = None, batch_size: Optional[int] = None
+    ) -> int:
+        """
+        Expire the orders owning the oldest expired holds and put their
+        stock back, in one transaction. Returns the number of orders looked
+        at (0 once nothing has expired).
+
+        The candidates come from a range scan on the `expires_at` index, so
+        the cost is proportional to what has expired, not to the number of
+        outstanding holds.
+        """
+        now = now or datetime.now(timezone.utc)
+        batch_size = batch_size or reservation_settings.RESERVATION_SWEEP_BATCH_SIZE
+
+        candidates = await self._session.execute(
+            select(StockReservation.order_id)
+            .where(StockReservation.expires_at <= now)
+            .order_by(StockReservation.expires_at)
+            .limit(batch_size)
+            # Lets several workers sweep side by side on Postgres
+            .with_for_update(skip_locked=True)
+        )
+        order_ids = set(candidates.scalars().all())
+        if not order_ids:
+            return 0
+
+        expired = await self._session.execute(
+            update(_order_table)
+            .where(_order_table.c.id.in_(order_ids), _order_table.c.status == "Created")
+            .values(status="Expired")
+            .returning(
+                _order_table.c.id, _order_table.c.user_id, _order_table.c.total_price
+            )
+        )
+        expired_orders = expired.all()
+        expired_ids = [order.id for order in expired_orders]
+
+        if expired_ids:
+            # All holds of an order share one expiry time, but a batch may
+            # still end half-way through one: restore from the whole order.
+            held = await self._session.execute(
+                select(StockReservation.book_id, func.sum(StockReservation.quantity))
+                .where(StockReservation.order_id.in_(expired_ids))
+                .group_by(StockReservation.book_id)
+            )
+            await StockService(self._session).restore(dict(held.all()))
+            await self._record_expired(expired_orders)
+
+        # Holds of orders that were completed or cancelled meanwhile are
+        # simply stale.
+        await self._session.execute(
+            delete(StockReservation).where(StockReservation.order_id.in_(order_ids))
+        )
+        await self._session.commit()
+
+        if expired_ids:
+            logger.info("Expired %d unpaid orders", len(expired_ids))
+        return len(order_ids)
+
+    async def _record_expired(self, orders: Sequence[Row]):
+        result = await self._session.execute(
+            select(
+                OrderItem.order_id,
+                OrderItem.book_id,
+                OrderItem.quantity,
+                OrderItem.price_at_purchase,
+            ).where(OrderItem.order_id.in_([order.id for order in orders]))
+        )
+        lines = defaultdict(list)
+        for order_id, *line in result.all():
+            lines[order_id].append(line)
+
+        for order in orders:
+            record_event(
+                self._session,
+                "order.cancelled",
+                order_payload(
+                    order.id,
+                    order.user_id,
+                    order.total_price,
+                    lines[order.id],
+                    reason="expired",
+                ),
+            )
+
+
+async def sweep_expired_reservations(bind: AsyncEngine) -> int:
+    """
+    Release every expired hold, one batch per transaction.
+
+    This is what the background sweeper runs on every tick; returns the
+    number of orders looked at.
+    """
+    now = datetime.now(timezone.utc)
+    total = 0
+    async with session_factory(bind)() as session:
+        service = ReservationsService(session)
+        while swept := await service.expire_batch(now):
+            total += swept
+    return total
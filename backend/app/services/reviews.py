@@ -0,0 +1,161 @@
+from datetime import datetime, timezone
+from typing import Annotated, Optional
+
+from fastapi import Depends, HTTPException, status
+from sqlalchemy import case, delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.schemas.reviews import ReviewCreate, ReviewPage
+from app.core.tracing import traced_methods
+from app.database.models import Book, Review
+from app.database.session import SessionDep
+
+_book_table = Book.__table__
+_review_table = Review.__table__
+
+# Page size limits of the review listing
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def _rating_deltas(rating: int, sign: int) -> dict:
+    """Relative updates of a book's aggregates for one review of `rating`."""
+    histogram = _book_table.c[f"rating_{rating}_count"]
+    return {
+        "rating_count": _book_table.c.rating_count + sign,
+        "rating_sum": _book_table.c.rating_sum + sign * rating,
+        histogram.key: histogram + sign,
+    }
+
+
+@traced_methods
+class ReviewsService:
+    """
+    Reviews of books, and the per-book rating aggregates.
+
+    The aggregates (`Book.rating_count`, `rating_sum` and the star
+    histogram) are denormalized onto the book row and changed with relative
+    UPDATEs in the same transaction as the review itself, so they stay
+    exact under concurrent writes and reading them is free.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self._session = session
+
+    async def get_page(
+        self, book_id: int, limit: int = DEFAULT_PAGE_SIZE, before: Optional[int] = None
+    ) -> ReviewPage:
+        """
+        Return a page of a book's reviews, newest first. `before` is the
+        `next_before` of the previous page (keyset pagination, so deep pages
+        cost the same as the first one).
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        stmt = select(Review).where(Review.book_id == book_id)
+        if before is not None:
+            stmt = stmt.where(Review.id < before)
+        # One extra row tells whether there is a next page
+        result = await self._session.execute(
+            stmt.order_by(Review.id.desc()).limit(limit + 1)
+        )
+        reviews = list(result.scalars().all())
+        next_before = reviews[limit - 1].id if len(reviews) > limit else None
+        return ReviewPage(reviews=reviews[:limit], next_before=next_before)
+
+    async def create(self, book_id: int, user_id: int, review: ReviewCreate) -> Review:
+        """Add a review and count it in the book's aggregates."""
+        result = await self._session.execute(
+            update(_book_table)
+            .where(_book_table.c.id == book_id)
+            .values(**_rating_deltas(review.rating, 1))
+        )
+        if result.rowcount != 1:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Book not found."
+            )
+
+        created = await self._session.scalar(
+            insert(Review)
+            .values(
+                book_id=book_id,
+                user_id=user_id,
+                rating=review.rating,
+                comment=review.comment,
+                created_at=datetime.now(timezone.utc),
+            )
+            .returning(Review)
+        )
+        await self._session.commit()
+        return created
+
+    async def delete(self, book_id: int, review_id: int, user_id: int) -> bool:
+        """
+        Delete a review of the given user and take it out of the book's
+        aggregates. Returns False if there is no such review.
+        """
+        review = await self._session.get(Review, review_id)
+        if not review or review.book_id != book_id:
+            return False
+        if review.user_id != user_id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Only the author of a review can delete it.",
+            )
+
+        # Conditional on the row still being there, so a concurrent delete
+        # of the same review doesn't uncount it twice
+        result = await self._session.execute(
+            delete(_review_table)
+            .where(_review_table.c.id == review_id)
+            .returning(_review_table.c.rating)
+        )
+        rating = result.scalar_one_or_none()
+        if rating is None:
+            await self._session.rollback()
+            return False
+        await self._session.execute(
+            update(_book_table)
+            .where(_book_table.c.id == book_id)
+            .values(**_rating_deltas(rating, -1))
+        )
+        await self._session.commit()
+        return True
+
+    async def recompute(self, book_id: Optional[int] = None) -> int:
+        """
+        Rebuild the aggregates from the reviews, for one book or all of
+        them (e.g. after reviews were changed behind the service's back).
+        Returns the number of books updated.
+        """
+
+        def aggregate(expression):
+            return (
+                select(func.coalesce(expression, 0))
+                .where(_review_table.c.book_id == _book_table.c.id)
+                .scalar_subquery()
+            )
+
+        stmt = update(_book_table).values(
+            rating_count=aggregate(func.count()),
+            rating_sum=aggregate(func.sum(_review_table.c.rating)),
+            **{
+                f"rating_{stars}_count": aggregate(
+                    func.sum(case((_review_table.c.rating == stars, 1), else_=0))
+                )
+                for stars in range(1, 6)
+            },
+        )
+        if book_id is not None:
+            stmt = stmt.where(_book_table.c.id == book_id)
+        result = await self._session.execute(stmt)
+        await self._session.commit()
+        return result.rowcount
+
+
+async def get_reviews_service(session: SessionDep) -> ReviewsService:
+    """Dependency factory for ReviewsService."""
+    return ReviewsService(session)
+
+
+# Typing helper for route parameters:
+ReviewsServiceDep = Annotated[ReviewsService, Depends(get_reviews_service)]
@@ -0,0 +1,331 @@
+import random
+from typing import Annotated, Dict, Iterable, Tuple
+
+from fastapi import Depends
+from sqlalchemy import bindparam, case, delete, exists, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.core.tracing import traced_methods
+from app.database.models import Book, StockShard
+from app.database.session import SessionDep, session_factory
+
+_book_table = Book.__table__
+_shard_table = StockShard.__table__
+
+# The restores are executed with one parameter set per book, so putting back
+# the stock of many books is a single statement per table. (Bind names must
+# not clash with the column names of the updated table.) Like the takes,
+# restoring to the book row is conditional on the book being unsharded.
+_RESTORE_STOCK = (
+    update(_book_table)
+    .where(_book_table.c.id == bindparam("book_id"), _book_table.c.stock_shards == 0)
+    .values(stock_quantity=_book_table.c.stock_quantity + bindparam("quantity"))
+)
+_RESTORE_SHARD = (
+    update(_shard_table)
+    .where(
+        _shard_table.c.book_id == bindparam("b_book_id"),
+        _shard_table.c.slot == bindparam("b_slot"),
+    )
+    .values(quantity=_shard_table.c.quantity + bindparam("b_quantity"))
+)
+
+_TAKE_SHARD = (
+    update(_shard_table)
+    .where(
+        _shard_table.c.book_id == bindparam("b_book_id"),
+        _shard_table.c.slot == bindparam("b_slot"),
+        _shard_table.c.quantity >= bindparam("b_quantity"),
+    )
+    .values(quantity=_shard_table.c.quantity - bindparam("b_quantity"))
+)
+
+# Write the summed slots of every sharded book back to the book row, but
+# only where the total actually changed.
+_shard_total = (
+    select(func.coalesce(func.sum(_shard_table.c.quantity), 0))
+    .where(_shard_table.c.book_id == _book_table.c.id)
+    .scalar_subquery()
+)
+_RECONCILE_SHARDED_STOCK = (
+    update(_book_table)
+    .where(_book_table.c.stock_shards > 0, _book_table.c.stock_quantity != _shard_total)
+    .values(stock_quantity=_shard_total)
+)
+# Reconciling is a write; it is skipped (after a mere read) while no book
+# is sharded, which is most of the time
+_ANY_SHARDED_BOOK = select(exists().where(_book_table.c.stock_shards > 0))
+
+
+def sum_quantities(lines: Iterable[Tuple[int, int]]) -> Dict[int, int]:
+    """Add up (book_id, quantity) pairs per book."""
+    totals: Dict[int, int] = {}
+    for book_id, quantity in lines:
+        totals[book_id] = totals.get(book_id, 0) + quantity
+    return totals
+
+
+@traced_methods
+class StockService:
+    """
+    Atomic adjustments of book stock.
+
+    Stock is only ever changed with relative, conditional UPDATEs
+    (`stock_quantity = stock_quantity - n WHERE stock_quantity >= n`), so
+    concurrent checkouts of the same book serialize on the row in the
+    database instead of overwriting each other's read-modify-write, and
+    stock can never go negative.
+
+    That single row is still a bottleneck for a bestseller during a launch,
+    so the stock of a book flagged as hot can be split across
+    `Book.stock_shards` StockShard counters: checkouts decrement a random
+    slot, falling back to the other slots when it runs dry, and the
+    reconciler periodically writes the sum back to `Book.stock_quantity`
+    (which is only an approximation for sharded books in between).
+
+    A book can be (un)sharded while a checkout holds a stale
+    `stock_shards`: the decrements and restores are conditional on the
+    book still being unsharded, and a take or restore that finds the book
+    changed retries the other way, so no change lands where the reconciler
+    would overwrite it.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self._session = session
+
+    async def take(self, book_id: int, quantity: int, shards: int = 0) -> bool:
+        """
+        Remove `quantity` from the stock; False if there isn't enough.
+
+        `shards` is the book's `stock_shards`, which callers have at hand
+        from the book they validated the order against.
+        """
+        if await self._take_once(book_id, quantity, shards):
+            return True
+
+        # Not enough stock, or the book was (un)sharded since the caller
+        # read it
+        result = await self._session.execute(
+            select(Book.stock_shards).where(Book.id == book_id)
+        )
+        current = result.scalar_one_or_none()
+        if current is None or bool(current) == bool(shards):
+            return False
+        return await self._take_once(book_id, quantity, current)
+
+    async def _take_once(self, book_id: int, quantity: int, shards: int) -> bool:
+        if shards:
+            return await self._take_sharded(book_id, quantity, shards)
+
+        stmt = (
+            update(Book)
+            .where(
+                Book.id == book_id,
+                Book.stock_shards == 0,
+                Book.stock_quantity >= quantity,
+            )
+            .values(stock_quantity=Book.stock_quantity - quantity)
+            .execution_options(synchronize_session="fetch")
+        )
+        result = await self._session.execute(stmt)
+        return result.rowcount == 1
+
+    async def take_many(
+        self, quantities: Dict[int, int], shards: Dict[int, int]
+    ) -> bool:
+        """
+        Remove stock from several books; False if any of them hasn't got
+        enough, in which case the caller must roll back.
+
+        The unsharded books are decremented with a single conditional
+        UPDATE (the quantity per book comes from a CASE on the id), which
+        returns the ids it could decrement. `shards` maps book ids to their
+        `stock_shards`. Unlike `take`, this doesn't refresh Book objects
+        loaded in the session.
+        """
+        plain = {
+            book_id: quantity
+            for book_id, quantity in quantities.items()
+            if not shards.get(book_id)
+        }
+        taken = set()
+        if plain:
+            wanted = case(plain, value=_book_table.c.id)
+            result = await self._session.execute(
+                update(_book_table)
+                .where(
+                    _book_table.c.id.in_(plain),
+                    _book_table.c.stock_shards == 0,
+                    _book_table.c.stock_quantity >= wanted,
+                )
+                .values(stock_quantity=_book_table.c.stock_quantity - wanted)
+                .returning(_book_table.c.id)
+            )
+            taken = set(result.scalars().all())
+
+        # The sharded books, and the unsharded ones the UPDATE missed (out
+        # of stock, or sharded in the meantime), one by one
+        for book_id, quantity in quantities.items():
+            if book_id not in taken and not await self.take(
+                book_id, quantity, shards.get(book_id, 0)
+            ):
+                return False
+        return True
+
+    async def available(self, book_ids: Iterable[int]) -> Dict[int, int]:
+        """
+        Return the current stock per book id, summing the counters of
+        sharded books (their `stock_quantity` lags behind).
+        """
+        stmt = select(
+            _book_table.c.id,
+            case(
+                (_book_table.c.stock_shards > 0, _shard_total),
+                else_=_book_table.c.stock_quantity,
+            ),
+        ).where(_book_table.c.id.in_(set(book_ids)))
+        result = await self._session.execute(stmt)
+        return dict(result.all())
+
+    async def restore(self, quantities: Dict[int, int]):
+        """Put stock back, given the quantities per book id."""
+        quantities = {book_id: n for book_id, n in quantities.items() if n}
+        if not quantities:
+            return
+
+        shards_by_book = await self._shards_of(quantities)
+        book_params = [
+            {"book_id": book_id, "quantity": quantity}
+            for book_id, quantity in quantities.items()
+            if book_id not in shards_by_book
+        ]
+        if book_params:
+            result = await self._session.execute(_RESTORE_STOCK, book_params)
+            if result.rowcount < len(book_params):
+                # Books sharded since they were read: the UPDATE left them
+                # alone, and now holds the lock of the ones it restored, so
+                # the books sharded by now are exactly the missed ones
+                missed = [params["book_id"] for params in book_params]
+                shards_by_book.update(await self._shards_of(missed))
+
+        shard_params = [
+            {
+                "b_book_id": book_id,
+                "b_slot": random.randrange(shards),
+                "b_quantity": quantities[book_id],
+            }
+            for book_id, shards in shards_by_book.items()
+        ]
+        if shard_params:
+            await self._session.execute(_RESTORE_SHARD, shard_params)
+
+    async def _shards_of(self, book_ids: Iterable[int]) -> Dict[int, int]:
+        """Return the `stock_shards` of the sharded books among `book_ids`."""
+        result = await self._session.execute(
+            select(Book.id, Book.stock_shards).where(
+                Book.id.in_(list(book_ids)), Book.stock_shards > 0
+            )
+        )
+        return dict(result.all())
+
+    async def shard(self, book_id: int, slots: int) -> Book | None:
+        """
+        Split the stock of a book across `slots` counters (0 folds it back
+        into `Book.stock_quantity`). Returns None if the book doesn't exist.
+        """
+        result = await self._session.execute(
+            select(Book).where(Book.id == book_id).with_for_update()
+        )
+        book = result.scalar_one_or_none()
+        if not book:
+            return None
+
+        total = book.stock_quantity
+        if book.stock_shards:
+            total = await self._shard_total(book_id)
+            await self._session.execute(
+                delete(StockShard).where(StockShard.book_id == book_id)
+            )
+
+        if slots:
+            share, remainder = divmod(total, slots)
+            await self._session.execute(
+                insert(StockShard),
+                [
+                    {
+                        "book_id": book_id,
+                        "slot": slot,
+                        "quantity": share + (1 if slot < remainder else 0),
+                    }
+                    for slot in range(slots)
+                ],
+            )
+
+        book.stock_quantity = total
+        book.stock_shards = slots
+        await self._session.commit()
+        return book
+
+    async def reconcile(self) -> int:
+        """
+        Write the summed counters of every sharded book back to its
+        `stock_quantity`. Returns the number of books updated.
+        """
+        if not await self._session.scalar(_ANY_SHARDED_BOOK):
+            return 0
+        result = await self._session.execute(_RECONCILE_SHARDED_STOCK)
+        await self._session.commit()
+        return result.rowcount
+
+    async def _take_sharded(self, book_id: int, quantity: int, shards: int) -> bool:
+        # Start at a random slot so concurrent buyers spread over the rows
+        start = random.randrange(shards)
+        for offset in range(shards):
+            slot = (start + offset) % shards
+            if await self._take_slot(book_id, slot, quantity):
+                return True
+
+        # No single slot holds enough: collect the quantity from several.
+        # Whatever was taken is rolled back with the order if this fails.
+        slots = await self._session.execute(
+            select(StockShard.slot, StockShard.quantity)
+            .where(StockShard.book_id == book_id, StockShard.quantity > 0)
+            .order_by(StockShard.quantity.desc())
+        )
+        remaining = quantity
+        for slot, available in slots.all():
+            portion = min(available, remaining)
+            if await self._take_slot(book_id, slot, portion):
+                remaining -= portion
+                if not remaining:
+                    return True
+        return False
+
+    async def _take_slot(self, book_id: int, slot: int, quantity: int) -> bool:
+        result = await self._session.execute(
+            _TAKE_SHARD, {"b_book_id": book_id, "b_slot": slot, "b_quantity": quantity}
+        )
+        return result.rowcount == 1
+
+    async def _shard_total(self, book_id: int) -> int:
+        result = await self._session.execute(
+            select(func.coalesce(func.sum(StockShard.quantity), 0)).where(
+                StockShard.book_id == book_id
+            )
+        )
+        return result.scalar_one()
+
+
+async def reconcile_sharded_stock(bind: AsyncEngine) -> int:
+    """Run one reconciliation pass (what the background reconciler runs)."""
+    async with session_factory(bind)() as session:
+        return await StockService(session).reconcile()
+
+
+async def get_stock_service(session: SessionDep) -> StockService:
+    """Dependency factory for StockService."""
+    return StockService(session)
+
+
+# Typing helper for route parameter annotations:
+StockServiceDep = Annotated[StockService, Depends(get_stock_service)]
@@ -0,0 +1,141 @@
+import asyncio
+import hashlib
+from datetime import datetime, timezone
+from typing import Annotated, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+from fastapi import Depends
+from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.api.schemas.books_authors import AuthorRead
+from app.api.schemas.storefront import (
+    StorefrontBestSeller,
+    StorefrontBookRead,
+    StorefrontHome,
+)
+from app.config import compression_settings, storefront_settings
+from app.core.cache_stats import count_lookups
+from app.core.compression import ENCODERS, compress
+from app.core.tracing import traced_methods
+from app.database.models import Book
+from app.database.redis import redis_client
+from app.database.session import engine, read_only_session_factory
+from app.services.authors import AuthorsService
+from app.services.books import BooksService
+
+_CACHE_KEY = "storefront:home"
+
+T = TypeVar("T")
+
+
+@traced_methods
+class StorefrontService:
+    """
+    The storefront home page: this month's bestsellers, the new arrivals,
+    the first page of the catalog and the authors, in one payload.
+
+    The sections are independent queries, so they run concurrently, each on
+    a session (and connection) of its own. Books are loaded without their
+    authors: the authors section doubles as the author lookup of every
+    book on the page. The encoded page is cached in Redis with its ETag,
+    pre-compressed.
+    """
+
+    def __init__(self, engine: AsyncEngine, redis: Redis, ttl: Optional[int] = None):
+        # The home page only reads the catalog
+        self._session = read_only_session_factory(engine)
+        self._redis = redis
+        self._ttl = ttl or storefront_settings.STOREFRONT_CACHE_TTL_SECONDS
+
+    async def get_home(
+        self, coding: Optional[str] = None
+    ) -> Tuple[bytes, str, Optional[str]]:
+        """
+        Return the home page as JSON, encoded with the content `coding`
+        (see app.core.compression) if it is worth compressing, its ETag,
+        and the coding actually used.
+
+        Cache entries hold the page pre-compressed with every available
+        coding, so hits never compress anything.
+        """
+        field = coding or "body"
+        etag, content = await self._redis.hmget(_CACHE_KEY, ["etag", field])
+        if etag is not None and content is None:
+            # Cached, but too small to have been compressed
+            field, content = "body", await self._redis.hget(_CACHE_KEY, "body")
+        if content is not None:
+            count_lookups("storefront_home", hits=1)
+            return content, etag.decode(), None if field == "body" else field
+        count_lookups("storefront_home", misses=1)
+
+        body = (await self.build()).model_dump_json().encode()
+        etag = f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        entry = {"etag": etag, "body": body}
+        if len(body) >= compression_settings.COMPRESSION_MINIMUM_SIZE:
+            entry.update((name, compress(body, name)) for name in ENCODERS)
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.hset(_CACHE_KEY, mapping=entry)
+            pipe.expire(_CACHE_KEY, self._ttl)
+            await pipe.execute()
+        if coding in entry:
+            return entry[coding], etag, coding
+        return body, etag, None
+
+    async def build(self) -> StorefrontHome:
+        """Query the sections of the home page, bypassing the cache."""
+        bestsellers, new_arrivals, catalog, authors = await asyncio.gather(
+            self._in_session(
+                lambda session: BooksService(session).get_monthly_bestsellers(
+                    limit=storefront_settings.STOREFRONT_BESTSELLERS,
+                    with_authors=False,
+                )
+            ),
+            self._in_session(
+                lambda session: BooksService(session).get_new_arrivals(
+                    limit=storefront_settings.STOREFRONT_NEW_ARRIVALS,
+                    with_authors=False,
+                )
+            ),
+            self._in_session(
+                lambda session: BooksService(session).get_all(
+                    limit=storefront_settings.STOREFRONT_CATALOG_BOOKS,
+                    with_authors=False,
+                )
+            ),
+            self._in_session(lambda session: AuthorsService(session).get_all()),
+        )
+
+        books: Dict[int, Book] = {}
+        for book in [book for book, _ in bestsellers] + new_arrivals + catalog:
+            books.setdefault(book.id, book)
+
+        return StorefrontHome(
+            bestsellers=[
+                StorefrontBestSeller(book_id=book.id, units_sold=units)
+                for book, units in bestsellers
+            ],
+            new_arrivals=[book.id for book in new_arrivals],
+            catalog=[book.id for book in catalog],
+            books=[
+                StorefrontBookRead.model_validate(book, from_attributes=True)
+                for book in books.values()
+            ],
+            authors=[
+                AuthorRead.model_validate(author, from_attributes=True)
+                for author in authors
+            ],
+            generated_at=datetime.now(timezone.utc),
+        )
+
+    async def _in_session(self, query: Callable[[AsyncSession], Awaitable[T]]) -> T:
+        async with self._session() as session:
+            return await query(session)
+
+
+async def get_storefront_service() -> StorefrontService:
+    """Dependency factory for StorefrontService."""
+    return StorefrontService(engine, redis_client)
+
+
+# Typing helper for route parameter annotations:
+StorefrontServiceDep = Annotated[StorefrontService, Depends(get_storefront_service)]
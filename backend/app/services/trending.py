@@ -0,0 +1,225 @@
+from datetime import datetime, timezone
+from typing import Annotated, Dict, List, Literal, Optional, Tuple
+
+from fastapi import Depends
+from redis.asyncio import Redis
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import outbox_settings, trending_settings
+from app.core.events import event_bus
+from app.core.tracing import traced_methods
+from app.database.models import OutboxEvent
+from app.database.redis import redis_client
+from app.database.session import ReadSessionDep
+from app.services.books import LIST_VIEW_BY_IDS
+
+TrendingWindow = Literal["hour", "day"]
+
+# Sliding windows, as (bucket length in seconds, number of buckets)
+_WINDOWS: Dict[str, Tuple[int, int]] = {
+    "hour": (300, 12),
+    "day": (3600, 24),
+}
+
+# Space-Saving update of a bucket (a sorted set of book id -> units) with
+# book_id/quantity pairs. A book that isn't tracked while the bucket is at
+# capacity takes over the smallest counter, inheriting its count: counts
+# are overestimated by at most that much, and no book that sold more than
+# 1/capacity of the bucket's units is ever missing.
+# With a second key, the sales of an event are only added if that marker
+# of the event doesn't exist yet, so redeliveries aren't counted again;
+# the marker lives for ARGV[3] seconds.
+_ADD_SALES_SCRIPT = """
+if KEYS[2] and not redis.call('SET', KEYS[2], 1, 'NX', 'EX', ARGV[3]) then
+    return 0
+end
+local capacity = tonumber(ARGV[1])
+for i = 4, #ARGV, 2 do
+    local book_id, quantity = ARGV[i], tonumber(ARGV[i + 1])
+    if redis.call('ZSCORE', KEYS[1], book_id)
+        or redis.call('ZCARD', KEYS[1]) < capacity then
+        redis.call('ZINCRBY', KEYS[1], quantity, book_id)
+    else
+        local smallest = redis.call('ZPOPMIN', KEYS[1])
+        redis.call('ZADD', KEYS[1], tonumber(smallest[2]) + quantity, book_id)
+    end
+end
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+"""
+
+
+def _bucket_key(window: str, bucket: int) -> str:
+    return f"trending:{window}:{bucket}"
+
+
+def _event_key(window: str, event_id: int) -> str:
+    return f"trending:{window}:event:{event_id}"
+
+
+def _merged_key(window: str) -> str:
+    return f"trending:{window}"
+
+
+def _event_marker_ttl() -> int:
+    """
+    How long the marker of a recorded event is kept: as long as the outbox
+    may deliver the event again. Each attempt comes at most the longest
+    retry delay after the previous one, plus the claim lease if the
+    dispatcher delivering it died.
+    """
+    return int(
+        outbox_settings.OUTBOX_MAX_ATTEMPTS
+        * (
+            outbox_settings.OUTBOX_RETRY_MAX_SECONDS
+            + outbox_settings.OUTBOX_CLAIM_LEASE_SECONDS
+        )
+    )
+
+
+def _timestamp(moment: Optional[datetime]) -> float:
+    if moment is None:
+        moment = datetime.now(timezone.utc)
+    elif moment.tzinfo is None:
+        # Timestamps read back from SQLite lose their (UTC) timezone
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+@traced_methods
+class TrendingService:
+    """
+    What is selling right now, over the last hour and the last day.
+
+    Each window is a ring of time buckets in Redis, each one a Space-Saving
+    sketch of at most `capacity` counters, so memory is bounded whatever
+    the size of the catalog. The dedupe markers of recorded events only
+    live as long as the outbox may redeliver them. All workers update the
+    same buckets, and periodically merge the buckets of each window
+    (ZUNIONSTORE, trimmed back to `capacity`) into a ready-made ranking, so
+    a query reads only the K books it returns.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        session: Optional[AsyncSession] = None,
+        capacity: Optional[int] = None,
+    ):
+        self._redis = redis
+        # Only needed to load the books of a ranking
+        self._session = session
+        self._capacity = capacity or trending_settings.TRENDING_CAPACITY
+        self._add_sales = redis.register_script(_ADD_SALES_SCRIPT)
+
+    async def record(
+        self,
+        quantities: Dict[int, int],
+        at: Optional[datetime] = None,
+        now: Optional[datetime] = None,
+        event_id: Optional[int] = None,
+    ):
+        """
+        Count the units of books (book id -> quantity) sold at `at`, in the
+        buckets of every window still covering that moment. Sales recorded
+        with an `event_id` are counted once per window, however many times
+        they are recorded.
+        """
+        if not quantities:
+            return
+        at, now = _timestamp(at), _timestamp(now)
+        args = [self._capacity, 0, _event_marker_ttl()]
+        for book_id, quantity in quantities.items():
+            args += [book_id, quantity]
+
+        for window, (length, buckets) in _WINDOWS.items():
+            bucket = int(at // length)
+            if bucket <= int(now // length) - buckets:
+                continue
+            # Kept until the window has slid past the bucket
+            args[1] = length * (buckets + 1)
+            keys = [_bucket_key(window, bucket)]
+            if event_id is not None:
+                keys.append(_event_key(window, event_id))
+            await self._add_sales(keys=keys, args=args)
+
+    async def refresh(self, now: Optional[datetime] = None):
+        """Merge the buckets of every window into its ranking."""
+        for window in _WINDOWS:
+            await self._merge(window, now)
+
+    async def get_trending(
+        self, window: TrendingWindow = "hour", limit: int = 10
+    ) -> List[Tuple[Row, int]]:
+        """
+        Return the best-selling books of a sliding window as (list-view
+        row, units sold) tuples, best first. Units are estimates: they may
+        be overestimated by the Space-Saving eviction (see above).
+        """
+        limit = min(limit, self._capacity)
+        if limit <= 0:
+            return []
+        merged = _merged_key(window)
+        top = await self._redis.zrevrange(merged, 0, limit - 1, withscores=True)
+        if not top:
+            # Not merged yet, or expired because no worker refreshes it
+            await self._merge(window)
+            top = await self._redis.zrevrange(merged, 0, limit - 1, withscores=True)
+        if not top:
+            return []
+
+        ranking = [(int(book_id), int(units)) for book_id, units in top]
+        result = await self._session.execute(
+            LIST_VIEW_BY_IDS, {"book_ids": [book_id for book_id, _ in ranking]}
+        )
+        rows = {row.id: row for row in result.all()}
+        return [(rows[book_id], units) for book_id, units in ranking if book_id in rows]
+
+    async def _merge(self, window: str, now: Optional[datetime] = None):
+        length, buckets = _WINDOWS[window]
+        current = int(_timestamp(now) // length)
+        keys = [
+            _bucket_key(window, bucket)
+            for bucket in range(current - buckets + 1, current + 1)
+        ]
+        merged = _merged_key(window)
+        # Readers see either the previous ranking or the new one
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.zunionstore(merged, keys)
+            pipe.zremrangebyrank(merged, 0, -self._capacity - 1)
+            pipe.expire(
+                merged,
+                max(1, int(3 * trending_settings.TRENDING_REFRESH_INTERVAL_SECONDS)),
+            )
+            await pipe.execute()
+
+
+@event_bus.subscribe("order.created")
+async def count_trending_sales(event: OutboxEvent):
+    """Count the units of new orders at the time they were placed."""
+    quantities: Dict[int, int] = {}
+    for item in event.payload["items"]:
+        quantities[item["book_id"]] = (
+            quantities.get(item["book_id"], 0) + item["quantity"]
+        )
+    await TrendingService(redis_client).record(
+        quantities, at=event.created_at, event_id=event.id
+    )
+
+
+async def refresh_trending():
+    """Merge the trending windows; run periodically by every worker."""
+    await TrendingService(redis_client).refresh()
+
+
+async def get_trending_service(session: ReadSessionDep) -> TrendingService:
+    """
+    Dependency factory for TrendingService.
+
+    The session only connects to the database to load the ranked books.
+    """
+    return TrendingService(redis_client, session)
+
+
+# Typing helper for route parameter annotations:
+TrendingServiceDep = Annotated[TrendingService, Depends(get_trending_service)]
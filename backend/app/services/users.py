@@ -3,17 +3,20 @@ from typing import List, Annotated
 
 import jwt
 from fastapi import Depends
-from sqlmodel import select
+from sqlmodel import insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from passlib.context import CryptContext
 
 from app.config import jwt_settings
 from app.api.schemas.users import UserCreate
+from app.core.tracing import traced_methods
 from app.database.models import User, Order
 from app.database.session import SessionDep
+from app.services.order_archive import OrderArchiveService
 from app.utils import generate_access_token
 
 
+@traced_methods
 class UsersService:
     """Encapsulate DB operations for users."""
 
@@ -23,13 +26,17 @@ class UsersService:
 
     async def create(self, user_signup: UserCreate) -> User:
         """Create a new user (part of the signup workflow)."""
-        user = User(**user_signup.model_dump(exclude=["password"]))
-        user.password_hash = self._pwd_context.hash(user_signup.password)
-        user.created_at = datetime.now()
-
-        self._session.add(user)
+        # One INSERT ... RETURNING: the new row comes back with its id
+        user = await self._session.scalar(
+            insert(User)
+            .values(
+                **user_signup.model_dump(exclude=["password"]),
+                password_hash=self._pwd_context.hash(user_signup.password),
+                created_at=datetime.now(),
+            )
+            .returning(User)
+        )
         await self._session.commit()
-        await self._session.refresh(user)
         return user
 
     async def login(self, email: str, password: str) -> str | None:
@@ -82,11 +89,20 @@ class UsersService:
     # FOTIS: This is a mirror of users_service.get_orders_for_user. We
     # should probably delete one of the two, but let's keep this around
     # for now.
-    async def get_orders_for_user(self, user_id: int) -> List[Order]:
-        """Return all orders for a given user id."""
+    async def get_orders_for_user(
+        self, user_id: int, include_archived: bool = False
+    ) -> List[Order]:
+        """
+        Return all orders for a given user id. The archived ones are only
+        read with include_archived, and come first, being the oldest.
+        """
         stmt = select(Order).where(Order.user_id == user_id)
         result = await self._session.execute(stmt)
-        return result.scalars().all()
+        orders = list(result.scalars().all())
+        if not include_archived:
+            return orders
+        archive = OrderArchiveService(self._session)
+        return await archive.get_orders_for_user(user_id) + orders
 
 
 async def get_users_service(session: SessionDep) -> UsersService:
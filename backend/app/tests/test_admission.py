@@ -0,0 +1,119 @@
+import asyncio
+
+import httpx
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.config import admission_settings
+from app.core.admission import (
+    AdmissionMiddleware,
+    ConcurrencyLimiter,
+    enforce_deadlines,
+    remaining_time,
+)
+
+
+@pytest_asyncio.fixture
+async def engine():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    enforce_deadlines(engine)
+    yield engine
+    await engine.dispose()
+
+
+def _app(engine, release: asyncio.Event) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(AdmissionMiddleware, max_queue_seconds=0.05)
+
+    @app.post("/orders/{user_id}")
+    async def checkout(user_id: int):
+        await release.wait()
+        return {"user_id": user_id}
+
+    @app.get("/books")
+    async def books():
+        async with engine.connect() as conn:
+            return {"one": (await conn.execute(text("SELECT 1"))).scalar_one()}
+
+    @app.get("/books/slow")
+    async def slow_books():
+        await asyncio.sleep(remaining_time() + 0.01)
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    @app.get("/health/live")
+    async def live():
+        return {"status": "ok"}
+
+    return app
+
+
+def _client(app: FastAPI) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app), base_url="http://t")
+
+
+@pytest.mark.asyncio
+async def test_limiter_hands_slots_over_in_order():
+    limiter = ConcurrencyLimiter(1)
+    assert await limiter.acquire(0)
+    # Nobody releases in time
+    assert not await limiter.acquire(0.01)
+    assert limiter.shed == 1
+
+    second = asyncio.create_task(limiter.acquire(1))
+    third = asyncio.create_task(limiter.acquire(1))
+    await asyncio.sleep(0)
+    assert limiter.waiting == 2
+    limiter.release()
+    assert await second and not third.done()
+    limiter.release()
+    assert await third
+    limiter.release()
+    assert (limiter.in_flight, limiter.waiting) == (0, 0)
+
+
+@pytest.mark.asyncio
+async def test_overloaded_route_class_is_shed(engine, monkeypatch):
+    monkeypatch.setattr(admission_settings, "ADMISSION_CHECKOUT_CONCURRENCY", 1)
+    release = asyncio.Event()
+    async with _client(_app(engine, release)) as client:
+        first = asyncio.create_task(client.post("/orders/1"))
+        await asyncio.sleep(0.01)
+
+        shed = await client.post("/orders/2")
+        assert shed.status_code == 503
+        assert shed.headers["Retry-After"] == "1"
+        # Catalog reads have slots of their own
+        assert (await client.get("/books")).json() == {"one": 1}
+
+        release.set()
+        assert (await first).json() == {"user_id": 1}
+        assert (await client.post("/orders/3")).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_health_probes_bypass_admission(engine, monkeypatch):
+    monkeypatch.setattr(admission_settings, "ADMISSION_DEFAULT_CONCURRENCY", 0)
+    app = _app(engine, asyncio.Event())
+    async with _client(app) as client:
+        # No default slot ever comes up, yet liveness still answers
+        assert (await client.get("/health/live")).status_code == 200
+        assert (await client.get("/elsewhere")).status_code == 503
+
+
+@pytest.mark.asyncio
+async def test_statements_past_the_deadline_are_refused(engine, monkeypatch):
+    monkeypatch.setattr(admission_settings, "ADMISSION_CATALOG_DEADLINE_SECONDS", 0.05)
+    async with _client(_app(engine, asyncio.Event())) as client:
+        timed_out = await client.get("/books/slow")
+        assert timed_out.status_code == 503
+        assert "timed out" in timed_out.json()["detail"]
+        assert (await client.get("/books")).status_code == 200
+
+    # Outside of a request there is no deadline
+    assert remaining_time() is None
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
@@ -8,6 +8,7 @@ from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 
 from app.database.models import Author, Book, Order, OrderItem, User
+from app.api.serialization import encode_bestsellers, encode_books
 from app.services.books import BooksService
 
 # In-memory SQLite for tests
@@ -449,3 +450,105 @@ async def test_get_monthly_bestsellers_degenerate_limit_zero_and_no_items(
         year=year, month=month, limit=10
     )
     assert result_no_items == []
+
+
+# ---------- Tests for the list-view projections ----------
+
+
+@pytest.mark.asyncio
+async def test_get_all_summaries_projects_list_view_columns(session: AsyncSession):
+    await _seed_authors_and_books(session)
+    svc = BooksService(session)
+
+    rows = await svc.get_all_summaries()
+
+    assert len(rows) == 3
+    by_id = {r.id: r for r in rows}
+    assert by_id[1001].title == "The Hobbit"
+    assert by_id[1001].author_name == "J.R.R. Tolkien"
+    assert by_id[1002].author_name == "George Orwell"
+    assert by_id[1003].in_stock
+    # Only the list-view columns are selected
+    assert set(rows[0]._fields) == {
+        "id",
+        "title",
+        "price",
+        "cover_image_url",
+        "author_name",
+        "in_stock",
+    }
+
+
+@pytest.mark.asyncio
+async def test_get_new_arrival_summaries(session: AsyncSession):
+    await _seed_authors_and_books(session)
+    svc = BooksService(session)
+
+    rows = await svc.get_new_arrival_summaries(limit=2)
+    assert len(rows) == 2
+
+    assert await svc.get_new_arrival_summaries(limit=0) == []
+
+
+@pytest.mark.asyncio
+async def test_get_monthly_bestseller_summaries_matches_full_variant(
+    session: AsyncSession,
+):
+    now = datetime.now(timezone.utc)
+    year, month = now.year, now.month
+    await _seed_bestsellers_data(session, year, month)
+    svc = BooksService(session)
+
+    summaries = await svc.get_monthly_bestseller_summaries(
+        year=year, month=month, limit=10
+    )
+    full = await svc.get_monthly_bestsellers(year=year, month=month, limit=10)
+
+    assert [(row.id, units) for row, units in summaries] == [
+        (book.id, units) for book, units in full
+    ]
+    # The seeded books reference a missing author, so no name is projected
+    assert summaries[0][0].author_name is None
+    assert summaries[0][0].in_stock
+
+
+@pytest.mark.asyncio
+async def test_prebuilt_statements_take_their_values_per_call(session: AsyncSession):
+    await _seed_authors_and_books(session)
+    svc = BooksService(session)
+
+    assert [b.id for b in await svc.get_all(limit=2)] == [1001, 1002]
+    assert len(await svc.get_all(limit=1, with_authors=False)) == 1
+    assert len(await svc.get_new_arrivals(limit=None)) == 3
+    assert len(await svc.get_new_arrivals(limit=1, with_authors=False)) == 1
+    assert len(await svc.get_new_arrival_summaries(limit=None)) == 3
+    assert {b.title for b in await svc.get_by_author(2)} == {"1984"}
+    assert (await svc.get_by_id(1002)).author.last_name == "Orwell"
+
+
+@pytest.mark.asyncio
+async def test_lean_records_serialize_like_the_orm_instances(session: AsyncSession):
+    await _seed_authors_and_books(session)
+    svc = BooksService(session)
+
+    records = await svc.get_all_records()
+    assert encode_books(records) == encode_books(await svc.get_all(limit=3))
+    assert not any(isinstance(record, Book) for record in records)
+    assert [r.id for r in await svc.get_all_records(limit=2)] == [1001, 1002]
+
+    arrivals = await svc.get_new_arrival_records(limit=2)
+    assert encode_books(arrivals) == encode_books(await svc.get_new_arrivals(limit=2))
+
+
+@pytest.mark.asyncio
+async def test_lean_bestseller_records_match_full_variant(session: AsyncSession):
+    now = datetime.now(timezone.utc)
+    await _seed_bestsellers_data(session, now.year, now.month)
+    svc = BooksService(session)
+
+    records = await svc.get_monthly_bestseller_records(limit=10)
+    full = await svc.get_monthly_bestsellers(limit=10)
+
+    assert encode_bestsellers(records) == encode_bestsellers(full)
+    # The seeded books reference a missing author
+    assert records[0][0].author is None
@@ -0,0 +1,196 @@
+import pytest
+import pytest_asyncio
+from datetime import datetime
+from decimal import Decimal
+
+from fakeredis import FakeAsyncRedis
+from fastapi import HTTPException
+from sqlmodel import SQLModel, text
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.database.models import Book, Order, User
+from app.services.cart import CartService
+from app.services.catalog_cache import CatalogCache
+from app.services.orders import OrdersService
+
+# In-memory SQLite for tests
+ASYNC_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+
+@pytest_asyncio.fixture(scope="module")
+async def async_engine():
+    engine = create_async_engine(ASYNC_DATABASE_URL, echo=False, future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def session(async_engine):
+    """Provide a fresh AsyncSession for each test."""
+    async_session_maker = sessionmaker(
+        async_engine, class_=AsyncSession, expire_on_commit=False
+    )
+    async with async_session_maker() as session:
+        yield session
+        await session.rollback()
+
+
+@pytest_asyncio.fixture
+async def redis():
+    redis = FakeAsyncRedis()
+    yield redis
+    await redis.flushall()
+    await redis.aclose()
+
+
+async def _seed(session: AsyncSession):
+    """Clear tables then insert one user and two books."""
+    await session.execute(text("DELETE FROM orderitem"))
+    await session.execute(text('DELETE FROM "order"'))
+    await session.execute(text("DELETE FROM book"))
+    await session.execute(text('DELETE FROM "user"'))
+    session.add_all(
+        [
+            User(
+                id=1,
+                first_name="Test",
+                last_name="User",
+                email="test@example.com",
+                password_hash="hash",
+                created_at=datetime.now(),
+            ),
+            Book(
+                id=100,
+                title="Book 1",
+                author_id=1,
+                isbn="isbn-100",
+                price=Decimal("9.99"),
+                published_date=datetime.now(),
+                stock_quantity=3,
+            ),
+            Book(
+                id=101,
+                title="Book 2",
+                author_id=1,
+                isbn="isbn-101",
+                price=Decimal("12.50"),
+                published_date=datetime.now(),
+                stock_quantity=10,
+            ),
+        ]
+    )
+    await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_add_update_remove_and_view(session: AsyncSession, redis):
+    await _seed(session)
+    svc = CartService(redis, CatalogCache(redis, session))
+
+    await svc.add_item(1, 100, 1)
+    await svc.add_item(1, 100, 1)
+    cart = await svc.add_item(1, 101, 2)
+
+    assert [(i.book_id, i.quantity) for i in cart.items] == [(100, 2), (101, 2)]
+    assert cart.total_quantity == 4
+    assert cart.total_price == Decimal("9.99") * 2 + Decimal("12.50") * 2
+    assert cart.items[0].title == "Book 1"
+
+    cart = await svc.set_item(1, 101, 5)
+    assert cart.items[1].quantity == 5
+
+    # Quantity 0 removes the item
+    cart = await svc.set_item(1, 101, 0)
+    assert [i.book_id for i in cart.items] == [100]
+
+    cart = await svc.remove_item(1, 100)
+    assert cart.items == []
+    assert cart.total_price == Decimal("0.00")
+
+
+@pytest.mark.asyncio
+async def test_view_reads_from_redis_only(session: AsyncSession, redis):
+    await _seed(session)
+    svc = CartService(redis, CatalogCache(redis, session))
+    await svc.add_item(1, 100, 2)
+
+    # Even with the book gone from the database, the cart is served from
+    # the snapshots kept in Redis.
+    await session.execute(text("DELETE FROM book"))
+    await session.commit()
+
+    cart = await svc.get(1)
+    assert cart.items[0].price == Decimal("9.99")
+
+
+@pytest.mark.asyncio
+async def test_add_rejects_unknown_book_and_insufficient_stock(
+    session: AsyncSession, redis
+):
+    await _seed(session)
+    svc = CartService(redis, CatalogCache(redis, session))
+
+    with pytest.raises(HTTPException) as not_found:
+        await svc.add_item(1, 999, 1)
+    assert not_found.value.status_code == 404
+
+    await svc.add_item(1, 100, 2)
+    with pytest.raises(HTTPException) as no_stock:
+        await svc.add_item(1, 100, 2)
+    assert no_stock.value.status_code == 400
+
+    # The failed add left the cart untouched
+    assert (await svc.get(1)).items[0].quantity == 2
+
+
+@pytest.mark.asyncio
+async def test_checkout_creates_order_and_empties_cart(session: AsyncSession, redis):
+    await _seed(session)
+    svc = CartService(redis, CatalogCache(redis, session))
+    await svc.add_item(1, 100, 2)
+    await svc.add_item(1, 101, 1)
+
+    order = await svc.checkout(1, OrdersService(session))
+
+    assert isinstance(order, Order)
+    assert order.total_price == Decimal("9.99") * 2 + Decimal("12.50")
+    assert (await svc.get(1)).items == []
+
+    book = await session.get(Book, 100)
+    await session.refresh(book)
+    assert book.stock_quantity == 1
+
+    # Nothing left to check out
+    with pytest.raises(HTTPException) as empty:
+        await svc.checkout(1, OrdersService(session))
+    assert empty.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_checkout_keeps_items_changed_while_ordering(
+    session: AsyncSession, redis, monkeypatch
+):
+    await _seed(session)
+    svc = CartService(redis, CatalogCache(redis, session))
+    await svc.add_item(1, 100, 1)
+    orders = OrdersService(session)
+    create = orders.create
+
+    async def create_while_cart_changes(user_id, items):
+        await svc.set_item(1, 100, 3)
+        await svc.add_item(1, 101, 1)
+        return await create(user_id, items)
+
+    monkeypatch.setattr(orders, "create", create_while_cart_changes)
+    order = await svc.checkout(1, orders)
+
+    assert order.total_price == Decimal("9.99")
+    cart = await svc.get(1)
+    assert [(item.book_id, item.quantity) for item in cart.items] == [
+        (100, 3),
+        (101, 1),
+    ]
+    assert await redis.ttl("cart:1") > 0
@@ -0,0 +1,164 @@
+import json
+
+import pytest
+import pytest_asyncio
+from decimal import Decimal
+
+from sqlmodel import SQLModel, select, text
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.database.models import Author, Book
+from app.services import catalog_import
+from app.services.catalog_import import CatalogImportService
+
+# In-memory SQLite for tests
+ASYNC_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+CSV_HEADER = (
+    "isbn,title,price,published_date,description,stock_quantity,"
+    "cover_image_url,author_first_name,author_last_name,author_biography\n"
+)
+
+
+@pytest_asyncio.fixture(scope="module")
+async def async_engine():
+    engine = create_async_engine(ASYNC_DATABASE_URL, echo=False, future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def session(async_engine):
+    """Provide a fresh AsyncSession for each test, on empty catalog tables."""
+    async_session_maker = sessionmaker(
+        async_engine, class_=AsyncSession, expire_on_commit=False
+    )
+    async with async_session_maker() as session:
+        await session.execute(text("DELETE FROM book"))
+        await session.execute(text("DELETE FROM author"))
+        await session.commit()
+        yield session
+        await session.rollback()
+
+
+async def _chunks(payload: str, size: int = 7):
+    """Yield the payload in small chunks to exercise line reassembly."""
+    data = payload.encode("utf-8")
+    for i in range(0, len(data), size):
+        yield data[i : i + size]
+
+
+@pytest.mark.asyncio
+async def test_import_csv_upserts_authors_and_books(session: AsyncSession):
+    payload = CSV_HEADER + (
+        'isbn-1,The Hobbit,15.99,1937-09-21,"A ""fantasy""\nnovel",50,,J.R.R.,Tolkien,Bio\n'
+        "isbn-2,The Silmarillion,20.00,1977-09-15,,10,,J.R.R.,Tolkien,\n"
+        "isbn-3,1984,12.50,1949-06-08,,40,,George,Orwell,\n"
+    )
+    svc = CatalogImportService(session, batch_size=2)
+    progress = []
+
+    report = await svc.import_stream(
+        _chunks(payload), "csv", on_progress=lambda r: progress.append(r.rows_read)
+    )
+
+    assert report.rows_read == 3
+    assert report.books_upserted == 3
+    assert report.rows_failed == 0
+    assert progress == [2, 3]
+
+    authors = (await session.execute(select(Author))).scalars().all()
+    assert {(a.first_name, a.last_name) for a in authors} == {
+        ("J.R.R.", "Tolkien"),
+        ("George", "Orwell"),
+    }
+    tolkien = next(a for a in authors if a.last_name == "Tolkien")
+    # A later row without a biography does not wipe the imported one
+    assert tolkien.biography == "Bio"
+
+    hobbit = (
+        await session.execute(select(Book).where(Book.isbn == "isbn-1"))
+    ).scalar_one()
+    assert hobbit.author_id == tolkien.id
+    assert hobbit.description == 'A "fantasy"\nnovel'
+    assert hobbit.price == Decimal("15.99")
+
+
+@pytest.mark.asyncio
+async def test_import_upserts_existing_isbn(session: AsyncSession):
+    svc = CatalogImportService(session)
+    first = CSV_HEADER + "isbn-1,Old Title,10.00,2020-01-01,,5,,A,B,\n"
+    second = CSV_HEADER + "isbn-1,New Title,11.00,2020-01-01,,7,,A,B,\n"
+
+    await svc.import_stream(_chunks(first), "csv")
+    await svc.import_stream(_chunks(second), "csv")
+
+    books = (await session.execute(select(Book))).scalars().all()
+    assert len(books) == 1
+    await session.refresh(books[0])
+    assert books[0].title == "New Title"
+    assert books[0].stock_quantity == 7
+
+
+@pytest.mark.asyncio
+async def test_import_ndjson_reports_row_errors_without_aborting(
+    session: AsyncSession,
+):
+    good = {
+        "isbn": "isbn-1",
+        "title": "Good",
+        "price": "9.99",
+        "published_date": "2020-01-01",
+        "stock_quantity": 1,
+        "author_first_name": "A",
+        "author_last_name": "B",
+    }
+    lines = [
+        json.dumps(good),
+        "{not json",
+        json.dumps({**good, "isbn": "isbn-2", "price": "-1"}),
+        "",
+        json.dumps({**good, "isbn": "isbn-3"}),
+    ]
+    svc = CatalogImportService(session, max_reported_errors=1)
+
+    report = await svc.import_stream(_chunks("\n".join(lines)), "ndjson")
+
+    assert report.rows_read == 4
+    assert report.books_upserted == 2
+    assert report.rows_failed == 2
+    # Only the first error is kept, but every failure is counted
+    assert len(report.errors) == 1
+    assert report.errors[0].line == 2
+
+
+@pytest.mark.asyncio
+async def test_import_csv_with_wrong_field_count(session: AsyncSession):
+    payload = CSV_HEADER + "isbn-1,Too,Few\n"
+    svc = CatalogImportService(session)
+
+    report = await svc.import_stream(_chunks(payload), "csv")
+
+    assert report.rows_failed == 1
+    assert report.errors[0].line == 2
+    assert report.books_upserted == 0
+
+
+@pytest.mark.asyncio
+async def test_import_refuses_databases_without_upserts(
+    session: AsyncSession, monkeypatch
+):
+    monkeypatch.setattr(catalog_import, "_UPSERT_INSERTS", {})
+    read = []
+
+    async def chunks():
+        read.append(True)
+        yield (CSV_HEADER + "isbn-1,The Hobbit,15.99,1937-09-21,,50,,J.,T.,\n").encode()
+
+    with pytest.raises(ValueError, match="not supported on sqlite"):
+        await CatalogImportService(session).import_stream(chunks(), "csv")
+    # Nothing was read from the feed
+    assert read == []
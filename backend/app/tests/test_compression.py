@@ -0,0 +1,105 @@
+import gzip
+
+import pytest
+from fastapi import FastAPI, Response
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core.compression import ENCODERS, CompressionMiddleware, negotiate
+
+_BIG = b'{"books": [' + b'{"title": "The Hobbit"},' * 200 + b"{}]}"
+
+
+def _client() -> TestClient:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+
+    @app.get("/big")
+    def big():
+        return Response(_BIG, media_type="application/json", headers={"ETag": '"v1"'})
+
+    @app.get("/small")
+    def small():
+        return Response(b'{"ok": true}', media_type="application/json")
+
+    @app.get("/image")
+    def image():
+        return Response(b"\x89PNG" * 500, media_type="image/png")
+
+    @app.get("/encoded")
+    def encoded():
+        return Response(
+            gzip.compress(_BIG),
+            media_type="application/json",
+            headers={"Content-Encoding": "gzip"},
+        )
+
+    @app.get("/stream")
+    def stream():
+        chunks = (b"id,title\n", *(b"%d,Book\n" % n for n in range(1000)))
+        return StreamingResponse(iter(chunks), media_type="text/csv")
+
+    return TestClient(app)
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, coding",
+    [
+        (None, None),
+        ("", None),
+        ("gzip", "gzip"),
+        ("GZIP;q=0.5, identity", "gzip"),
+        ("gzip;q=0", None),
+        ("*, gzip;q=0", None),
+        ("deflate, compress", None),
+    ],
+)
+def test_negotiate(accept_encoding, coding):
+    assert negotiate(accept_encoding) == coding
+
+
+def test_negotiate_prefers_the_best_coding_available():
+    # zstd and brotli when installed, gzip otherwise
+    assert negotiate("*") == next(iter(ENCODERS))
+    assert negotiate("gzip, *;q=0.5") == "gzip"
+
+
+def test_large_allowlisted_responses_are_compressed():
+    client = _client()
+    response = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert response.headers["ETag"] == 'W/"v1"'
+    assert int(response.headers["Content-Length"]) < len(_BIG) // 10
+    assert response.content == _BIG
+
+    plain = client.get("/big", headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in plain.headers
+    assert plain.headers["Vary"] == "Accept-Encoding"
+    assert plain.headers["ETag"] == '"v1"'
+    assert plain.content == _BIG
+
+
+def test_small_binary_and_encoded_responses_are_left_alone():
+    client = _client()
+    headers = {"Accept-Encoding": "gzip"}
+
+    small = client.get("/small", headers=headers)
+    assert "Content-Encoding" not in small.headers
+    assert small.json() == {"ok": True}
+
+    image = client.get("/image", headers=headers)
+    assert "Content-Encoding" not in image.headers
+    assert "Vary" not in image.headers
+
+    encoded = client.get("/encoded", headers=headers)
+    assert encoded.headers["Content-Encoding"] == "gzip"
+    assert encoded.content == _BIG
+
+
+def test_streamed_responses_are_compressed_chunk_by_chunk():
+    response = _client().get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in response.headers
+    lines = response.text.splitlines()
+    assert lines[0] == "id,title" and lines[-1] == "999,Book"
@@ -0,0 +1,201 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+import pytest_asyncio
+from sqlmodel import SQLModel, select, text
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import sessionmaker
+
+import app.services.copurchase as copurchase_module
+from app.config import copurchase_settings, outbox_settings
+from app.core.events import EventBus
+from app.database.models import Book, CoPurchase, HandledEvent, Order, OrderItem, User
+from app.services.copurchase import CoPurchaseService, count_order_pairs
+from app.services.outbox import OutboxDispatcher, record_event
+
+ASYNC_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+
+@pytest_asyncio.fixture(scope="module")
+async def async_engine():
+    engine = create_async_engine(ASYNC_DATABASE_URL, echo=False, future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def session(async_engine):
+    async_session_maker = sessionmaker(
+        async_engine, class_=AsyncSession, expire_on_commit=False
+    )
+    async with async_session_maker() as session:
+        await _seed(session)
+        yield session
+        await session.rollback()
+
+
+async def _seed(session: AsyncSession):
+    """Clear tables, then insert a user and books 1-5."""
+    for table in (
+        "copurchase",
+        "handledevent",
+        "outboxevent",
+        "orderitem",
+        "'order'",
+        "book",
+        "'user'",
+    ):
+        await session.execute(text(f"DELETE FROM {table}"))
+    session.add(
+        User(
+            id=1,
+            first_name="Test",
+            last_name="User",
+            email="test@example.com",
+            password_hash="hash",
+            created_at=datetime.utcnow(),
+        )
+    )
+    session.add_all(
+        Book(
+            id=book_id,
+            title=f"Book {book_id}",
+            author_id=1,
+            isbn=f"isbn-{book_id}",
+            price=Decimal("9.99"),
+            published_date=datetime.utcnow(),
+            stock_quantity=10,
+        )
+        for book_id in range(1, 6)
+    )
+    await session.commit()
+
+
+def _order(order_id: int, status: str, *book_ids: int) -> Order:
+    return Order(
+        id=order_id,
+        user_id=1,
+        order_date=datetime.now(timezone.utc),
+        total_price=Decimal("9.99"),
+        status=status,
+        items=[
+            OrderItem(book_id=book_id, quantity=1, price_at_purchase=Decimal("9.99"))
+            for book_id in book_ids
+        ],
+    )
+
+
+async def _related(session: AsyncSession, book_id: int) -> list[tuple[int, int]]:
+    rows = await CoPurchaseService(session).get_related(book_id)
+    return [(row.id, together) for row, together in rows]
+
+
+@pytest.mark.asyncio
+async def test_orders_are_counted_incrementally(session: AsyncSession):
+    copurchase = CoPurchaseService(session)
+    await copurchase.add_orders([[1, 2, 3], [1, 2], [2, 2, 4]])
+    await session.commit()
+
+    assert await _related(session, 1) == [(2, 2), (3, 1)]
+    assert await _related(session, 2) == [(1, 2), (4, 1), (3, 1)]
+
+    # A cancelled order is taken back out
+    await copurchase.add_orders([[1, 3]], sign=-1)
+    await session.commit()
+    assert await _related(session, 1) == [(2, 2)]
+    assert await _related(session, 5) == []
+
+
+@pytest.mark.asyncio
+async def test_redelivered_order_events_are_counted_once(
+    async_engine, session: AsyncSession, monkeypatch
+):
+    monkeypatch.setattr(outbox_settings, "OUTBOX_RETRY_BASE_SECONDS", 0.0)
+    monkeypatch.setattr(
+        copurchase_module,
+        "async_session",
+        async_sessionmaker(async_engine, expire_on_commit=False),
+    )
+    bus = EventBus()
+    bus.subscribe("order.created")(count_order_pairs)
+    failures = [RuntimeError("Redis is down")]
+
+    @bus.subscribe("order.created")
+    async def flaky_handler(event):
+        if failures:
+            raise failures.pop()
+
+    record_event(session, "order.created", {"items": [{"book_id": 1}, {"book_id": 2}]})
+    await session.commit()
+
+    dispatcher = OutboxDispatcher(async_engine, bus=bus)
+    await dispatcher.drain()
+    assert dispatcher.stats.failed == 1
+    await dispatcher.drain()
+    assert dispatcher.stats.published == 1
+
+    assert await _related(session, 1) == [(2, 1)]
+    # The markers go away with the published event
+    assert (await session.execute(select(HandledEvent))).first() is None
+
+
+@pytest.mark.asyncio
+async def test_bulk_orders_are_ignored(session: AsyncSession, monkeypatch):
+    monkeypatch.setattr(copurchase_settings, "COPURCHASE_MAX_ORDER_BOOKS", 2)
+    copurchase = CoPurchaseService(session)
+    await copurchase.add_orders([[1, 2, 3], [4, 5]])
+    await session.commit()
+
+    assert await _related(session, 1) == []
+    assert await _related(session, 4) == [(5, 1)]
+
+
+@pytest.mark.asyncio
+async def test_rebuild_matches_the_order_history(session: AsyncSession, monkeypatch):
+    monkeypatch.setattr(copurchase_settings, "COPURCHASE_MIN_COUNT", 2)
+    monkeypatch.setattr(copurchase_settings, "COPURCHASE_MAX_ORDER_BOOKS", 3)
+    session.add_all(
+        [
+            _order(1, "Completed", 1, 2),
+            _order(2, "Created", 1, 2, 3),
+            _order(3, "Completed", 1, 3, 1),
+            _order(4, "Cancelled", 1, 3),
+            _order(5, "Completed", 1, 2, 3, 4),  # bulk
+            _order(6, "Completed", 4, 5),
+        ]
+    )
+    # Stale pairs are dropped
+    session.add(CoPurchase(book_id=4, related_book_id=5, count=7))
+    await session.commit()
+
+    assert await CoPurchaseService(session).rebuild(batch_orders=2) == 4
+
+    assert await _related(session, 1) == [(3, 2), (2, 2)]
+    assert await _related(session, 2) == [(1, 2)]
+    assert await _related(session, 4) == []
+
+
+@pytest.mark.asyncio
+async def test_prune_keeps_the_strongest_pairs(session: AsyncSession, monkeypatch):
+    copurchase = CoPurchaseService(session)
+    await copurchase.add_orders([[1, 2], [1, 2], [1, 3], [1, 4], [1, 4], [1, 4]])
+    await copurchase.add_orders([[1, 3]], sign=-1)
+    await session.commit()
+
+    monkeypatch.setattr(copurchase_settings, "COPURCHASE_MAX_RELATED", 1)
+    # Book 1 keeps only (1, 4); the pairs zeroed by the cancellation go too
+    assert await copurchase.prune() == 3
+
+    pairs = await session.execute(
+        select(CoPurchase.book_id, CoPurchase.related_book_id).order_by(
+            CoPurchase.book_id
+        )
+    )
+    assert pairs.all() == [(1, 4), (2, 1), (4, 1)]
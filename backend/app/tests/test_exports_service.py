@@ -0,0 +1,176 @@
+import pytest
+import pytest_asyncio
+from datetime import datetime
+from decimal import Decimal
+
+from sqlmodel import SQLModel, text
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+
+from app.database.models import Author, Book, Order, OrderItem, User
+from app.services.exports import ExportsService, BOOK_EXPORT_FIELDS
+from app.services.order_archive import OrderArchiveService
+
+# Exports open their own sessions, so they need a database shared across
+# connections: a temporary file rather than ":memory:".
+
+
+@pytest_asyncio.fixture(scope="module")
+async def async_engine(tmp_path_factory):
+    db_path = tmp_path_factory.mktemp("exports") / "exports.db"
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}", echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+async def _seed(engine, books: int = 7):
+    async with AsyncSession(engine) as session:
+        await session.execute(text("DELETE FROM orderitemarchive"))
+        await session.execute(text("DELETE FROM orderarchive"))
+        await session.execute(text("DELETE FROM orderitem"))
+        await session.execute(text('DELETE FROM "order"'))
+        await session.execute(text('DELETE FROM "user"'))
+        await session.execute(text("DELETE FROM book"))
+        await session.execute(text("DELETE FROM author"))
+        session.add(Author(id=1, first_name="J.R.R.", last_name="Tolkien"))
+        session.add(
+            User(
+                id=1,
+                first_name="Test",
+                last_name="User",
+                email="test@example.com",
+                password_hash="hash",
+                created_at=datetime.now(),
+            )
+        )
+        for i in range(1, books + 1):
+            session.add(
+                Book(
+                    id=i,
+                    title=f"Book {i}",
+                    author_id=1,
+                    isbn=f"isbn-{i}",
+                    price=Decimal("9.99"),
+                    published_date=datetime(2020, 1, i),
+                    stock_quantity=i,
+                )
+            )
+        session.add(
+            Order(
+                id=10,
+                user_id=1,
+                order_date=datetime(2025, 1, 1),
+                total_price=Decimal("19.98"),
+                status="Created",
+            )
+        )
+        session.add(
+            OrderItem(
+                id=100,
+                order_id=10,
+                book_id=1,
+                quantity=2,
+                price_at_purchase=Decimal("9.99"),
+            )
+        )
+        # Order without items (degenerate)
+        session.add(
+            Order(
+                id=11,
+                user_id=1,
+                order_date=datetime(2025, 1, 2),
+                total_price=Decimal("0.00"),
+                status="Created",
+            )
+        )
+        await session.commit()
+
+
+async def _collect(chunks):
+    return [list(chunk) async for chunk in chunks]
+
+
+@pytest.mark.asyncio
+async def test_stream_books_in_chunks(async_engine):
+    await _seed(async_engine)
+    svc = ExportsService(async_engine, chunk_size=3)
+
+    watermark = await svc.books_watermark()
+    chunks = await _collect(svc.stream_books(until=watermark))
+
+    assert watermark == 7
+    assert [len(c) for c in chunks] == [3, 3, 1]
+    first = chunks[0][0]
+    assert list(first._fields) == BOOK_EXPORT_FIELDS
+    assert first.author_last_name == "Tolkien"
+
+
+@pytest.mark.asyncio
+async def test_stream_books_incremental_since_watermark(async_engine):
+    await _seed(async_engine)
+    svc = ExportsService(async_engine, chunk_size=100)
+
+    chunks = await _collect(svc.stream_books(until=7, since=5))
+    assert [row.id for row in chunks[0]] == [6, 7]
+
+    # Nothing newer than the watermark: the watermark is kept and no rows
+    assert await svc.books_watermark(since=7) == 7
+    assert await _collect(svc.stream_books(until=7, since=7)) == []
+
+
+@pytest.mark.asyncio
+async def test_stream_orders_one_line_per_item(async_engine):
+    await _seed(async_engine)
+    svc = ExportsService(async_engine)
+
+    watermark = await svc.orders_watermark()
+    rows = [
+        row
+        for chunk in await _collect(svc.stream_orders(until=watermark))
+        for row in chunk
+    ]
+
+    assert watermark == 11
+    assert [(r.order_id, r.book_id, r.quantity) for r in rows] == [
+        (10, 1, 2),
+        (11, None, None),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_stream_orders_includes_archived_orders(async_engine):
+    await _seed(async_engine)
+    svc = ExportsService(async_engine)
+    async with AsyncSession(async_engine) as session:
+        # Archive order 10 only
+        assert (
+            await OrderArchiveService(session).archive_batch(
+                cutoff=datetime(2025, 1, 2)
+            )
+            == 1
+        )
+
+    watermark = await svc.orders_watermark()
+    rows = [
+        row
+        for chunk in await _collect(svc.stream_orders(until=watermark))
+        for row in chunk
+    ]
+    assert watermark == 11
+    assert [(r.order_id, r.status, r.book_id, r.quantity) for r in rows] == [
+        (10, "Created", 1, 2),
+        (11, "Created", None, None),
+    ]
+
+    # Once every order is archived, the watermark still covers them
+    async with AsyncSession(async_engine) as session:
+        assert (
+            await OrderArchiveService(session).archive_batch(
+                cutoff=datetime(2026, 1, 1)
+            )
+            == 1
+        )
+    assert await svc.orders_watermark() == 11
+    [[row]] = await _collect(svc.stream_orders(until=11, since=10))
+    assert (row.order_id, row.book_id) == (11, None)
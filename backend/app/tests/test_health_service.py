@@ -0,0 +1,108 @@
+import asyncio
+import sqlite3
+
+import pytest
+import pytest_asyncio
+from fakeredis import FakeAsyncRedis, FakeServer
+from fastapi import FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from starlette.requests import Request
+
+from app.config import health_settings
+from app.core.cache_stats import cache_stats, count_lookups
+from app.database.pool import PoolMonitor
+from app.services.health import HealthService
+
+
+@pytest_asyncio.fixture
+async def engine(tmp_path):
+    # A file database, for a queue pool like the app's
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'health.db'}")
+    yield engine
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def redis_server():
+    server = FakeServer()
+    redis = FakeAsyncRedis(server=server)
+    yield server, redis
+    await redis.aclose()
+
+
+def _request(app: FastAPI) -> Request:
+    return Request({"type": "http", "app": app})
+
+
+@pytest.mark.asyncio
+async def test_readiness_is_cached_and_follows_dependencies(
+    engine, redis_server, monkeypatch
+):
+    server, redis = redis_server
+    health = HealthService(engine, redis)
+    readiness = await health.readiness()
+    assert readiness.status == "ready"
+    assert set(readiness.checks) == {"database", "redis", "event_loop"}
+
+    # Probes within the cache period don't check again
+    server.connected = False
+    assert (await health.readiness()).status == "ready"
+
+    monkeypatch.setattr(health_settings, "HEALTH_CHECK_CACHE_SECONDS", 0)
+    readiness = await health.readiness()
+    assert readiness.status == "unavailable"
+    assert not readiness.checks["redis"].ok and readiness.checks["redis"].error
+    assert readiness.checks["database"].ok
+
+    server.connected = True
+    assert (await health.readiness()).status == "ready"
+
+
+@pytest.mark.asyncio
+async def test_readiness_notices_a_locked_database(
+    engine, redis_server, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(health_settings, "HEALTH_CHECK_CACHE_SECONDS", 0)
+    monkeypatch.setattr(health_settings, "HEALTH_CHECK_TIMEOUT_SECONDS", 0.2)
+    _, redis = redis_server
+    health = HealthService(engine, redis)
+    assert (await health.readiness()).status == "ready"
+
+    # Another process holds the database file locked
+    other = sqlite3.connect(tmp_path / "health.db", isolation_level=None)
+    other.execute("BEGIN EXCLUSIVE")
+    try:
+        readiness = await health.readiness()
+        assert readiness.status == "unavailable"
+        assert not readiness.checks["database"].ok
+    finally:
+        other.execute("ROLLBACK")
+        other.close()
+    # The abandoned probe gets its answer once the lock is gone
+    pending = asyncio.all_tasks() - {asyncio.current_task()}
+    await asyncio.wait(pending, timeout=5)
+    assert (await health.readiness()).status == "ready"
+
+
+@pytest.mark.asyncio
+async def test_stats_report_pool_caches_and_background_work(engine, redis_server):
+    _, redis = redis_server
+    monitor = PoolMonitor()
+    monitor.track(engine)
+    for _ in range(3):
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    pool = monitor.stats(engine)
+    assert (pool.size, pool.checked_out, pool.checkouts) == (5, 0, 3)
+    assert pool.max_wait_ms >= pool.average_wait_ms > 0
+
+    count_lookups("test_cache", hits=3, misses=1)
+    assert cache_stats()["test_cache"].hit_ratio == 0.75
+
+    # No job runner, outbox dispatcher or admission middleware in this app
+    stats = await HealthService(engine, redis).stats(_request(FastAPI()))
+    assert stats.readiness.status == "ready"
+    assert stats.caches["test_cache"].hits == 3
+    assert stats.redis.keys == 0
+    assert stats.jobs is None and stats.outbox_pending is None
@@ -0,0 +1,226 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event
+from sqlmodel import SQLModel, select, text
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+
+from app.config import job_settings
+from app.core.cron import CronSchedule
+from app.database.models import Job
+from app.services.jobs import JobRegistry, JobRunner, enqueue
+
+
+@pytest_asyncio.fixture(scope="module")
+async def async_engine(tmp_path_factory):
+    # Workers run concurrent transactions, so use a database file rather
+    # than the single shared in-memory connection
+    db_path = tmp_path_factory.mktemp("jobs") / "jobs.db"
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}", echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def session(async_engine):
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        await session.execute(text("DELETE FROM job"))
+        await session.commit()
+        yield session
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(job_settings, "JOB_RETRY_BASE_SECONDS", 0.0)
+
+
+async def _jobs(session: AsyncSession) -> list[Job]:
+    session.expire_all()
+    result = await session.execute(select(Job).order_by(Job.id))
+    return list(result.scalars().all())
+
+
+@pytest.mark.asyncio
+async def test_jobs_run_and_failures_are_retried(async_engine, session):
+    registry = JobRegistry()
+    calls = []
+
+    @registry.job("greet")
+    async def greet(name: str):
+        calls.append(name)
+
+    @registry.job("flaky", max_attempts=3)
+    async def flaky():
+        calls.append("flaky")
+        if calls.count("flaky") < 3:
+            raise RuntimeError("try again")
+
+    @registry.job("broken", max_attempts=2)
+    async def broken():
+        raise RuntimeError("always")
+
+    enqueue(session, "greet", {"name": "ada"}, registry=registry)
+    enqueue(session, "flaky", registry=registry)
+    enqueue(session, "broken", registry=registry)
+    enqueue(session, "missing", registry=registry)
+    # Not due yet
+    enqueue(
+        session,
+        "greet",
+        {"name": "later"},
+        run_at=datetime.now(timezone.utc) + timedelta(hours=1),
+        registry=registry,
+    )
+    await session.commit()
+
+    runner = JobRunner(async_engine, registry)
+    await runner.run_pending()
+
+    assert calls == ["ada", "flaky", "flaky", "flaky"]
+    jobs = {(job.name, job.payload.get("name")): job for job in await _jobs(session)}
+    assert jobs[("greet", "ada")].status == "done"
+    assert jobs[("flaky", None)].status == "done"
+    assert jobs[("flaky", None)].attempts == 3
+    assert jobs[("broken", None)].status == "failed"
+    assert jobs[("broken", None)].attempts == 2
+    assert "always" in jobs[("broken", None)].last_error
+    assert jobs[("missing", None)].status == "failed"
+    assert jobs[("greet", "later")].status == "queued"
+    assert runner.stats.succeeded == 2
+    assert runner.stats.retried == 3
+    assert runner.stats.failed == 2
+
+
+@pytest.mark.asyncio
+async def test_expired_leases_are_reclaimed(async_engine, session):
+    registry = JobRegistry()
+    calls = []
+
+    @registry.job("resume")
+    async def resume():
+        calls.append("resume")
+
+    job = enqueue(session, "resume", registry=registry)
+    # As left behind by a worker that died mid-job
+    job.status = "running"
+    job.attempts = 1
+    job.locked_until = datetime.now(timezone.utc) - timedelta(seconds=1)
+    await session.commit()
+
+    await JobRunner(async_engine, registry).run_pending()
+
+    [job] = await _jobs(session)
+    assert calls == ["resume"]
+    assert (job.status, job.attempts) == ("done", 2)
+
+
+@pytest.mark.asyncio
+async def test_scheduled_runs_are_enqueued_once(async_engine, session):
+    registry = JobRegistry()
+    registry.schedule("*/15 * * * *", "report", kind="hourly")
+    since = datetime(2026, 10, 19, 10, 0, tzinfo=timezone.utc)
+    now = datetime(2026, 10, 19, 11, 0, tzinfo=timezone.utc)
+
+    first = JobRunner(async_engine, registry)
+    second = JobRunner(async_engine, registry)
+    assert await first.enqueue_due(now, since) == 4
+    # Another worker catching up on the same window enqueues nothing
+    assert await second.enqueue_due(now, since) == 0
+
+    jobs = await _jobs(session)
+    assert [job.dedupe_key for job in jobs] == [
+        "report@2026-10-19T10:15",
+        "report@2026-10-19T10:30",
+        "report@2026-10-19T10:45",
+        "report@2026-10-19T11:00",
+    ]
+    assert all(job.payload == {"kind": "hourly"} for job in jobs)
+
+
+@pytest.mark.asyncio
+async def test_stop_drains_running_jobs(async_engine, session):
+    registry = JobRegistry()
+    started = asyncio.Event()
+
+    @registry.job("slow")
+    async def slow():
+        started.set()
+        await asyncio.sleep(0.2)
+
+    enqueue(session, "slow", registry=registry)
+    await session.commit()
+
+    runner = JobRunner(async_engine, registry, concurrency=2, poll_interval=0.01)
+    runner.start()
+    await asyncio.wait_for(started.wait(), timeout=5)
+    await runner.stop(timeout=5)
+
+    [job] = await _jobs(session)
+    assert job.status == "done"
+    assert runner.stats.running == 0
+
+
+@pytest.mark.asyncio
+async def test_idle_polls_only_read_the_queue(async_engine, session):
+    registry = JobRegistry()
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement.lstrip().split()[0].upper())
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        assert await JobRunner(async_engine, registry).run_pending() == 0
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+    assert statements == ["SELECT"]
+
+
+@pytest.mark.asyncio
+async def test_enqueued_runs_wake_idle_workers(async_engine, session, monkeypatch):
+    monkeypatch.setattr(job_settings, "JOB_IDLE_POLL_MAX_SECONDS", 60.0)
+    registry = JobRegistry()
+    registry.schedule("* * * * *", "tick")
+    ran = asyncio.Event()
+
+    @registry.job("tick")
+    async def tick():
+        ran.set()
+
+    # The only poll happens before anything is queued; the next one would be
+    # a minute away without the wakeup
+    runner = JobRunner(async_engine, registry, concurrency=1, poll_interval=60)
+    runner.start()
+    await asyncio.sleep(0.1)
+    now = datetime.now(timezone.utc)
+    await runner.enqueue_due(now, now - timedelta(minutes=1))
+    await asyncio.wait_for(ran.wait(), timeout=5)
+    await runner.stop(timeout=5)
+
+
+def test_cron_schedule_next_after():
+    moment = datetime(2026, 10, 19, 15, 37, 12)  # a Monday
+
+    assert CronSchedule("*/5 * * * *").next_after(moment) == datetime(
+        2026, 10, 19, 15, 40
+    )
+    assert CronSchedule("17 3 * * *").next_after(moment) == datetime(
+        2026, 10, 20, 3, 17
+    )
+    assert CronSchedule("0 9 * * 6,0").next_after(moment) == datetime(
+        2026, 10, 24, 9, 0
+    )
+    # Day and weekday both restricted: either one matches
+    assert CronSchedule("30 8 13 * 5").next_after(moment) == datetime(
+        2026, 10, 23, 8, 30
+    )
+    assert CronSchedule("0 0 29 2 *").next_after(moment) == datetime(2028, 2, 29)
+    with pytest.raises(ValueError):
+        CronSchedule("61 * * * *")
+    with pytest.raises(ValueError):
+        CronSchedule("* * *")
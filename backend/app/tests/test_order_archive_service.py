@@ -0,0 +1,198 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+import pytest_asyncio
+from sqlmodel import SQLModel, func, select, text
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.api.schemas.orders import OrderElement
+from app.database.models import (
+    Book,
+    Order,
+    OrderArchive,
+    OrderItem,
+    OrderItemArchive,
+    StockReservation,
+    User,
+)
+from app.services.books import BooksService
+from app.services.order_archive import OrderArchiveService, archive_cutoff
+from app.services.orders import OrdersService
+from app.services.users import UsersService
+
+ASYNC_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+NOW = datetime.now(timezone.utc)
+OLD = archive_cutoff(NOW) - timedelta(days=40)
+
+
+@pytest_asyncio.fixture(scope="module")
+async def async_engine():
+    engine = create_async_engine(ASYNC_DATABASE_URL, echo=False, future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def session(async_engine):
+    async_session_maker = sessionmaker(
+        async_engine, class_=AsyncSession, expire_on_commit=False
+    )
+    async with async_session_maker() as session:
+        await _seed(session)
+        yield session
+        await session.rollback()
+
+
+def _order(order_id: int, order_date: datetime, status: str, quantity: int) -> Order:
+    return Order(
+        id=order_id,
+        user_id=1,
+        order_date=order_date,
+        total_price=Decimal("9.99") * quantity,
+        status=status,
+        items=[
+            OrderItem(
+                id=order_id * 10,
+                book_id=100,
+                quantity=quantity,
+                price_at_purchase=Decimal("9.99"),
+            )
+        ],
+    )
+
+
+async def _seed(session: AsyncSession):
+    """
+    Clear tables, then insert a user, a book and orders: three closed ones
+    past the retention window, an old one still Created, and a recent one.
+    """
+    for table in (
+        "orderitemarchive",
+        "orderarchive",
+        "stockreservation",
+        "orderitem",
+        "'order'",
+        "book",
+        "'user'",
+    ):
+        await session.execute(text(f"DELETE FROM {table}"))
+    session.add_all(
+        [
+            User(
+                id=1,
+                first_name="Test",
+                last_name="User",
+                email="test@example.com",
+                password_hash="hash",
+                created_at=datetime.utcnow(),
+            ),
+            Book(
+                id=100,
+                title="Book 1",
+                author_id=1,
+                isbn="isbn-100",
+                price=Decimal("9.99"),
+                published_date=datetime.utcnow(),
+                stock_quantity=10,
+            ),
+            _order(1, OLD, "Completed", 2),
+            _order(2, OLD + timedelta(hours=1), "Cancelled", 1),
+            _order(3, OLD + timedelta(hours=2), "Completed", 3),
+            _order(4, OLD, "Created", 1),
+            _order(5, NOW, "Completed", 1),
+        ]
+    )
+    await session.commit()
+
+
+async def _count(session: AsyncSession, model) -> int:
+    return (await session.execute(select(func.count()).select_from(model))).scalar()
+
+
+@pytest.mark.asyncio
+async def test_archive_moves_old_orders(session: AsyncSession):
+    archive = OrderArchiveService(session)
+    assert await archive.archive_batch(batch_size=2) == 2
+    assert await archive.archive_batch(batch_size=2) == 2
+    assert await archive.archive_batch(batch_size=2) == 0
+
+    hot = await session.execute(select(Order.id).order_by(Order.id))
+    assert hot.scalars().all() == [5]
+    assert await _count(session, OrderItem) == 1
+    assert await _count(session, OrderArchive) == 4
+    archived_items = await session.execute(
+        select(OrderItemArchive.order_id, OrderItemArchive.quantity).order_by(
+            OrderItemArchive.order_id
+        )
+    )
+    assert archived_items.all() == [(1, 2), (2, 1), (3, 3), (4, 1)]
+
+
+@pytest.mark.asyncio
+async def test_old_created_orders_are_archived_unless_they_hold_stock(
+    session: AsyncSession,
+):
+    # Holds are off by default: the order stays Created for good
+    orders = OrdersService(session)
+    order_id = (await orders.create(1, [OrderElement(book_id=100, quantity=1)])).id
+    held_id = (await orders.create(1, [OrderElement(book_id=100, quantity=1)])).id
+    session.add(
+        StockReservation(order_id=held_id, book_id=100, quantity=1, expires_at=NOW)
+    )
+    await session.execute(
+        Order.__table__.update()
+        .where(Order.id.in_([order_id, held_id]))
+        .values(order_date=OLD)
+    )
+    await session.commit()
+
+    await OrderArchiveService(session).archive_batch()
+
+    archived = await session.get(OrderArchive, (order_id, OLD.replace(tzinfo=None)))
+    assert archived.status == "Created"
+    hot = await session.execute(select(Order.id).order_by(Order.id))
+    assert hot.scalars().all() == [5, held_id]
+
+
+@pytest.mark.asyncio
+async def test_history_lookups_read_through_the_archive(session: AsyncSession):
+    await OrderArchiveService(session).archive_batch()
+    orders = OrdersService(session)
+
+    # Mutations only see the hot table
+    assert await orders.get_by_id(1) is None
+    order = await orders.get_by_id(1, include_archived=True)
+    assert (order.user_id, order.status) == (1, "Completed")
+    assert order.total_price == Decimal("19.98")
+    assert await orders.get_by_id(99, include_archived=True) is None
+
+    [item] = await orders.get_items(1)
+    assert (item.book_id, item.quantity) == (100, 2)
+    [enriched] = await orders.get_items_with_books(3)
+    assert (enriched["title"], enriched["quantity"]) == ("Book 1", 3)
+    assert await orders.get_items(99) is None
+
+    users = UsersService(session)
+    history = await users.get_orders_for_user(1, include_archived=True)
+    assert sorted(order.id for order in history) == [1, 2, 3, 4, 5]
+    # The archive is only read when asked for
+    recent = await users.get_orders_for_user(1)
+    assert sorted(order.id for order in recent) == [5]
+
+
+@pytest.mark.asyncio
+async def test_bestsellers_count_archived_months(session: AsyncSession):
+    books = BooksService(session)
+    before = await books.get_monthly_bestsellers(year=OLD.year, month=OLD.month)
+
+    await OrderArchiveService(session).archive_batch()
+    after = await books.get_monthly_bestsellers(year=OLD.year, month=OLD.month)
+
+    # Completed and in-flight orders count, wherever they are stored
+    assert [(book.id, units) for book, units in after] == [(100, 6)]
+    assert [(book.id, units) for book, units in before] == [(100, 6)]
@@ -4,11 +4,14 @@ from decimal import Decimal
 
 import pytest
 import pytest_asyncio
-from sqlmodel import SQLModel, text
+from fastapi import HTTPException
+from sqlmodel import SQLModel, select, text
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 
-from app.database.models import User, Book, Order, OrderItem
+from app.api.schemas.orders import BatchOrder, OrderElement
+from app.config import reservation_settings
+from app.database.models import User, Book, Order, OrderItem, StockReservation
 from app.services.orders import OrdersService
 
 
@@ -26,6 +29,11 @@ async def async_engine():
     await engine.dispose()
 
 
+@pytest.fixture
+def holds_enabled(monkeypatch):
+    monkeypatch.setattr(reservation_settings, "RESERVATION_HOLDS_ENABLED", True)
+
+
 @pytest_asyncio.fixture
 async def session(async_engine):
     """Provide a fresh AsyncSession for each test (transaction-scoped)."""
@@ -41,6 +49,7 @@ async def session(async_engine):
 async def _clear_tables(session: AsyncSession):
     """Remove all rows from tables used by tests to guarantee a clean slate."""
     # Order of deletes matters because of FK constraints: children first.
+    await session.execute(text("DELETE FROM stockreservation"))
     await session.execute(text("DELETE FROM orderitem"))
     await session.execute(text("DELETE FROM 'order'"))
     await session.execute(text("DELETE FROM book"))
@@ -181,3 +190,226 @@ async def test_create_not_implemented(session: AsyncSession):
     svc = OrdersService(session)
     with pytest.raises(NotImplementedError):
         await svc.create(1)
+
+
+@pytest.mark.asyncio
+async def test_create_reserves_stock_for_all_items(session: AsyncSession):
+    await _seed_minimal(session)
+    svc = OrdersService(session)
+
+    order = await svc.create(
+        1,
+        [
+            OrderElement(book_id=100, quantity=2),
+            OrderElement(book_id=101, quantity=1),
+            # Repeated lines for the same book draw from the same stock
+            OrderElement(book_id=100, quantity=3),
+        ],
+    )
+
+    assert order.status == "Created"
+    assert order.total_price == Decimal("9.99") * 5 + Decimal("12.50")
+    book1 = await session.get(Book, 100)
+    book2 = await session.get(Book, 101)
+    assert book1.stock_quantity == 5
+    assert book2.stock_quantity == 4
+
+
+@pytest.mark.asyncio
+async def test_create_rejects_missing_book_and_insufficient_stock(
+    session: AsyncSession,
+):
+    await _seed_minimal(session)
+    svc = OrdersService(session)
+
+    with pytest.raises(HTTPException) as not_found:
+        await svc.create(1, [OrderElement(book_id=999, quantity=1)])
+    assert not_found.value.status_code == 404
+    await session.rollback()
+
+    with pytest.raises(HTTPException) as no_stock:
+        await svc.create(
+            1,
+            [
+                OrderElement(book_id=101, quantity=3),
+                OrderElement(book_id=101, quantity=3),
+            ],
+        )
+    assert no_stock.value.status_code == 400
+
+
+async def _stock(session: AsyncSession, book_id: int) -> int:
+    result = await session.execute(
+        select(Book.stock_quantity).where(Book.id == book_id)
+    )
+    return result.scalar_one()
+
+
+@pytest.mark.asyncio
+async def test_create_keeps_stock_without_holds_by_default(session: AsyncSession):
+    await _seed_minimal(session)
+
+    order = await OrdersService(session).create(
+        1, [OrderElement(book_id=101, quantity=2)]
+    )
+    assert order.status == "Created"
+    assert await _stock(session, 101) == 3
+    holds = await session.execute(select(StockReservation))
+    assert holds.first() is None
+
+
+@pytest.mark.asyncio
+async def test_create_holds_stock_until_completed(session: AsyncSession, holds_enabled):
+    await _seed_minimal(session)
+    svc = OrdersService(session)
+
+    order = await svc.create(1, [OrderElement(book_id=101, quantity=2)])
+    holds = (
+        (
+            await session.execute(
+                select(StockReservation).where(StockReservation.order_id == order.id)
+            )
+        )
+        .scalars()
+        .all()
+    )
+    assert [(h.book_id, h.quantity) for h in holds] == [(101, 2)]
+
+    completed = await svc.complete(order.id)
+    assert completed.status == "Completed"
+    assert await _stock(session, 101) == 3
+    remaining = await session.execute(
+        select(StockReservation).where(StockReservation.order_id == order.id)
+    )
+    assert remaining.first() is None
+
+    # Only Created orders can be completed
+    with pytest.raises(HTTPException) as conflict:
+        await svc.complete(order.id)
+    assert conflict.value.status_code == 409
+    assert await svc.complete(999999) is None
+
+
+@pytest.mark.asyncio
+async def test_cancel_restores_stock_once(session: AsyncSession):
+    await _seed_minimal(session)
+    svc = OrdersService(session)
+
+    order = await svc.create(
+        1,
+        [OrderElement(book_id=100, quantity=4), OrderElement(book_id=101, quantity=5)],
+    )
+    assert await _stock(session, 100) == 6
+    assert await _stock(session, 101) == 0
+
+    cancelled = await svc.cancel(order.id)
+    assert cancelled.status == "Cancelled"
+    assert await _stock(session, 100) == 10
+    assert await _stock(session, 101) == 5
+
+    # Cancelling again doesn't hand out the stock a second time
+    await svc.cancel(order.id)
+    assert await _stock(session, 100) == 10
+    assert await _stock(session, 101) == 5
+
+
+def _batch_order(user_id: int, *lines) -> BatchOrder:
+    return BatchOrder(
+        user_id=user_id,
+        items=[
+            OrderElement(book_id=book_id, quantity=quantity)
+            for book_id, quantity in lines
+        ],
+    )
+
+
+@pytest.mark.asyncio
+async def test_create_batch_reports_each_order(session: AsyncSession, holds_enabled):
+    await _seed_minimal(session)
+    svc = OrdersService(session)
+
+    batch = await svc.create_batch(
+        [
+            _batch_order(1, (100, 3), (101, 1)),
+            _batch_order(2, (100, 1)),  # unknown user
+            _batch_order(1, (999, 1)),  # unknown book
+            _batch_order(1, (100, 0)),
+            _batch_order(1, (101, 2)),
+            _batch_order(1, (101, 3)),  # only 2 left by now
+            _batch_order(1, (100, 7)),
+        ],
+        chunk_size=2,
+    )
+
+    assert [result.status for result in batch.results] == [
+        "created",
+        "rejected",
+        "rejected",
+        "rejected",
+        "created",
+        "rejected",
+        "created",
+    ]
+    assert (batch.created, batch.rejected) == (3, 4)
+    assert batch.results[1].detail == "User not found."
+    assert "book id 101" in batch.results[5].detail
+    assert await _stock(session, 100) == 0
+    assert await _stock(session, 101) == 2
+
+    first = await svc.get_by_id(batch.results[0].order_id)
+    assert (first.status, first.total_price) == ("Created", Decimal("42.47"))
+    holds = await session.execute(
+        select(StockReservation.book_id, StockReservation.quantity).where(
+            StockReservation.order_id == first.id
+        )
+    )
+    assert sorted(holds.all()) == [(100, 3), (101, 1)]
+
+
+@pytest.mark.asyncio
+async def test_create_batch_atomic_is_all_or_nothing(session: AsyncSession):
+    await _seed_minimal(session)
+    svc = OrdersService(session)
+
+    batch = await svc.create_batch(
+        [_batch_order(1, (100, 2)), _batch_order(1, (101, 6))], atomic=True
+    )
+    assert [result.status for result in batch.results] == ["aborted", "rejected"]
+    assert batch.created == 0
+    assert await _stock(session, 100) == 10
+    assert len(await svc.get_all()) == 2
+
+    batch = await svc.create_batch(
+        [_batch_order(1, (100, 2)), _batch_order(1, (101, 5))], atomic=True
+    )
+    assert [result.status for result in batch.results] == ["created", "created"]
+    assert await _stock(session, 101) == 0
+
+
+@pytest.mark.asyncio
+async def test_concurrent_checkouts_never_oversell(tmp_path):
+    # The in-memory database is a single shared connection; concurrent
+    # transactions need a database file.
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'orders.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    maker = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with maker() as session:
+        await _seed_minimal(session)
+
+    async def buy():
+        async with maker() as session:
+            try:
+                await OrdersService(session).create(
+                    1, [OrderElement(book_id=101, quantity=1)]
+                )
+                return True
+            except HTTPException:
+                return False
+
+    results = await asyncio.gather(*(buy() for _ in range(8)))
+
+    async with maker() as session:
+        assert sum(results) == 5
+        assert await _stock(session, 101) == 0
+    await engine.dispose()
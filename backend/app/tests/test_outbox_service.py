@@ -0,0 +1,230 @@
+from datetime import datetime
+from decimal import Decimal
+
+import asyncio
+from datetime import timedelta, timezone
+
+import pytest
+import pytest_asyncio
+from sqlmodel import SQLModel, select, text
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.api.schemas.orders import OrderElement
+from app.config import outbox_settings
+from app.core.events import EventBus
+from app.database.models import Book, OutboxEvent, User
+from app.services.orders import OrdersService
+from app.services.outbox import OutboxDispatcher, record_event
+
+ASYNC_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+
+@pytest_asyncio.fixture(scope="module")
+async def async_engine():
+    engine = create_async_engine(ASYNC_DATABASE_URL, echo=False, future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def session(async_engine):
+    async_session_maker = sessionmaker(
+        async_engine, class_=AsyncSession, expire_on_commit=False
+    )
+    async with async_session_maker() as session:
+        await _seed(session)
+        yield session
+        await session.rollback()
+
+
+async def _seed(session: AsyncSession):
+    """Clear tables, then insert one user and a book."""
+    for table in (
+        "outboxevent",
+        "stockreservation",
+        "orderitem",
+        "'order'",
+        "book",
+        "'user'",
+    ):
+        await session.execute(text(f"DELETE FROM {table}"))
+    session.add_all(
+        [
+            User(
+                id=1,
+                first_name="Test",
+                last_name="User",
+                email="test@example.com",
+                password_hash="hash",
+                created_at=datetime.utcnow(),
+            ),
+            Book(
+                id=100,
+                title="Book 1",
+                author_id=1,
+                isbn="isbn-100",
+                price=Decimal("9.99"),
+                published_date=datetime.utcnow(),
+                stock_quantity=10,
+            ),
+        ]
+    )
+    await session.commit()
+
+
+async def _events(session: AsyncSession) -> list[OutboxEvent]:
+    result = await session.execute(select(OutboxEvent).order_by(OutboxEvent.id))
+    return list(result.scalars().all())
+
+
+@pytest.mark.asyncio
+async def test_order_changes_record_events(session: AsyncSession):
+    orders = OrdersService(session)
+    order_id = (await orders.create(1, [OrderElement(book_id=100, quantity=2)])).id
+    await orders.cancel(order_id)
+
+    events = await _events(session)
+    assert [event.topic for event in events] == ["order.created", "order.cancelled"]
+    created = events[0].payload
+    assert created["order_id"] == order_id
+    assert created["user_id"] == 1
+    assert Decimal(created["total_price"]) == Decimal("19.98")
+    [item] = created["items"]
+    assert (item["book_id"], item["quantity"]) == (100, 2)
+    assert Decimal(item["price"]) == Decimal("9.99")
+    assert events[1].payload["reason"] == "cancelled"
+
+
+@pytest.mark.asyncio
+async def test_failed_checkout_records_nothing(session: AsyncSession):
+    with pytest.raises(Exception):
+        await OrdersService(session).create(1, [OrderElement(book_id=100, quantity=11)])
+    await session.rollback()
+    assert await _events(session) == []
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_publishes_in_batches(async_engine, session: AsyncSession):
+    for n in range(5):
+        record_event(session, "order.created", {"n": n})
+    record_event(session, "order.unrelated", {"n": 5})
+    await session.commit()
+
+    bus = EventBus()
+    received = []
+
+    @bus.subscribe("order.created")
+    async def handler(event: OutboxEvent):
+        received.append(event.payload["n"])
+
+    dispatcher = OutboxDispatcher(async_engine, bus, batch_size=2)
+    assert await dispatcher.drain() == 6
+
+    assert received == [0, 1, 2, 3, 4]
+    assert await dispatcher.pending() == 0
+    assert dispatcher.stats.published == 6
+    assert dispatcher.stats.batches == 3
+    assert dispatcher.stats.max_lag_seconds >= dispatcher.stats.last_lag_seconds > 0
+
+
+@pytest.mark.asyncio
+async def test_failed_events_are_redelivered(
+    async_engine, session: AsyncSession, monkeypatch
+):
+    monkeypatch.setattr(outbox_settings, "OUTBOX_RETRY_BASE_SECONDS", 0.0)
+    record_event(session, "order.created", {"n": 0})
+    record_event(session, "order.created", {"n": 1})
+    await session.commit()
+
+    bus = EventBus()
+    received = []
+    failures = {0: 1, 1: 5}
+
+    @bus.subscribe("order.created")
+    async def flaky(event: OutboxEvent):
+        n = event.payload["n"]
+        if failures[n]:
+            failures[n] -= 1
+            raise RuntimeError("downstream unavailable")
+        received.append(n)
+
+    dispatcher = OutboxDispatcher(async_engine, bus, max_attempts=3)
+    await dispatcher.drain()
+    assert received == []
+    await dispatcher.drain()
+    assert received == [0]
+
+    # Event 1 is parked after failing max_attempts times
+    await dispatcher.drain()
+    await dispatcher.drain()
+    assert received == [0]
+    assert await dispatcher.pending() == 0
+    parked = await _events(session)
+    assert [(e.payload["n"], e.attempts) for e in parked] == [(1, 3)]
+    assert "downstream unavailable" in parked[0].last_error
+    assert dispatcher.stats.failed == 4
+
+
+@pytest.mark.asyncio
+async def test_failed_events_back_off(async_engine, session: AsyncSession):
+    record_event(session, "order.created", {"n": 0})
+    await session.commit()
+
+    bus = EventBus()
+
+    @bus.subscribe("order.created")
+    async def failing(event: OutboxEvent):
+        raise RuntimeError("downstream unavailable")
+
+    dispatcher = OutboxDispatcher(async_engine, bus)
+    failed_at = datetime.now(timezone.utc).replace(tzinfo=None)
+    await dispatcher.drain()
+    # Not retried before its backoff is over
+    await dispatcher.drain()
+    assert dispatcher.stats.failed == 1
+
+    session.expire_all()
+    [event] = await _events(session)
+    assert event.attempts == 1
+    assert (
+        failed_at + timedelta(seconds=outbox_settings.OUTBOX_RETRY_BASE_SECONDS / 2)
+        <= event.next_attempt_at
+        <= datetime.now(timezone.utc).replace(tzinfo=None)
+        + timedelta(seconds=outbox_settings.OUTBOX_RETRY_BASE_SECONDS)
+    )
+
+
+@pytest.mark.asyncio
+async def test_handlers_run_outside_the_claiming_transaction(
+    async_engine, session: AsyncSession
+):
+    record_event(session, "order.created", {"n": 0})
+    await session.commit()
+
+    bus = EventBus()
+    publishing, release = asyncio.Event(), asyncio.Event()
+
+    @bus.subscribe("order.created")
+    async def slow(event: OutboxEvent):
+        if event.payload["n"] == 0:
+            publishing.set()
+            await release.wait()
+
+    first = OutboxDispatcher(async_engine, bus)
+    second = OutboxDispatcher(async_engine, bus)
+    draining = asyncio.create_task(first.drain())
+    await asyncio.wait_for(publishing.wait(), timeout=5)
+
+    # The claim is committed: the outbox can be written meanwhile, and the
+    # leased event isn't handed to another dispatcher
+    record_event(session, "order.created", {"n": 1})
+    await session.commit()
+    assert await second.dispatch_batch() == 1
+    assert second.stats.published == 1
+
+    release.set()
+    assert await draining == 1
+    assert await _events(session) == []
@@ -0,0 +1,103 @@
+import httpx
+import pytest
+import pytest_asyncio
+from fakeredis import FakeAsyncRedis, FakeServer
+from fastapi import FastAPI
+
+from app.config import rate_limit_settings
+from app.core.rate_limit import RateLimiter, RateLimitMiddleware, RateLimitPolicy
+from app.utils import generate_access_token
+
+POLICY = RateLimitPolicy("test", limit=5, window=3600)
+
+
+@pytest_asyncio.fixture
+async def redis():
+    redis = FakeAsyncRedis()
+    yield redis
+    await redis.flushall()
+    await redis.aclose()
+
+
+def _app(limiter: RateLimiter) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(RateLimitMiddleware, limiter=limiter)
+
+    @app.post("/users/login")
+    async def login():
+        return {"ok": True}
+
+    @app.post("/orders/{user_id}")
+    async def checkout(user_id: int):
+        return {"user_id": user_id}
+
+    @app.get("/health/live")
+    async def live():
+        return {"status": "ok"}
+
+    return app
+
+
+def _client(app: FastAPI) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app), base_url="http://t")
+
+
+@pytest.mark.asyncio
+async def test_workers_share_their_hits_through_redis(redis):
+    first, second = RateLimiter(redis), RateLimiter(redis)
+    assert all(first.hit(POLICY, "ip:1").allowed for _ in range(3))
+    await first.sync()
+
+    # The second worker learns of the first one's hits on its next sync
+    assert second.hit(POLICY, "ip:1").remaining == 4
+    await second.sync()
+    decision = second.hit(POLICY, "ip:1")
+    assert decision.allowed and decision.remaining == 0
+    refused = second.hit(POLICY, "ip:1")
+    assert not refused.allowed
+    assert refused.headers["Retry-After"] == "720"
+
+    # Other clients have allowances of their own
+    assert second.hit(POLICY, "ip:2").remaining == 4
+
+
+@pytest.mark.asyncio
+async def test_decisions_stay_local_when_redis_is_down():
+    server = FakeServer()
+    server.connected = False
+    limiter = RateLimiter(FakeAsyncRedis(server=server))
+    limiter.hit(POLICY, "ip:1")
+
+    await limiter.sync()
+    assert limiter.hit(POLICY, "ip:1").remaining == 3
+
+
+@pytest.mark.asyncio
+async def test_routes_are_throttled_by_their_policy(redis, monkeypatch):
+    monkeypatch.setattr(rate_limit_settings, "RATE_LIMIT_LOGIN_PER_MINUTE", 2)
+    monkeypatch.setattr(rate_limit_settings, "RATE_LIMIT_CHECKOUT_PER_MINUTE", 1)
+    async with _client(_app(RateLimiter(redis))) as client:
+        ok = await client.post("/users/login")
+        assert ok.headers["X-RateLimit-Limit"] == "2"
+        assert ok.headers["X-RateLimit-Remaining"] == "1"
+        assert (await client.post("/users/login")).status_code == 200
+        throttled = await client.post("/users/login")
+        assert throttled.status_code == 429
+        assert throttled.headers["Retry-After"] == "30"
+
+        # Checkout is limited per user, not per address
+        alice = {"Authorization": f"Bearer {generate_access_token({'user_id': 1})}"}
+        bob = {"Authorization": f"Bearer {generate_access_token({'user_id': 2})}"}
+        assert (await client.post("/orders/1", headers=alice)).status_code == 200
+        assert (await client.post("/orders/1", headers=alice)).status_code == 429
+        assert (await client.post("/orders/2", headers=bob)).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_health_probes_are_not_throttled(redis, monkeypatch):
+    monkeypatch.setattr(rate_limit_settings, "RATE_LIMIT_DEFAULT_PER_MINUTE", 1)
+    async with _client(_app(RateLimiter(redis))) as client:
+        for _ in range(3):
+            live = await client.get("/health/live")
+            assert live.status_code == 200
+            assert "X-RateLimit-Limit" not in live.headers
@@ -0,0 +1,164 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+import pytest_asyncio
+from sqlmodel import SQLModel, select, text
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.api.schemas.orders import OrderElement
+from app.config import reservation_settings
+from app.database.models import Book, Order, StockReservation, User
+from app.services.orders import OrdersService
+from app.services.reservations import (
+    ReservationsService,
+    sweep_expired_reservations,
+)
+
+ASYNC_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+
+@pytest_asyncio.fixture(scope="module")
+async def async_engine():
+    engine = create_async_engine(ASYNC_DATABASE_URL, echo=False, future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture(autouse=True)
+def holds_enabled(monkeypatch):
+    monkeypatch.setattr(reservation_settings, "RESERVATION_HOLDS_ENABLED", True)
+
+
+@pytest_asyncio.fixture
+async def session(async_engine):
+    async_session_maker = sessionmaker(
+        async_engine, class_=AsyncSession, expire_on_commit=False
+    )
+    async with async_session_maker() as session:
+        await _seed(session)
+        yield session
+        await session.rollback()
+
+
+async def _seed(session: AsyncSession):
+    """Clear tables, then insert one user and two books."""
+    for table in ("stockreservation", "orderitem", "'order'", "book", "'user'"):
+        await session.execute(text(f"DELETE FROM {table}"))
+    session.add_all(
+        [
+            User(
+                id=1,
+                first_name="Test",
+                last_name="User",
+                email="test@example.com",
+                password_hash="hash",
+                created_at=datetime.utcnow(),
+            ),
+            Book(
+                id=100,
+                title="Book 1",
+                author_id=1,
+                isbn="isbn-100",
+                price=Decimal("9.99"),
+                published_date=datetime.utcnow(),
+                stock_quantity=10,
+            ),
+            Book(
+                id=101,
+                title="Book 2",
+                author_id=1,
+                isbn="isbn-101",
+                price=Decimal("12.50"),
+                published_date=datetime.utcnow(),
+                stock_quantity=5,
+            ),
+        ]
+    )
+    await session.commit()
+
+
+async def _stock(session: AsyncSession, book_id: int) -> int:
+    result = await session.execute(
+        select(Book.stock_quantity).where(Book.id == book_id)
+    )
+    return result.scalar_one()
+
+
+async def _status(session: AsyncSession, order_id: int) -> str:
+    result = await session.execute(select(Order.status).where(Order.id == order_id))
+    return result.scalar_one()
+
+
+def _later(minutes: int) -> datetime:
+    return datetime.now(timezone.utc) + timedelta(minutes=minutes)
+
+
+@pytest.mark.asyncio
+async def test_expire_batch_restores_stock_of_expired_orders(session: AsyncSession):
+    orders = OrdersService(session)
+    order = await orders.create(
+        1,
+        [OrderElement(book_id=100, quantity=3), OrderElement(book_id=101, quantity=5)],
+    )
+    assert await _stock(session, 100) == 7
+    assert await _stock(session, 101) == 0
+
+    svc = ReservationsService(session)
+    # Nothing has expired yet
+    assert await svc.expire_batch() == 0
+
+    assert await svc.expire_batch(now=_later(60)) == 1
+    assert await _status(session, order.id) == "Expired"
+    assert await _stock(session, 100) == 10
+    assert await _stock(session, 101) == 5
+    holds = await session.execute(select(StockReservation))
+    assert holds.first() is None
+
+
+@pytest.mark.asyncio
+async def test_expire_batch_skips_completed_and_cancelled_orders(
+    session: AsyncSession,
+):
+    orders = OrdersService(session)
+    completed = await orders.create(1, [OrderElement(book_id=100, quantity=2)])
+    cancelled = await orders.create(1, [OrderElement(book_id=100, quantity=3)])
+    await orders.complete(completed.id)
+    await orders.cancel(cancelled.id)
+    # A leftover hold (e.g. from a crashed request) must not give stock back
+    session.add(
+        StockReservation(
+            order_id=completed.id, book_id=100, quantity=2, expires_at=_later(-1)
+        )
+    )
+    await session.commit()
+
+    await ReservationsService(session).expire_batch(now=_later(60))
+
+    assert await _status(session, completed.id) == "Completed"
+    assert await _status(session, cancelled.id) == "Cancelled"
+    assert await _stock(session, 100) == 8
+
+
+@pytest.mark.asyncio
+async def test_sweep_expires_every_expired_order(async_engine, session: AsyncSession):
+    orders = OrdersService(session)
+    order_ids = [
+        (await orders.create(1, [OrderElement(book_id=100, quantity=1)])).id
+        for _ in range(5)
+    ]
+    await session.execute(
+        StockReservation.__table__.update().values(expires_at=_later(-1))
+    )
+    await session.commit()
+    assert await _stock(session, 100) == 5
+
+    swept = await sweep_expired_reservations(async_engine)
+
+    assert swept == 5
+    assert await _stock(session, 100) == 10
+    for order_id in order_ids:
+        assert await _status(session, order_id) == "Expired"
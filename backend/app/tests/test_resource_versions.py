@@ -0,0 +1,152 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from email.utils import format_datetime
+
+import pytest
+import pytest_asyncio
+from fakeredis import FakeAsyncRedis
+from fastapi import HTTPException
+from sqlmodel import SQLModel, update
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from starlette.requests import Request
+
+import app.api.caching as caching
+from app.database.models import Author, Book
+from app.database.versions import ResourceVersions
+from app.services.stock import reconcile_sharded_stock
+
+ASYNC_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+
+@pytest_asyncio.fixture
+async def redis():
+    redis = FakeAsyncRedis()
+    yield redis
+    await redis.flushall()
+    await redis.aclose()
+
+
+@pytest_asyncio.fixture
+async def async_engine():
+    engine = create_async_engine(ASYNC_DATABASE_URL, echo=False, future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def versions(redis, async_engine, monkeypatch):
+    versions = ResourceVersions(redis)
+    versions.track(async_engine)
+    monkeypatch.setattr(caching, "resource_versions", versions)
+    return versions
+
+
+def _book(book_id: int) -> Book:
+    return Book(
+        id=book_id,
+        title=f"Book {book_id}",
+        author_id=1,
+        isbn=f"isbn-{book_id}",
+        price=Decimal("9.99"),
+        published_date=datetime.utcnow(),
+        stock_quantity=10,
+    )
+
+
+def _request(**headers: str) -> Request:
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": "/books/1",
+            "headers": [
+                (name.replace("_", "-").encode(), value.encode())
+                for name, value in headers.items()
+            ],
+        }
+    )
+
+
+@pytest.mark.asyncio
+async def test_commits_bump_the_versions_of_written_tables(
+    versions: ResourceVersions, async_engine
+):
+    assert (await versions.get(["book", "author"]))[0] == [0, 0]
+
+    async with AsyncSession(async_engine) as session:
+        session.add(Author(id=1, first_name="Ursula", last_name="Le Guin"))
+        session.add(_book(1))
+        await session.commit()
+        assert (await versions.get(["book", "author"]))[0] == [1, 1]
+
+        # Core statements count as well
+        await session.execute(update(Book).where(Book.id == 1).values(title="New"))
+        await session.commit()
+        assert (await versions.get(["book", "author"]))[0] == [2, 1]
+
+        # Statements that matched no rows changed nothing
+        await session.execute(update(Book).where(Book.id == 99).values(title="New"))
+        await session.commit()
+        assert (await versions.get(["book", "author"]))[0] == [2, 1]
+
+        # Nothing changed if the transaction was rolled back
+        session.add(_book(2))
+        await session.flush()
+        await session.rollback()
+        assert (await versions.get(["book", "author"]))[0] == [2, 1]
+
+    # Writes through other engines are someone else's business
+    other = create_async_engine(ASYNC_DATABASE_URL)
+    async with other.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    async with AsyncSession(other) as session:
+        session.add(Author(id=1, first_name="Italo", last_name="Calvino"))
+        await session.commit()
+    await other.dispose()
+    assert (await versions.get(["author"]))[0] == [1]
+
+
+@pytest.mark.asyncio
+async def test_conditional_requests_get_304_until_a_write(
+    versions: ResourceVersions,
+):
+    validate = caching.cache_validation(
+        Book, Author, max_age=60, stale_while_revalidate=300
+    ).dependency
+
+    headers = await validate(_request())
+    assert headers["Cache-Control"] == "public, max-age=60, stale-while-revalidate=300"
+    etag, last_modified = headers["ETag"], headers["Last-Modified"]
+    assert etag.startswith('W/"')
+
+    for conditional in (
+        _request(if_none_match=etag),
+        _request(if_none_match=f'"other", {etag.removeprefix("W/")}'),
+        _request(if_modified_since=last_modified),
+    ):
+        with pytest.raises(HTTPException) as not_modified:
+            await validate(conditional)
+        assert not_modified.value.status_code == 304
+        assert not_modified.value.headers["ETag"] == etag
+
+    # If-None-Match takes precedence over If-Modified-Since
+    await validate(_request(if_none_match='"other"', if_modified_since=last_modified))
+    earlier = datetime.now(timezone.utc) - timedelta(days=1)
+    await validate(_request(if_modified_since=format_datetime(earlier, usegmt=True)))
+
+    await versions.bump(["book"])
+    assert (await validate(_request(if_none_match=etag)))["ETag"] != etag
+
+
+@pytest.mark.asyncio
+async def test_idle_stock_reconciler_leaves_the_book_version_alone(
+    versions: ResourceVersions, async_engine
+):
+    async with AsyncSession(async_engine) as session:
+        session.add(_book(1))
+        await session.commit()
+    for _ in range(3):
+        await reconcile_sharded_stock(async_engine)
+    assert (await versions.get(["book"]))[0] == [1]
@@ -0,0 +1,142 @@
+import json
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+from sqlmodel import SQLModel, text
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.api.schemas.reviews import ReviewCreate
+from app.api.serialization import encode_book
+from app.database.models import Book, Review, User
+from app.services.books import BooksService
+from app.services.reviews import ReviewsService
+
+ASYNC_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+
+@pytest_asyncio.fixture(scope="module")
+async def async_engine():
+    engine = create_async_engine(ASYNC_DATABASE_URL, echo=False, future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def session(async_engine):
+    async_session_maker = sessionmaker(
+        async_engine, class_=AsyncSession, expire_on_commit=False
+    )
+    async with async_session_maker() as session:
+        await _seed(session)
+        yield session
+        await session.rollback()
+
+
+async def _seed(session: AsyncSession):
+    """Clear tables, then insert two users and a book."""
+    for table in ("review", "book", "'user'"):
+        await session.execute(text(f"DELETE FROM {table}"))
+    session.add_all(
+        [
+            User(
+                id=user_id,
+                first_name="Test",
+                last_name="User",
+                email=f"test{user_id}@example.com",
+                password_hash="hash",
+                created_at=datetime.utcnow(),
+            )
+            for user_id in (1, 2)
+        ]
+        + [
+            Book(
+                id=100,
+                title="Book 1",
+                author_id=1,
+                isbn="isbn-100",
+                price=Decimal("9.99"),
+                published_date=datetime.utcnow(),
+                stock_quantity=10,
+            )
+        ]
+    )
+    await session.commit()
+
+
+async def _book(session: AsyncSession) -> Book:
+    book = await session.get(Book, 100)
+    await session.refresh(book)
+    return book
+
+
+@pytest.mark.asyncio
+async def test_reviews_keep_book_aggregates_up_to_date(session: AsyncSession):
+    reviews = ReviewsService(session)
+    first = await reviews.create(100, 1, ReviewCreate(rating=5, comment="Great"))
+    await reviews.create(100, 2, ReviewCreate(rating=3))
+    await reviews.create(100, 2, ReviewCreate(rating=5))
+
+    book = await _book(session)
+    assert (book.rating_count, book.rating_sum) == (3, 13)
+    assert book.rating_histogram == [0, 0, 1, 0, 2]
+    assert book.rating_average == 4.33
+
+    # Only the author can delete a review, and only once
+    with pytest.raises(HTTPException) as forbidden:
+        await reviews.delete(100, first.id, 2)
+    assert forbidden.value.status_code == 403
+    assert await reviews.delete(100, first.id, 1)
+    assert not await reviews.delete(100, first.id, 1)
+
+    book = await _book(session)
+    assert (book.rating_count, book.rating_sum) == (2, 8)
+    assert book.rating_histogram == [0, 0, 1, 0, 1]
+
+    # BookRead carries the aggregates straight off the book row
+    data = json.loads(encode_book(await BooksService(session).get_by_id(100)))
+    assert data["rating_count"] == 2
+    assert data["rating_average"] == 4.0
+    assert data["rating_histogram"] == [0, 0, 1, 0, 1]
+
+    with pytest.raises(HTTPException) as missing:
+        await reviews.create(999, 1, ReviewCreate(rating=4))
+    assert missing.value.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_reviews_are_paginated_newest_first(session: AsyncSession):
+    reviews = ReviewsService(session)
+    for n in range(5):
+        await reviews.create(100, 1, ReviewCreate(rating=n + 1, comment=str(n)))
+
+    first = await reviews.get_page(100, limit=2)
+    assert [review.comment for review in first.reviews] == ["4", "3"]
+    second = await reviews.get_page(100, limit=2, before=first.next_before)
+    assert [review.comment for review in second.reviews] == ["2", "1"]
+    last = await reviews.get_page(100, limit=2, before=second.next_before)
+    assert [review.comment for review in last.reviews] == ["0"]
+    assert last.next_before is None
+
+    assert (await reviews.get_page(999)).reviews == []
+
+
+@pytest.mark.asyncio
+async def test_recompute_rebuilds_aggregates(session: AsyncSession):
+    session.add_all(
+        Review(book_id=100, user_id=1, rating=rating, created_at=datetime.utcnow())
+        for rating in (2, 2, 4)
+    )
+    await session.commit()
+    assert (await _book(session)).rating_count == 0
+
+    assert await ReviewsService(session).recompute(100) == 1
+
+    book = await _book(session)
+    assert (book.rating_count, book.rating_sum) == (3, 8)
+    assert book.rating_histogram == [0, 2, 0, 1, 0]
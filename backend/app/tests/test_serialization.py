@@ -0,0 +1,55 @@
+import json
+from datetime import datetime
+from decimal import Decimal
+
+from app.api.schemas.books_authors import BookRead
+from app.api.serialization import encode_book, encode_books, encode_bestsellers
+from app.database.models import Author, Book
+
+
+def _book(book_id: int, author: Author | None) -> Book:
+    return Book(
+        id=book_id,
+        title=f"Book {book_id}",
+        author_id=author.id if author else 1,
+        isbn=f"isbn-{book_id}",
+        price=Decimal("15.99"),
+        published_date=datetime(1937, 9, 21),
+        description="A description.",
+        stock_quantity=5,
+        author=author,
+    )
+
+
+def test_encode_book_matches_legacy_dto():
+    author = Author(id=1, first_name="J.R.R.", last_name="Tolkien", biography="Bio")
+    book = _book(1001, author)
+
+    # The previous route implementation, rendered the way FastAPI would.
+    bd = book.model_dump()
+    bd["author"] = book.author.model_dump()
+    legacy = BookRead(**bd).model_dump(mode="json")
+
+    assert json.loads(encode_book(book)) == legacy
+
+
+def test_encode_books_handles_decimal_datetime_and_missing_author():
+    books = [_book(1, None), _book(2, Author(id=2, first_name="G", last_name="O"))]
+
+    data = json.loads(encode_books(books))
+
+    assert [b["id"] for b in data] == [1, 2]
+    assert data[0]["price"] == "15.99"
+    assert data[0]["published_date"] == "1937-09-21T00:00:00"
+    assert data[0]["author"] is None
+    assert data[1]["author"]["last_name"] == "O"
+
+
+def test_encode_bestsellers_and_empty():
+    author = Author(id=1, first_name="J.R.R.", last_name="Tolkien")
+    rows = [(_book(200, author), 5), (_book(201, author), 1)]
+
+    data = json.loads(encode_bestsellers(rows))
+
+    assert [(e["book"]["id"], e["units_sold"]) for e in data] == [(200, 5), (201, 1)]
+    assert json.loads(encode_bestsellers([])) == []
@@ -0,0 +1,165 @@
+from datetime import datetime
+from decimal import Decimal
+from typing import List
+
+import pytest
+import pytest_asyncio
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import event, select, text, update
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlmodel import SQLModel
+
+from app.api.schemas.orders import OrderElement
+from app.api.schemas.reviews import ReviewCreate
+from app.api.schemas.users import UserCreate
+from app.database.models import Book, User
+from app.database import session as session_module
+from app.database.session import (
+    ALEMBIC_INI,
+    ReadOnlySession,
+    SchemaOutOfDateError,
+    expected_schema_revisions,
+    verify_schema,
+)
+from app.services.orders import OrdersService
+from app.services.reviews import ReviewsService
+from app.services.users import UsersService
+
+
+@pytest_asyncio.fixture
+async def engine():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def statements(engine) -> List[str]:
+    """The SQL statements run through the engine, by their first keyword."""
+    executed = []
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement.split(None, 1)[0].upper())
+
+    return executed
+
+
+@pytest_asyncio.fixture
+async def session(engine):
+    async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+        session.add(
+            Book(
+                id=1,
+                title="Book",
+                author_id=1,
+                isbn="isbn-1",
+                price=Decimal("10.00"),
+                published_date=datetime(2020, 1, 1),
+                stock_quantity=5,
+            )
+        )
+        await session.commit()
+        yield session
+
+
+@pytest.mark.asyncio
+async def test_writes_return_what_they_wrote_without_reloading(session, statements):
+    user = await UsersService(session).create(
+        UserCreate(
+            first_name="Ada",
+            last_name="Lovelace",
+            email="ada@example.com",
+            password="secret",
+        )
+    )
+    assert statements == ["INSERT"]
+    assert user.id and user.email == "ada@example.com"
+
+    statements.clear()
+    review = await ReviewsService(session).create(
+        1, user.id, ReviewCreate(rating=5, comment="Great")
+    )
+    assert statements == ["UPDATE", "INSERT"]
+    assert review.id and review.rating == 5
+
+    orders = OrdersService(session)
+    order = await orders.create(user.id, [OrderElement(book_id=1, quantity=2)])
+    statements.clear()
+    cancelled = await orders.cancel(order.id)
+    # The status change comes back through UPDATE ... RETURNING, and
+    # nothing is reloaded after the commit
+    assert cancelled.status == "Cancelled"
+    assert statements[0] == "UPDATE" and statements[-1] != "SELECT"
+    assert cancelled.items[0].quantity == 2
+
+
+@pytest.mark.asyncio
+async def test_read_only_sessions_refuse_writes(engine, session):
+    maker = async_sessionmaker(
+        engine, sync_session_class=ReadOnlySession, expire_on_commit=False
+    )
+    async with maker() as read_session:
+        book = await read_session.get(Book, 1)
+        assert book.title == "Book"
+
+        with pytest.raises(InvalidRequestError):
+            await read_session.execute(
+                update(Book).where(Book.id == 1).values(title="New")
+            )
+        book.title = "New"
+        with pytest.raises(InvalidRequestError):
+            await read_session.flush()
+        await read_session.rollback()
+
+        users = await read_session.scalars(select(User))
+        assert users.all() == []
+
+
+def test_expected_schema_revisions_are_the_alembic_heads():
+    scripts = ScriptDirectory.from_config(Config(str(ALEMBIC_INI)))
+    assert expected_schema_revisions() == tuple(sorted(scripts.get_heads()))
+
+
+async def _stamp(engine, revision: str):
+    async with engine.begin() as conn:
+        await conn.execute(
+            text("CREATE TABLE alembic_version (version_num VARCHAR(32) NOT NULL)")
+        )
+        await conn.execute(
+            text("INSERT INTO alembic_version VALUES (:revision)"),
+            {"revision": revision},
+        )
+
+
+@pytest.mark.asyncio
+async def test_verify_schema_accepts_a_database_at_head(engine, monkeypatch):
+    monkeypatch.setattr(session_module, "engine", engine)
+    [head] = expected_schema_revisions()
+    await _stamp(engine, head)
+
+    await verify_schema()
+
+
+@pytest.mark.asyncio
+async def test_verify_schema_refuses_an_out_of_date_database(engine, monkeypatch):
+    monkeypatch.setattr(session_module, "engine", engine)
+    scripts = ScriptDirectory.from_config(Config(str(ALEMBIC_INI)))
+    [head] = expected_schema_revisions()
+    previous = scripts.get_revision(head).down_revision
+    await _stamp(engine, previous)
+
+    with pytest.raises(SchemaOutOfDateError, match=f"at revision {previous}"):
+        await verify_schema()
+
+
+@pytest.mark.asyncio
+async def test_verify_schema_refuses_a_database_never_migrated(engine, monkeypatch):
+    monkeypatch.setattr(session_module, "engine", engine)
+
+    with pytest.raises(SchemaOutOfDateError, match="at revision <none>"):
+        await verify_schema()
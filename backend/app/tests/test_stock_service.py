@@ -0,0 +1,210 @@
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+from sqlmodel import SQLModel, select, text
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.api.schemas.orders import OrderElement
+from app.database.models import Book, StockShard, User
+from app.services.orders import OrdersService
+from app.services.stock import StockService
+
+ASYNC_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+
+@pytest_asyncio.fixture(scope="module")
+async def async_engine():
+    engine = create_async_engine(ASYNC_DATABASE_URL, echo=False, future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def session(async_engine):
+    async_session_maker = sessionmaker(
+        async_engine, class_=AsyncSession, expire_on_commit=False
+    )
+    async with async_session_maker() as session:
+        await _seed(session)
+        yield session
+        await session.rollback()
+
+
+async def _seed(session: AsyncSession):
+    """Clear tables, then insert one user and a book with 10 copies."""
+    for table in (
+        "stockshard",
+        "stockreservation",
+        "orderitem",
+        "'order'",
+        "book",
+        "'user'",
+    ):
+        await session.execute(text(f"DELETE FROM {table}"))
+    session.add_all(
+        [
+            User(
+                id=1,
+                first_name="Test",
+                last_name="User",
+                email="test@example.com",
+                password_hash="hash",
+                created_at=datetime.utcnow(),
+            ),
+            Book(
+                id=100,
+                title="Book 1",
+                author_id=1,
+                isbn="isbn-100",
+                price=Decimal("9.99"),
+                published_date=datetime.utcnow(),
+                stock_quantity=10,
+            ),
+        ]
+    )
+    await session.commit()
+
+
+async def _slots(session: AsyncSession, book_id: int = 100) -> list[int]:
+    result = await session.execute(
+        select(StockShard.quantity)
+        .where(StockShard.book_id == book_id)
+        .order_by(StockShard.slot)
+    )
+    return list(result.scalars().all())
+
+
+async def _stock(session: AsyncSession, book_id: int = 100) -> int:
+    result = await session.execute(
+        select(Book.stock_quantity).where(Book.id == book_id)
+    )
+    return result.scalar_one()
+
+
+@pytest.mark.asyncio
+async def test_shard_splits_and_folds_stock(session: AsyncSession):
+    svc = StockService(session)
+
+    book = await svc.shard(100, 3)
+    assert book.stock_shards == 3
+    assert await _slots(session) == [4, 3, 3]
+
+    # Re-sharding redistributes what the counters hold
+    await session.execute(text("UPDATE stockshard SET quantity = 1 WHERE slot = 0"))
+    await session.commit()
+    book = await svc.shard(100, 2)
+    assert await _slots(session) == [4, 3]
+    assert book.stock_quantity == 7
+
+    book = await svc.shard(100, 0)
+    assert book.stock_shards == 0
+    assert book.stock_quantity == 7
+    assert await _slots(session) == []
+
+    assert await svc.shard(999, 2) is None
+
+
+@pytest.mark.asyncio
+async def test_take_falls_back_to_other_slots(session: AsyncSession):
+    svc = StockService(session)
+    await svc.shard(100, 4)  # [3, 3, 2, 2]
+
+    # No single slot holds 5 copies, so they are collected from several
+    assert await svc.take(100, 5, shards=4)
+    assert sum(await _slots(session)) == 5
+    for _ in range(5):
+        assert await svc.take(100, 1, shards=4)
+    assert await _slots(session) == [0, 0, 0, 0]
+    assert not await svc.take(100, 1, shards=4)
+    await session.commit()
+
+    await svc.restore({100: 2})
+    await session.commit()
+    assert sum(await _slots(session)) == 2
+
+
+@pytest.mark.asyncio
+async def test_reconcile_writes_counters_back(session: AsyncSession):
+    svc = StockService(session)
+    await svc.shard(100, 4)
+    await svc.take(100, 3, shards=4)
+    await session.commit()
+    # The book row isn't touched by sharded checkouts
+    assert await _stock(session) == 10
+
+    assert await svc.reconcile() == 1
+    assert await _stock(session) == 7
+    # Nothing changed since, so nothing is written
+    assert await svc.reconcile() == 0
+
+
+@pytest.mark.asyncio
+async def test_orders_on_sharded_book_never_oversell(session: AsyncSession):
+    await StockService(session).shard(100, 4)
+    orders = OrdersService(session)
+
+    order_id = (await orders.create(1, [OrderElement(book_id=100, quantity=6)])).id
+    assert sum(await _slots(session)) == 4
+
+    with pytest.raises(HTTPException) as no_stock:
+        await orders.create(1, [OrderElement(book_id=100, quantity=5)])
+    assert no_stock.value.status_code == 400
+    # The partial takes of the failed order were rolled back
+    assert sum(await _slots(session)) == 4
+
+    await orders.cancel(order_id)
+    assert sum(await _slots(session)) == 10
+
+
+@pytest.mark.asyncio
+async def test_takes_with_stale_shards_follow_the_book(session: AsyncSession):
+    svc = StockService(session)
+    assert await svc.reconcile() == 0
+
+    # A checkout that read the book before it was sharded...
+    await svc.shard(100, 2)
+    assert await svc.take(100, 3, shards=0)
+    assert await svc.take_many({100: 1}, shards={})
+    # ...takes from the counters, where the reconciler won't overwrite it
+    assert await _stock(session) == 10
+    assert sum(await _slots(session)) == 6
+    await svc.reconcile()
+    assert await _stock(session) == 6
+
+    # And one that read it sharded takes from the book once unsharded
+    await svc.shard(100, 0)
+    assert await svc.take(100, 2, shards=2)
+    assert await _stock(session) == 4
+    assert not await svc.take(100, 5, shards=2)
+
+
+@pytest.mark.asyncio
+async def test_restores_racing_a_shard_land_in_the_counters(
+    session: AsyncSession, monkeypatch
+):
+    svc = StockService(session)
+    await svc.shard(100, 2)
+    await session.commit()
+
+    # The cancellation read the book just before it was sharded
+    shards_of = svc._shards_of
+    reads = []
+
+    async def stale_first_read(book_ids):
+        reads.append(book_ids)
+        return {} if len(reads) == 1 else await shards_of(book_ids)
+
+    monkeypatch.setattr(svc, "_shards_of", stale_first_read)
+    await svc.restore({100: 2})
+    await session.commit()
+
+    assert await _stock(session) == 10
+    assert sum(await _slots(session)) == 12
+    await svc.reconcile()
+    assert await _stock(session) == 12
@@ -0,0 +1,135 @@
+import gzip
+import json
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+import pytest_asyncio
+from fakeredis import FakeAsyncRedis
+from sqlmodel import SQLModel
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+
+from app.config import compression_settings, storefront_settings
+from app.database.models import Author, Book, Order, OrderItem, User
+from app.services.storefront import StorefrontService
+
+
+@pytest_asyncio.fixture
+async def async_engine(tmp_path):
+    # A file database: the sections are queried on concurrent connections
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'store.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    await _seed(engine)
+    yield engine
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def redis():
+    redis = FakeAsyncRedis()
+    yield redis
+    await redis.flushall()
+    await redis.aclose()
+
+
+async def _seed(engine):
+    """Two authors, books 1-4 (3 and 4 new) and an order of books 2 and 3."""
+    now = datetime.now(timezone.utc)
+    async with AsyncSession(engine) as session:
+        session.add_all(
+            [
+                Author(id=1, first_name="Ursula", last_name="Le Guin"),
+                Author(id=2, first_name="Italo", last_name="Calvino"),
+                User(
+                    id=1,
+                    first_name="Test",
+                    last_name="User",
+                    email="test@example.com",
+                    password_hash="hash",
+                    created_at=now,
+                ),
+            ]
+        )
+        session.add_all(
+            Book(
+                id=book_id,
+                title=f"Book {book_id}",
+                author_id=1 + book_id % 2,
+                isbn=f"isbn-{book_id}",
+                price=Decimal("9.99"),
+                published_date=now - timedelta(days=1 if book_id > 2 else 400),
+                stock_quantity=10,
+            )
+            for book_id in range(1, 5)
+        )
+        session.add(
+            Order(
+                id=1,
+                user_id=1,
+                order_date=now,
+                total_price=Decimal("39.96"),
+                status="Completed",
+                items=[
+                    OrderItem(book_id=2, quantity=3, price_at_purchase=Decimal("9.99")),
+                    OrderItem(book_id=3, quantity=1, price_at_purchase=Decimal("9.99")),
+                ],
+            )
+        )
+        await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_home_sections_share_books_and_authors(async_engine, redis, monkeypatch):
+    monkeypatch.setattr(storefront_settings, "STOREFRONT_CATALOG_BOOKS", 3)
+    home = await StorefrontService(async_engine, redis).build()
+
+    assert [(b.book_id, b.units_sold) for b in home.bestsellers] == [(2, 3), (3, 1)]
+    assert sorted(home.new_arrivals) == [3, 4]
+    assert home.catalog == [1, 2, 3]
+    # Every book once, whatever the sections it appears in
+    assert sorted(book.id for book in home.books) == [1, 2, 3, 4]
+    assert {book.author_id for book in home.books} == {
+        author.id for author in home.authors
+    }
+
+
+@pytest.mark.asyncio
+async def test_home_is_cached_with_its_etag(async_engine, redis):
+    storefront = StorefrontService(async_engine, redis)
+    body, etag, coding = await storefront.get_home()
+    assert coding is None
+    assert etag.startswith('W/"') and etag.endswith('"')
+    assert len(json.loads(body)["books"]) == 4
+
+    async with AsyncSession(async_engine) as session:
+        book = await session.get(Book, 1)
+        book.title = "Renamed"
+        await session.commit()
+
+    # Served from the cache until it expires
+    assert await storefront.get_home() == (body, etag, None)
+    await redis.delete("storefront:home")
+    fresh_body, fresh_etag, _ = await storefront.get_home()
+    assert fresh_etag != etag
+    assert b"Renamed" in fresh_body
+
+
+@pytest.mark.asyncio
+async def test_home_is_cached_pre_compressed(async_engine, redis, monkeypatch):
+    storefront = StorefrontService(async_engine, redis)
+    monkeypatch.setattr(compression_settings, "COMPRESSION_MINIMUM_SIZE", 10**6)
+    # Too small to be worth compressing
+    body, etag, coding = await storefront.get_home("gzip")
+    assert coding is None
+    assert await storefront.get_home("gzip") == (body, etag, None)
+
+    await redis.delete("storefront:home")
+    monkeypatch.setattr(compression_settings, "COMPRESSION_MINIMUM_SIZE", 100)
+    compressed, etag, coding = await storefront.get_home("gzip")
+    assert coding == "gzip"
+    assert json.loads(gzip.decompress(compressed))["catalog"] == [1, 2, 3, 4]
+    # Hits are served straight from the compressed entry
+    assert await storefront.get_home("gzip") == (compressed, etag, "gzip")
+    plain, _, coding = await storefront.get_home()
+    assert coding is None and plain == gzip.decompress(compressed)
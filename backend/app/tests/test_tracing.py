@@ -0,0 +1,130 @@
+import json
+from typing import Annotated
+
+import httpx
+import pytest
+import pytest_asyncio
+from fakeredis import FakeAsyncRedis
+from fastapi import Depends, FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.config import tracing_settings
+from app.core.tracing import (
+    TraceExporter,
+    TracingMiddleware,
+    instrument_engine,
+    instrument_redis,
+    traced,
+    traced_methods,
+)
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+
+
+@pytest_asyncio.fixture
+async def engine():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    instrument_engine(engine)
+    yield engine
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def redis():
+    redis = FakeAsyncRedis()
+    instrument_redis(redis)
+    yield redis
+    await redis.flushall()
+    await redis.aclose()
+
+
+@traced_methods
+class ItemsService:
+    def __init__(self, engine, redis):
+        self._engine = engine
+        self._redis = redis
+
+    async def get(self, item_id: int) -> int:
+        await self._redis.incr(f"item:{item_id}:views")
+        async with self._engine.connect() as conn:
+            return (await conn.execute(text("SELECT :id"), {"id": item_id})).scalar()
+
+
+def _app(engine, redis, exporter: TraceExporter) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(TracingMiddleware, exporter=exporter)
+
+    @traced("get_service")
+    async def get_service() -> ItemsService:
+        return ItemsService(engine, redis)
+
+    @app.get("/items/{item_id}")
+    async def get_item(
+        item_id: int, service: Annotated[ItemsService, Depends(get_service)]
+    ):
+        return {"id": await service.get(item_id)}
+
+    return app
+
+
+def _client(app: FastAPI) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app), base_url="http://t")
+
+
+@pytest.mark.asyncio
+async def test_sampled_requests_are_exported_as_otlp(
+    engine, redis, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(tracing_settings, "TRACING_SAMPLE_RATE", 1.0)
+    monkeypatch.setattr(tracing_settings, "TRACING_EXPORT_PATH", tmp_path / "t.jsonl")
+    exporter = TraceExporter()
+    async with _client(_app(engine, redis, exporter)) as client:
+        response = await client.get("/items/7")
+    assert response.json() == {"id": 7}
+    assert await exporter.flush() == 5
+
+    request = json.loads((tmp_path / "t.jsonl").read_text())
+    spans = {
+        span["name"]: span
+        for span in request["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    }
+    assert set(spans) == {
+        "GET /items/{item_id}",
+        "get_service",
+        "ItemsService.get",
+        "redis INCRBY",
+        "SELECT",
+    }
+    root = spans["GET /items/{item_id}"]
+    assert "parentSpanId" not in root
+    assert response.headers["traceparent"] == (
+        f"00-{root['traceId']}-{root['spanId']}-01"
+    )
+    # Database and Redis calls nest under the service method calling them
+    service = spans["ItemsService.get"]
+    assert service["parentSpanId"] == root["spanId"]
+    assert spans["SELECT"]["parentSpanId"] == service["spanId"]
+    assert spans["redis INCRBY"]["parentSpanId"] == service["spanId"]
+    assert {"key": "db.statement", "value": {"stringValue": "SELECT ?"}} in spans[
+        "SELECT"
+    ]["attributes"]
+
+
+@pytest.mark.asyncio
+async def test_unsampled_requests_leave_no_trace(engine, redis):
+    exporter = TraceExporter()
+    async with _client(_app(engine, redis, exporter)) as client:
+        response = await client.get("/items/1")
+        assert "traceparent" not in response.headers
+
+        # Callers can decide for us
+        await client.get(
+            "/items/1", headers={"traceparent": f"00-{TRACE_ID}-00f067aa0ba902b7-00"}
+        )
+        assert not exporter._pending
+        response = await client.get(
+            "/items/1", headers={"traceparent": f"00-{TRACE_ID}-00f067aa0ba902b7-01"}
+        )
+    assert response.headers["traceparent"].startswith(f"00-{TRACE_ID}-")
+    assert {span.trace.trace_id for span in exporter._pending} == {TRACE_ID}
@@ -0,0 +1,129 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+import pytest_asyncio
+from fakeredis import FakeAsyncRedis
+from sqlmodel import SQLModel, text
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.database.models import Book
+from app.services.trending import TrendingService
+
+ASYNC_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+NOW = datetime(2026, 5, 4, 12, 30, tzinfo=timezone.utc)
+
+
+@pytest_asyncio.fixture(scope="module")
+async def async_engine():
+    engine = create_async_engine(ASYNC_DATABASE_URL, echo=False, future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def session(async_engine):
+    async_session_maker = sessionmaker(
+        async_engine, class_=AsyncSession, expire_on_commit=False
+    )
+    async with async_session_maker() as session:
+        await _seed(session)
+        yield session
+        await session.rollback()
+
+
+@pytest_asyncio.fixture
+async def redis():
+    redis = FakeAsyncRedis()
+    yield redis
+    await redis.flushall()
+    await redis.aclose()
+
+
+async def _seed(session: AsyncSession):
+    """Clear tables, then insert books 1-5."""
+    await session.execute(text("DELETE FROM book"))
+    session.add_all(
+        Book(
+            id=book_id,
+            title=f"Book {book_id}",
+            author_id=1,
+            isbn=f"isbn-{book_id}",
+            price=Decimal("9.99"),
+            published_date=datetime.utcnow(),
+            stock_quantity=10,
+        )
+        for book_id in range(1, 6)
+    )
+    await session.commit()
+
+
+async def _trending(trending: TrendingService, window: str, limit: int = 10):
+    rows = await trending.get_trending(window, limit=limit)
+    return [(row.id, units) for row, units in rows]
+
+
+@pytest.mark.asyncio
+async def test_sales_are_ranked_per_sliding_window(session: AsyncSession, redis):
+    # Two workers feeding the same buckets
+    first, second = TrendingService(redis, session), TrendingService(redis, session)
+    await first.record({1: 2, 2: 1}, at=NOW - timedelta(minutes=5), now=NOW)
+    await second.record({2: 3}, at=NOW - timedelta(minutes=50), now=NOW)
+    await second.record({3: 9}, at=NOW - timedelta(hours=3), now=NOW)
+    # Too old for any window
+    await first.record({4: 50}, at=NOW - timedelta(days=2), now=NOW)
+
+    await first.refresh(now=NOW)
+    assert await _trending(second, "hour") == [(2, 4), (1, 2)]
+    assert await _trending(second, "day") == [(3, 9), (2, 4), (1, 2)]
+    assert await _trending(second, "day", limit=1) == [(3, 9)]
+
+    # An hour later the first sales have slid out of the hour window
+    await first.refresh(now=NOW + timedelta(minutes=56))
+    assert await _trending(first, "hour") == []
+    assert await _trending(first, "day") == [(3, 9), (2, 4), (1, 2)]
+
+
+@pytest.mark.asyncio
+async def test_redelivered_events_are_counted_once(session: AsyncSession, redis):
+    trending = TrendingService(redis, session)
+    for _ in range(3):
+        await trending.record({1: 2}, at=NOW, now=NOW, event_id=7)
+    await trending.record({1: 1}, at=NOW, now=NOW, event_id=8)
+
+    await trending.refresh(now=NOW)
+    assert await _trending(trending, "hour") == [(1, 3)]
+    assert await _trending(trending, "day") == [(1, 3)]
+    # The markers only outlive the outbox's redelivery horizon, far short of
+    # the day window's buckets
+    day_bucket = f"trending:day:{int(NOW.timestamp() // 3600)}"
+    markers = await redis.keys("trending:*:event:*")
+    assert len(markers) == 4
+    for key in markers:
+        assert 0 < await redis.ttl(key) < await redis.ttl(day_bucket) / 10
+
+
+@pytest.mark.asyncio
+async def test_unmerged_window_is_merged_on_read(session: AsyncSession, redis):
+    trending = TrendingService(redis, session)
+    await trending.record({5: 1, 999: 4})
+
+    # Books that no longer exist are left out
+    assert await _trending(trending, "hour") == [(5, 1)]
+
+
+@pytest.mark.asyncio
+async def test_buckets_keep_bounded_counters(session: AsyncSession, redis):
+    trending = TrendingService(redis, session, capacity=2)
+    for quantities in ({1: 10}, {2: 1}, {3: 1}, {4: 1}, {1: 5}, {5: 2}):
+        await trending.record(quantities, at=NOW, now=NOW)
+
+    for key in await redis.keys("trending:*"):
+        assert await redis.zcard(key) <= 2
+    await trending.refresh(now=NOW)
+    # The heavy hitter survives; the newcomer inherits the evicted count
+    assert await _trending(trending, "hour") == [(1, 15), (5, 5)]
@@ -0,0 +1,138 @@
+"""
+Benchmark bulk order creation against the single-order loop.
+
+Creates the same set of orders (a few lines each, spread over a catalog of
+books and a set of customers) once with OrdersService.create per order, as
+integrations looping over POST /orders/{user_id} do, then with
+OrdersService.create_batch. Reports orders per second and the speedup.
+
+Usage (from the backend directory):
+    uv run python script/bench_batch_orders.py [--orders 2000] [--chunk-size 200]
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import func, select  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine  # noqa: E402
+from sqlmodel import SQLModel  # noqa: E402
+
+from app.api.schemas.orders import BatchOrder, OrderElement  # noqa: E402
+from app.database.models import Author, Book, Order, User  # noqa: E402
+from app.services.orders import OrdersService  # noqa: E402
+
+_BOOKS = 200
+_USERS = 50
+
+
+async def _reset(engine):
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.drop_all)
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+    async with AsyncSession(engine) as session:
+        session.add(Author(id=1, first_name="Bench", last_name="Author"))
+        session.add_all(
+            User(
+                id=user_id,
+                first_name="Library",
+                last_name=str(user_id),
+                email=f"library{user_id}@example.com",
+                password_hash="-",
+                created_at=datetime.utcnow(),
+            )
+            for user_id in range(1, _USERS + 1)
+        )
+        session.add_all(
+            Book(
+                id=book_id,
+                title=f"Book {book_id}",
+                author_id=1,
+                isbn=f"isbn-{book_id}",
+                price=Decimal("10.00"),
+                published_date=datetime.utcnow(),
+                stock_quantity=1_000_000,
+            )
+            for book_id in range(1, _BOOKS + 1)
+        )
+        await session.commit()
+
+
+def _orders(count: int) -> list[BatchOrder]:
+    rng = random.Random(42)
+    return [
+        BatchOrder(
+            user_id=rng.randint(1, _USERS),
+            items=[
+                OrderElement(book_id=book_id, quantity=rng.randint(1, 3))
+                for book_id in rng.sample(range(1, _BOOKS + 1), rng.randint(1, 4))
+            ],
+        )
+        for _ in range(count)
+    ]
+
+
+async def _count_orders(engine) -> int:
+    async with AsyncSession(engine) as session:
+        result = await session.execute(select(func.count()).select_from(Order))
+        return result.scalar_one()
+
+
+async def _loop(engine, orders: list[BatchOrder]):
+    async with AsyncSession(engine) as session:
+        svc = OrdersService(session)
+        for order in orders:
+            await svc.create(order.user_id, order.items)
+
+
+async def _batch(engine, orders: list[BatchOrder], chunk_size: int):
+    async with AsyncSession(engine) as session:
+        batch = await OrdersService(session).create_batch(orders, chunk_size=chunk_size)
+    if batch.rejected:
+        raise SystemExit(f"{batch.rejected} orders rejected")
+
+
+async def run(database_url: str, count: int, chunk_size: int):
+    engine = create_async_engine(database_url)
+    orders = _orders(count)
+    rates = {}
+    for label, create in (
+        ("loop", lambda: _loop(engine, orders)),
+        ("batch", lambda: _batch(engine, orders, chunk_size)),
+    ):
+        await _reset(engine)
+        started = time.perf_counter()
+        await create()
+        elapsed = time.perf_counter() - started
+        assert await _count_orders(engine) == count
+        rates[label] = count / elapsed
+        print(f"{label:>6}: {rates[label]:8.0f} orders/s ({elapsed:.2f}s)")
+    await engine.dispose()
+    print(f"speedup: {rates['batch'] / rates['loop']:.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--database-url")
+    parser.add_argument("--orders", type=int, default=2000)
+    parser.add_argument("--chunk-size", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = (
+            args.database_url or f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}"
+        )
+        asyncio.run(run(database_url, args.orders, args.chunk_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Benchmark the lean read path of the catalog.
+
+Compares what `GET /books` and `GET /books/bestsellers/monthly` do with
+hydrated ORM instances (`get_all`, `get_monthly_bestsellers`) against the
+lean `*_records` variants, service call plus JSON encoding, on an
+in-memory SQLite catalog.
+
+Usage (from the backend directory):
+    uv run python script/bench_lean_reads.py [--books 100000] [--rounds 5]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import insert  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+from sqlmodel import SQLModel  # noqa: E402
+
+from app.api.serialization import encode_bestsellers, encode_books  # noqa: E402
+from app.database.models import Author, Book, Order, OrderItem, User  # noqa: E402
+from app.services.books import BooksService  # noqa: E402
+
+AUTHORS = 1000
+BESTSELLERS = 1000
+
+
+async def seed(engine, books: int):
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+        await conn.execute(
+            insert(Author),
+            [
+                {
+                    "id": i,
+                    "first_name": f"First {i}",
+                    "last_name": f"Last {i}",
+                    "biography": "An author biography. " * 10,
+                }
+                for i in range(1, AUTHORS + 1)
+            ],
+        )
+        await conn.execute(
+            insert(Book),
+            [
+                {
+                    "id": i,
+                    "title": f"Book {i}",
+                    "author_id": i % AUTHORS + 1,
+                    "isbn": f"isbn-{i}",
+                    "price": Decimal("12.99"),
+                    "published_date": datetime(2020, 1, 1),
+                    "description": "A book description. " * 20,
+                    "stock_quantity": i % 50,
+                }
+                for i in range(1, books + 1)
+            ],
+        )
+        # A single order this month, selling every book of the catalog
+        await conn.execute(
+            insert(User),
+            [
+                {
+                    "id": 1,
+                    "first_name": "Buyer",
+                    "last_name": "One",
+                    "email": "buyer@example.com",
+                    "password_hash": "hash",
+                    "created_at": now,
+                }
+            ],
+        )
+        await conn.execute(
+            insert(Order),
+            [
+                {
+                    "id": 1,
+                    "user_id": 1,
+                    "order_date": now.replace(day=1),
+                    "total_price": Decimal("0"),
+                    "status": "Completed",
+                }
+            ],
+        )
+        await conn.execute(
+            insert(OrderItem),
+            [
+                {
+                    "order_id": 1,
+                    "book_id": i,
+                    "quantity": i % 7 + 1,
+                    "price_at_purchase": Decimal("12.99"),
+                }
+                for i in range(1, books + 1)
+            ],
+        )
+
+
+async def orm_catalog(service: BooksService) -> bytes:
+    return encode_books(await service.get_all())
+
+
+async def lean_catalog(service: BooksService) -> bytes:
+    return encode_books(await service.get_all_records())
+
+
+async def orm_bestsellers(service: BooksService) -> bytes:
+    return encode_bestsellers(await service.get_monthly_bestsellers(limit=BESTSELLERS))
+
+
+async def lean_bestsellers(service: BooksService) -> bytes:
+    return encode_bestsellers(
+        await service.get_monthly_bestseller_records(limit=BESTSELLERS)
+    )
+
+
+async def bench(fn, maker, rounds: int) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        # A fresh session per call, like every request gets
+        async with maker() as session:
+            start = time.perf_counter()
+            await fn(BooksService(session))
+            best = min(best, time.perf_counter() - start)
+    return best
+
+
+async def run(books: int, rounds: int):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    await seed(engine, books)
+    maker = async_sessionmaker(engine, expire_on_commit=False)
+
+    print(f"books: {books}, best of {rounds} rounds")
+    for label, orm, lean in (
+        ("GET /books", orm_catalog, lean_catalog),
+        (f"bestsellers (top {BESTSELLERS})", orm_bestsellers, lean_bestsellers),
+    ):
+        async with maker() as session:
+            service = BooksService(session)
+            assert await orm(service) == await lean(service)
+        orm_time = await bench(orm, maker, rounds)
+        lean_time = await bench(lean, maker, rounds)
+        print(label)
+        print(f"  ORM instances: {orm_time * 1000:8.1f} ms")
+        speedup = orm_time / lean_time
+        print(f"  lean records:  {lean_time * 1000:8.1f} ms  ({speedup:.1f}x)")
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--books", type=int, default=100_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.books, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark the book listing serialization paths.
+
+Compares the previous route implementation (model_dump -> dict -> BookRead,
+followed by FastAPI's response_model validation and JSON rendering) against
+the compiled `app.api.serialization` path, on an in-memory listing of ORM
+instances.
+
+Usage (from the backend directory):
+    uv run python script/bench_serialization.py [--books 10000] [--rounds 5]
+"""
+
+import argparse
+import json
+import sys
+import time
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from pydantic import TypeAdapter  # noqa: E402
+
+from app.api.schemas.books_authors import BookRead  # noqa: E402
+from app.api.serialization import encode_books  # noqa: E402
+from app.database.models import Author, Book  # noqa: E402
+
+
+def make_books(count: int) -> List[Book]:
+    authors = [
+        Author(
+            id=i,
+            first_name=f"First {i}",
+            last_name=f"Last {i}",
+            biography="An author biography. " * 10,
+        )
+        for i in range(1, 101)
+    ]
+    return [
+        Book(
+            id=i,
+            title=f"Book {i}",
+            author_id=authors[i % 100].id,
+            isbn=f"isbn-{i}",
+            price=Decimal("12.99"),
+            published_date=datetime(2020, 1, 1),
+            description="A book description. " * 20,
+            stock_quantity=i % 50,
+            cover_image_url=None,
+            author=authors[i % 100],
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+_response_adapter = TypeAdapter(List[BookRead])
+
+
+def legacy_path(books: List[Book]) -> bytes:
+    # What the route used to do...
+    result = []
+    for b in books:
+        bd = b.model_dump()
+        bd["author"] = b.author.model_dump() if getattr(b, "author", None) else None
+        result.append(BookRead(**bd))
+    # ...and what FastAPI then did with it through `response_model`.
+    validated = _response_adapter.validate_python(result)
+    content = _response_adapter.dump_python(validated, mode="json")
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def fast_path(books: List[Book]) -> bytes:
+    return encode_books(books)
+
+
+def bench(fn, books: List[Book], rounds: int) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn(books)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--books", type=int, default=10_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    books = make_books(args.books)
+    assert json.loads(legacy_path(books)) == json.loads(fast_path(books))
+
+    legacy = bench(legacy_path, books, args.rounds)
+    fast = bench(fast_path, books, args.rounds)
+    print(f"books: {args.books}, best of {args.rounds} rounds")
+    print(f"legacy path: {legacy * 1000:8.1f} ms")
+    print(f"fast path:   {fast * 1000:8.1f} ms  ({legacy / fast:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Measure API worker cold-start time for each DB_STARTUP_MODE.
+
+Boots N workers at once (separate processes sharing one SQLite database,
+like uvicorn/gunicorn workers would) and reports the time each one spends
+in the application lifespan before it can serve requests.
+
+Usage (from the backend directory, on a migrated database):
+    uv run python script/bench_startup.py [--workers 8]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parents[1]
+
+_WORKER = """
+import asyncio, logging, time
+logging.disable(logging.CRITICAL)
+from app.database.session import engine
+engine.sync_engine.echo = False
+from app.main import app, lifespan
+
+async def boot():
+    async with lifespan(app):
+        print(app.state.startup_seconds)
+
+asyncio.run(boot())
+"""
+
+
+def run_workers(mode: str, workers: int) -> list[float]:
+    env = {**os.environ, "DB_STARTUP_MODE": mode, "PYTHONPATH": str(BACKEND)}
+    procs = [
+        subprocess.Popen(
+            [sys.executable, "-c", _WORKER],
+            cwd=BACKEND,
+            env=env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        for _ in range(workers)
+    ]
+    timings = []
+    for proc in procs:
+        out, err = proc.communicate()
+        if proc.returncode != 0:
+            raise SystemExit(f"worker failed in {mode} mode:\n{err}")
+        timings.append(float(out.strip()))
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    for mode in ("create", "verify"):
+        timings = run_workers(mode, args.workers)
+        print(
+            f"{mode:>6}: median {statistics.median(timings) * 1000:7.1f} ms, "
+            f"max {max(timings) * 1000:7.1f} ms over {args.workers} workers"
+        )
+
+
+if __name__ == "__main__":
+    main()
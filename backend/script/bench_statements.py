@@ -0,0 +1,176 @@
+"""
+Benchmark the Python-side cost of the catalog queries.
+
+Compares building the statements of the hot BooksService queries on every
+call (what the service used to do) against the prebuilt statements of
+`app.services.books`, first for the construction and compiled-cache lookup
+alone (what SQLAlchemy does before anything reaches the driver), then for
+whole service calls on an in-memory SQLite catalog.
+
+Usage (from the backend directory):
+    uv run python script/bench_statements.py [--calls 5000] [--rounds 5]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import desc, func  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+from sqlalchemy.orm import selectinload  # noqa: E402
+from sqlmodel import SQLModel, select  # noqa: E402
+
+from app.database.models import Author, Book, Order, OrderItem  # noqa: E402
+from app.services import books  # noqa: E402
+from app.services.books import BooksService  # noqa: E402
+
+CUTOFF = datetime(2020, 1, 1)
+
+
+# What the service used to build on every call
+def legacy_by_id():
+    return select(Book).options(selectinload(Book.author)).where(Book.id == 42)
+
+
+def legacy_new_arrivals():
+    return (
+        select(Book)
+        .options(selectinload(Book.author))
+        .where(Book.published_date >= CUTOFF)
+        .order_by(desc(Book.published_date))
+        .limit(10)
+    )
+
+
+def legacy_bestseller_counts():
+    sold = (
+        select(OrderItem.book_id, OrderItem.quantity)
+        .join(Order, Order.id == OrderItem.order_id)
+        .where(
+            (Order.status == "Created") | (Order.status == "Completed"),
+            Order.order_date >= CUTOFF,
+            Order.order_date < CUTOFF + timedelta(days=31),
+        )
+        .subquery()
+    )
+    return (
+        select(sold.c.book_id, func.sum(sold.c.quantity).label("units_sold"))
+        .group_by(sold.c.book_id)
+        .order_by(desc(func.sum(sold.c.quantity)))
+        .limit(10)
+    )
+
+
+def legacy_queries():
+    for build in (legacy_by_id, legacy_new_arrivals, legacy_bestseller_counts):
+        build()._generate_cache_key()
+
+
+def prebuilt_queries():
+    for stmt in (
+        books._BOOK_BY_ID,
+        books._FIRST_NEW_ARRIVALS[True],
+        books._BESTSELLER_COUNTS[False],
+    ):
+        stmt._generate_cache_key()
+
+
+def bench(fn, calls: int, rounds: int) -> float:
+    """Best time per call, in microseconds."""
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        best = min(best, time.perf_counter() - start)
+    return best / calls * 1e6
+
+
+class LegacyBooksService(BooksService):
+    async def get_by_id(self, book_id: int):
+        stmt = select(Book).options(selectinload(Book.author)).where(Book.id == book_id)
+        result = await self._session.execute(stmt)
+        return result.scalar_one_or_none()
+
+    async def get_new_arrivals(self, days: int = 30, limit=10, with_authors=True):
+        stmt = (
+            select(Book)
+            .options(selectinload(Book.author))
+            .where(Book.published_date >= datetime.now() - timedelta(days=days))
+            .order_by(desc(Book.published_date))
+            .limit(limit)
+        )
+        result = await self._session.execute(stmt)
+        return result.scalars().all()
+
+
+async def bench_service(service_class, maker, calls: int, rounds: int) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        async with maker() as session:
+            service = service_class(session)
+            start = time.perf_counter()
+            for i in range(calls):
+                await service.get_by_id(i % 1000 + 1)
+                await service.get_new_arrivals(days=365 * 10)
+            best = min(best, time.perf_counter() - start)
+    return best / calls * 1e6
+
+
+async def bench_services(calls: int, rounds: int):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    maker = async_sessionmaker(engine, expire_on_commit=False)
+    async with maker() as session:
+        session.add_all(
+            Author(id=i, first_name=f"First {i}", last_name=f"Last {i}")
+            for i in range(1, 101)
+        )
+        session.add_all(
+            Book(
+                id=i,
+                title=f"Book {i}",
+                author_id=i % 100 + 1,
+                isbn=f"isbn-{i}",
+                price=Decimal("12.99"),
+                published_date=datetime(2020, 1, 1) + timedelta(days=i),
+                stock_quantity=i % 50,
+            )
+            for i in range(1, 1001)
+        )
+        await session.commit()
+
+    legacy = await bench_service(LegacyBooksService, maker, calls, rounds)
+    prebuilt = await bench_service(BooksService, maker, calls, rounds)
+    await engine.dispose()
+    return legacy, prebuilt
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    legacy = bench(legacy_queries, args.calls, args.rounds)
+    prebuilt = bench(prebuilt_queries, args.calls, args.rounds)
+    print(f"calls: {args.calls}, best of {args.rounds} rounds")
+    print("statement construction + cache key (by id, new arrivals, bestsellers)")
+    print(f"  per call:  {legacy:8.1f} us")
+    print(f"  prebuilt:  {prebuilt:8.1f} us  ({legacy / prebuilt:.1f}x)")
+
+    legacy, prebuilt = asyncio.run(bench_services(args.calls // 5, args.rounds))
+    print("get_by_id + get_new_arrivals on 1000 books (in-memory SQLite)")
+    print(f"  per call:  {legacy:8.1f} us")
+    print(f"  prebuilt:  {prebuilt:8.1f} us  ({legacy / prebuilt:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()